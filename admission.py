@@ -0,0 +1,172 @@
+"""Admission control: per-route-class concurrency limits with bounded queues.
+
+Requests are sorted into classes by method and path prefix (``RULES``):
+
+- ``auth``: login and registration, bcrypt on the password pool
+- ``payments``: payment initiation, waiting on Eversend
+- ``reads``: the GET endpoints that hit the database
+
+Each class admits ``limit`` requests at a time per worker; the next
+``queue`` wait (FIFO) for up to ``ADMISSION_QUEUE_TIMEOUT`` seconds, and
+anything beyond that is answered 503 with ``Retry-After`` straight away.
+A login burst therefore fills the auth queue and gets shed while job
+listings keep their own slots. Routes outside the rules (SSE streams,
+webhooks, /metrics, static pages) are not limited.
+
+Settings (environment), per class ``AUTH`` / ``PAYMENTS`` / ``READS``:
+    ADMISSION_ENABLED          1 (default) or 0
+    ADMISSION_<CLASS>_LIMIT    concurrent requests per worker
+    ADMISSION_<CLASS>_QUEUE    waiting requests per worker before shedding
+    ADMISSION_QUEUE_TIMEOUT    longest wait for a slot in seconds (default 5)
+    ADMISSION_RETRY_AFTER      Retry-After sent with the 503 (default 1)
+
+Slot usage, queue depth, queue wait and sheds are exported on /metrics
+(``admission_*``).
+"""
+import asyncio
+import os
+import time
+from collections import deque
+
+from fastapi.responses import JSONResponse
+
+import metrics
+
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "1") == "1"
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "5"))
+ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", "1"))
+
+DEFAULT_LIMITS = {
+    "auth": (8, 64),
+    "payments": (16, 64),
+    "reads": (32, 256),
+}
+
+# (class, methods, path prefix); the first match wins
+RULES = [
+    ("auth", {"POST"}, "/auth/login"),
+    ("auth", {"POST"}, "/auth/register"),
+    ("payments", {"POST"}, "/payments/initiate"),
+    ("reads", {"GET", "HEAD"}, "/auth/notifications/"),
+    ("reads", {"GET", "HEAD"}, "/jobs/"),
+    ("reads", {"GET", "HEAD"}, "/teachers/"),
+    ("reads", {"GET", "HEAD"}, "/schools/"),
+]
+
+
+def _setting(name: str, field: str, default: int) -> int:
+    return int(os.getenv(f"ADMISSION_{name.upper()}_{field}", str(default)))
+
+
+class RouteClass:
+    """``limit`` slots and a FIFO of at most ``queue_size`` waiters.
+
+    Only touched from the event loop, so plain counters are enough. A
+    released slot is handed straight to the oldest waiter and stays counted
+    in ``active`` until that waiter releases it, so a newcomer arriving
+    before the waiter has run still finds the class full and queues.
+    """
+
+    def __init__(self, name: str, limit: int, queue_size: int):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.active = 0
+        self._waiters = deque()
+        self._in_flight = metrics.ADMISSION_IN_FLIGHT.labels(name)
+        self._queued = metrics.ADMISSION_QUEUED.labels(name)
+        self._wait_seconds = metrics.ADMISSION_WAIT_SECONDS.labels(name)
+
+    async def acquire(self, timeout: float):
+        """None once a slot is held, otherwise why the request was shed."""
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            self._in_flight.inc()
+            self._wait_seconds.observe(0.0)
+            return None
+        if len(self._waiters) >= self.queue_size:
+            return "queue_full"
+
+        started = time.perf_counter()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._queued.inc()
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            # Pass on a slot handed over as the wait ran out
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            return "timeout"
+        except asyncio.CancelledError:
+            # Client went away; pass on a slot handed over at the last moment
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            self._queued.dec()
+            if not waiter.done():
+                waiter.cancel()
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+        # The slot was handed over: active and in-flight already count it
+        self._wait_seconds.observe(time.perf_counter() - started)
+        return None
+
+    def release(self):
+        """Hand the slot to the oldest live waiter, or free it."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+        self._in_flight.dec()
+
+
+class AdmissionMiddleware:
+    """Pure ASGI middleware; the slot is held until the response body has
+    been sent, so streamed exports count against their class too."""
+
+    def __init__(self, app, rules=RULES, limits=None, queue_timeout: float = ADMISSION_QUEUE_TIMEOUT,
+                 enabled: bool = ADMISSION_ENABLED):
+        self.app = app
+        self.rules = rules
+        self.queue_timeout = queue_timeout
+        self.enabled = enabled
+        limits = limits or {
+            name: (_setting(name, "LIMIT", limit), _setting(name, "QUEUE", queue))
+            for name, (limit, queue) in DEFAULT_LIMITS.items()
+        }
+        self.classes = {name: RouteClass(name, limit, queue) for name, (limit, queue) in limits.items()}
+
+    def classify(self, method: str, path: str):
+        for name, methods, prefix in self.rules:
+            if method in methods and path.startswith(prefix):
+                return self.classes.get(name)
+        return None
+
+    async def __call__(self, scope, receive, send):
+        route_class = None
+        if self.enabled and scope["type"] == "http":
+            route_class = self.classify(scope["method"], scope["path"])
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        rejected = await route_class.acquire(self.queue_timeout)
+        if rejected:
+            metrics.ADMISSION_REJECTED.labels(route_class.name, rejected).inc()
+            response = JSONResponse(
+                status_code=503,
+                content={"detail": "Server busy, please retry"},
+                headers={"Retry-After": str(ADMISSION_RETRY_AFTER)},
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            route_class.release()
@@ -1,42 +1,93 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from database import SessionLocal
+from database import get_db, get_runner, SessionRunner
 from models import User, Notification
-from schemas import UserCreate, UserLogin, NotificationOut
-import bcrypt
+from schemas import UserCreate, UserLogin, NotificationPage, NotificationMarkRead
+from typing import Optional
+from starlette.concurrency import run_in_threadpool
+from passwords import needs_rehash
+import notifications
+import passwords
+import versions
 
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
 
-def hash_password(password: str) -> str:
-    """Hash a password using bcrypt."""
-    salt = bcrypt.gensalt()
-    return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+def _load_notifications(db: Session, user_id: int, request: Request, response: Response,
+                        cursor=None, limit=20, unread_only=False):
+    # Validator from this user's rows only, so other users' notifications
+    # don't invalidate it
+    total, last_id = db.query(func.count(Notification.id), func.max(Notification.id)).filter(
+        Notification.recipient_user_id == user_id).one()
+    unread = notifications.unread_count(db, user_id)
+    not_modified = versions.conditional(request, response, f"notifications:{user_id}:{total}:{last_id}:{unread}")
+    if not_modified:
+        return not_modified
 
+    try:
+        notifs, next_cursor = notifications.inbox(db, user_id, cursor=cursor, limit=limit, unread_only=unread_only)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"notifications": notifs, "unread_count": unread, "next_cursor": next_cursor}
+
+
+# --- Notification Endpoints ---
+# Inbox page: unread first, newest first; pass next_cursor back for the next page
+@router.get("/notifications/{user_id}", response_model=NotificationPage)
+async def get_notifications(
+    user_id: int,
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    unread_only: bool = False,
+    runner: SessionRunner = Depends(get_runner),
+):
+    return await runner.run(_load_notifications, user_id, request, response,
+                            cursor=cursor, limit=limit, unread_only=unread_only)
+
+
+@router.get("/notifications/{user_id}/unread_count")
+async def get_unread_count(user_id: int, runner: SessionRunner = Depends(get_runner)):
+    return {"unread_count": await runner.run(notifications.unread_count, user_id)}
+
+
+@router.post("/notifications/{user_id}/read")
+def mark_notifications_read(user_id: int, body: NotificationMarkRead, db: Session = Depends(get_db)):
+    """Mark the given ids, everything up to before_id, or (neither) all as read"""
+    marked = notifications.mark_read(db, user_id, ids=body.ids, before_id=body.before_id)
+    db.commit()
+    return {"marked": marked, "unread_count": notifications.unread_count(db, user_id)}
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a plaintext password against a bcrypt hash."""
-    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
 
+def _find_user(db: Session, email: str):
+    return db.query(User).filter(User.email == email).first()
 
-# Dependency for database session
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+
+def _create_user(db: Session, user: UserCreate, hashed_password: str) -> User:
+    new_user = User(
+        name=user.name,
+        email=user.email,
+        password=hashed_password,  # Store hashed password
+        role=user.role.lower(),
+    )
+    db.add(new_user)
+    db.commit()
+    db.refresh(new_user)
+    return new_user
 
 
-# --- Notification Endpoint for Teachers ---
-@router.get("/notifications/{user_id}", response_model=list[NotificationOut])
-def get_notifications(user_id: int, db: Session = Depends(get_db)):
-    notifs = db.query(Notification).filter(Notification.recipient_user_id == user_id).order_by(Notification.created_at.desc()).all()
-    return notifs
+def _store_password_hash(db: Session, user: User, hashed_password: str) -> None:
+    user.password = hashed_password
+    db.commit()
+
 
+# register/login are async so bcrypt runs on the password process pool while
+# the blocking database calls go to the threadpool.
 @router.post("/register")
-def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, db: Session = Depends(get_db)):
     # Server-side validation
     if len(user.password) < 6:
         raise HTTPException(status_code=400, detail="Password must be at least 6 characters")
@@ -45,37 +96,36 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="Name cannot be empty")
     
     # Check if email already exists
-    existing_user = db.query(User).filter(User.email == user.email).first()
+    existing_user = await run_in_threadpool(_find_user, db, user.email)
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
 
     # Hash password before storing
-    hashed_password = hash_password(user.password)
+    hashed_password = await passwords.pool.hash(user.password)
 
-    new_user = User(
-        name=user.name,
-        email=user.email,
-        password=hashed_password,  # Store hashed password
-        role=user.role.lower(),
-    )
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    new_user = await run_in_threadpool(_create_user, db, user, hashed_password)
 
     return {"message": "Registration successful", "user_id": new_user.id}
 
 
 @router.post("/login")
-def login(credentials: UserLogin, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == credentials.email).first()
+async def login(credentials: UserLogin, db: Session = Depends(get_db)):
+    user = await run_in_threadpool(_find_user, db, credentials.email)
 
-    if not user or not verify_password(credentials.password, user.password):
+    if not user or not await passwords.pool.verify(credentials.password, user.password):
         raise HTTPException(status_code=401, detail="Invalid email or password")
 
     # For UI routing we return the user's activation status instead of blocking login.
     # Frontend will redirect teachers who are not active to the payment page.
-    return {
+    response = {
         "message": "Login successful",
         "user": {"id": user.id, "name": user.name, "role": user.role},
         "active": bool(getattr(user, 'active', False))
     }
+
+    # Transparently upgrade hashes made with an older cost factor
+    if needs_rehash(user.password):
+        new_hash = await passwords.pool.hash(credentials.password)
+        await run_in_threadpool(_store_password_hash, db, user, new_hash)
+
+    return response
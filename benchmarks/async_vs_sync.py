@@ -0,0 +1,142 @@
+"""Throughput of the hot read endpoints with DB_ASYNC=0 versus DB_ASYNC=1.
+
+Seeds a throwaway SQLite database, starts the API under uvicorn once per
+mode, fires concurrent GET requests at the list endpoints and reports
+requests per second and p50/p95 latency.
+
+    python benchmarks/async_vs_sync.py --concurrency 64 --requests 2000
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import httpx  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+PATHS = ["/teachers/?limit=50", "/jobs/", "/jobs/school/1", "/auth/notifications/1"]
+
+
+def seed(url: str, teachers: int, jobs: int):
+    from database import Base, make_engine
+    from models import User, Teacher, School, JobPosting, Notification
+
+    engine = make_engine(url)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    school = School(name="Bench School", email="bench@school.test", phone="0700000000", location="Kampala")
+    db.add(school)
+    db.flush()
+    for i in range(teachers):
+        user = User(name=f"Teacher {i}", email=f"t{i}@bench.test", password="x", role="teacher", active=i % 2 == 0)
+        db.add(user)
+        db.flush()
+        db.add(Teacher(user_id=user.id, subject=["Maths", "Physics", "English"][i % 3],
+                       location="Kampala", experience_years=i % 15))
+        db.add(Notification(recipient_user_id=1, type="bench", content=f"note {i}"))
+    for i in range(jobs):
+        db.add(JobPosting(school_id=school.id, title=f"Job {i}", subject="Maths", experience="2 years",
+                          description="Benchmark posting", salary="1,000,000", status="Active"))
+    db.commit()
+    db.close()
+    engine.dispose()
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _wait_ready(base: str, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as http:
+        while time.monotonic() < deadline:
+            try:
+                if (await http.get(base + "/")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+async def drive(base: str, concurrency: int, total: int) -> dict:
+    latencies = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def user(http):
+        nonlocal errors
+        for i in counter:
+            started = time.perf_counter()
+            try:
+                res = await http.get(PATHS[i % len(PATHS)])
+                ok = res.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - started)
+            if not ok:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base, limits=limits, timeout=60) as http:
+        started = time.perf_counter()
+        await asyncio.gather(*(user(http) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "req_per_second": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2),
+    }
+
+
+def run(mode: str, url: str, concurrency: int, total: int) -> dict:
+    port = _free_port()
+    env = dict(os.environ, DATABASE_URL=url, DB_ASYNC=mode)
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=env,
+    )
+    try:
+        base = f"http://127.0.0.1:{port}"
+        asyncio.run(_wait_ready(base))
+        asyncio.run(drive(base, concurrency, min(total, 100)))  # warm-up
+        result = asyncio.run(drive(base, concurrency, total))
+    finally:
+        server.terminate()
+        server.wait()
+    return {"DB_ASYNC": mode, "concurrency": concurrency, **result}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--teachers", type=int, default=500)
+    parser.add_argument("--jobs", type=int, default=200)
+    parser.add_argument("--mode", choices=["0", "1", "both"], default="both")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        seed(url, args.teachers, args.jobs)
+        modes = ["0", "1"] if args.mode == "both" else [args.mode]
+        for mode in modes:
+            print(run(mode, url, args.concurrency, args.requests))
+
+
+if __name__ == "__main__":
+    main()
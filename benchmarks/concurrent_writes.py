@@ -0,0 +1,102 @@
+"""Concurrent-write benchmark for the SQLite engine profile.
+
+Simulates gunicorn workers: N processes each commit M small transactions
+(one notification insert plus a read, like a typical handler) against the
+same SQLite file, and reports throughput and "database is locked" errors
+for the tuned profile from database.make_engine versus the previous
+default engine.
+
+    python benchmarks/concurrent_writes.py --processes 4 --writes 500
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, func  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+
+def _engine(url: str, profile: str):
+    from database import make_engine
+    if profile == "tuned":
+        return make_engine(url)
+    return create_engine(url, connect_args={"check_same_thread": False})
+
+
+def _worker(url: str, profile: str, writes: int, results):
+    from models import Notification
+    engine = _engine(url, profile)
+    Session = sessionmaker(bind=engine)
+    ok = locked = 0
+    started = time.perf_counter()
+    for i in range(writes):
+        db = Session()
+        try:
+            db.add(Notification(recipient_user_id=os.getpid(), type="bench", content=f"write {i}"))
+            db.flush()
+            db.query(func.count(Notification.id)).filter(Notification.recipient_user_id == os.getpid()).scalar()
+            db.commit()
+            ok += 1
+        except OperationalError as e:
+            db.rollback()
+            if "locked" in str(e):
+                locked += 1
+            else:
+                raise
+        finally:
+            db.close()
+    results.put((ok, locked, time.perf_counter() - started))
+    engine.dispose()
+
+
+def run(profile: str, processes: int, writes: int) -> dict:
+    from database import Base
+    import models  # noqa: F401  (registers tables)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        setup = _engine(url, profile)
+        Base.metadata.create_all(bind=setup)
+        setup.dispose()
+
+        results = multiprocessing.Queue()
+        procs = [multiprocessing.Process(target=_worker, args=(url, profile, writes, results)) for _ in range(processes)]
+        started = time.perf_counter()
+        for p in procs:
+            p.start()
+        outcomes = [results.get() for _ in procs]
+        for p in procs:
+            p.join()
+        elapsed = time.perf_counter() - started
+
+    committed = sum(o[0] for o in outcomes)
+    return {
+        "profile": profile,
+        "processes": processes,
+        "committed": committed,
+        "locked_errors": sum(o[1] for o in outcomes),
+        "seconds": round(elapsed, 3),
+        "writes_per_second": round(committed / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--writes", type=int, default=300, help="transactions per process")
+    parser.add_argument("--profile", choices=["tuned", "default", "both"], default="both")
+    args = parser.parse_args()
+
+    profiles = ["default", "tuned"] if args.profile == "both" else [args.profile]
+    for profile in profiles:
+        print(run(profile, args.processes, args.writes))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,426 @@
+"""Scenario load test for every router, with reports that diff between commits.
+
+``run`` seeds an empty database with ``benchmarks/seed.py`` (a throwaway
+SQLite file unless --database-url is given), starts ``eversend_stub`` and
+the API under uvicorn, then drives
+each scenario with --concurrency virtual users for --duration seconds:
+
+- ``login_storm``: logins (some with a wrong password) and registrations
+- ``dashboard_polling``: the teacher and school dashboards' refresh loop,
+  revalidating with the ETags they were given, and the occasional mark-read
+- ``job_fanout``: schools post jobs (queueing notification fan-out),
+  teachers apply, schools read applications and ranked candidates
+- ``webhook_burst``: payment initiation through the stub, then Eversend
+  status callbacks including duplicate retries
+- ``browse``: teacher search, profiles, schools, job search and details
+
+It prints per-endpoint request counts, errors (unexpected status or
+transport failure), shed load (429/503), throughput and p50/p95/p99
+latency, and with --output writes the same as JSON together with the
+commit, settings and data volumes. ``compare`` diffs two such reports and
+can fail the build on a p95 regression. The SSE stream (/events) is
+long-lived and not measured here.
+
+    python benchmarks/loadtest.py run --duration 20 --concurrency 32 --output before.json
+    git checkout my-branch
+    python benchmarks/loadtest.py run --duration 20 --concurrency 32 --output after.json
+    python benchmarks/loadtest.py compare before.json after.json --threshold 10
+
+Use a fresh database per run; --bcrypt-rounds 4 takes password hashing
+out of the picture when measuring everything else.
+"""
+import argparse
+import asyncio
+import collections
+import itertools
+import json
+import math
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import httpx  # noqa: E402
+
+import seed as seeder  # noqa: E402
+
+SHED_STATUS = {429, 503}
+
+# Unique across warm-up and measured runs
+_registrations = itertools.count(1)
+
+
+class Recorder:
+    """Latencies and status codes per endpoint label."""
+
+    def __init__(self):
+        self.latencies = collections.defaultdict(list)
+        self.statuses = collections.defaultdict(collections.Counter)
+        self.errors = collections.Counter()
+
+    def record(self, label: str, seconds: float, status, ok: bool):
+        self.latencies[label].append(seconds)
+        self.statuses[label][str(status)] += 1
+        if not ok:
+            self.errors[label] += 1
+
+    def summary(self, elapsed: float) -> dict:
+        endpoints = {}
+        for label in sorted(self.latencies):
+            latencies = sorted(self.latencies[label])
+            shed = sum(count for status, count in self.statuses[label].items() if status.isdigit() and int(status) in SHED_STATUS)
+            endpoints[label] = {
+                "requests": len(latencies),
+                "errors": self.errors[label],
+                "shed": shed,
+                "rps": round(len(latencies) / elapsed, 2),
+                "p50_ms": _percentile(latencies, 0.50),
+                "p95_ms": _percentile(latencies, 0.95),
+                "p99_ms": _percentile(latencies, 0.99),
+                "statuses": dict(self.statuses[label]),
+            }
+        total = sum(len(v) for v in self.latencies.values())
+        return {"elapsed_s": round(elapsed, 2), "requests": total, "rps": round(total / elapsed, 2), "endpoints": endpoints}
+
+
+def _percentile(sorted_values: list, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(0, math.ceil(fraction * len(sorted_values)) - 1)
+    return round(sorted_values[rank] * 1000, 2)
+
+
+class VirtualUser:
+    """One simulated client: its own RNG, ETag cache and scenario state."""
+
+    def __init__(self, http: httpx.AsyncClient, data: dict, recorder: Recorder, number: int, seed: int):
+        self.http = http
+        self.data = data
+        self.recorder = recorder
+        self.number = number
+        self.rng = random.Random(seed * 1000 + number)
+        self.etags = {}
+        self.state = {}
+
+    async def call(self, label: str, method: str, path: str, expected=(200,), revalidate: bool = False, **kwargs):
+        headers = kwargs.pop("headers", {})
+        if revalidate and path in self.etags:
+            headers["If-None-Match"] = self.etags[path]
+        started = time.perf_counter()
+        try:
+            res = await self.http.request(method, path, headers=headers, **kwargs)
+        except httpx.HTTPError as e:
+            self.recorder.record(label, time.perf_counter() - started, type(e).__name__, False)
+            return None
+        elapsed = time.perf_counter() - started
+        ok = res.status_code in expected or (revalidate and res.status_code == 304)
+        self.recorder.record(label, elapsed, res.status_code, ok)
+        if revalidate and res.headers.get("etag"):
+            self.etags[path] = res.headers["etag"]
+        return res if res.status_code < 300 else None
+
+
+# --- Scenarios: one iteration each -------------------------------------------
+
+async def login_storm(vu: VirtualUser):
+    user_id, email = vu.rng.choice(vu.data["teacher_users"] + vu.data["school_users"])
+    roll = vu.rng.random()
+    if roll < 0.05:
+        await vu.call("POST /auth/login (wrong password)", "POST", "/auth/login",
+                      expected=(401,), json={"email": email, "password": "not-the-password"})
+    elif roll < 0.10:
+        await vu.call("POST /auth/register", "POST", "/auth/register", json={
+            "name": f"Load {vu.number}", "email": f"load{next(_registrations)}@{seeder.EMAIL_DOMAIN}",
+            "password": vu.data["password"], "role": "teacher",
+        })
+    else:
+        await vu.call("POST /auth/login", "POST", "/auth/login", json={"email": email, "password": vu.data["password"]})
+
+
+async def dashboard_polling(vu: VirtualUser):
+    if "user" not in vu.state:
+        role = "school" if vu.number % 4 == 0 else "teacher"
+        vu.state["role"] = role
+        vu.state["user"] = vu.rng.choice(vu.data[f"{role}_users"])[0]
+        vu.state["school_id"] = vu.rng.choice(vu.data["school_ids"])
+    user_id = vu.state["user"]
+
+    await vu.call("GET /auth/notifications/{user_id}", "GET", f"/auth/notifications/{user_id}", revalidate=True)
+    await vu.call("GET /auth/notifications/{user_id}/unread_count", "GET", f"/auth/notifications/{user_id}/unread_count")
+    if vu.state["role"] == "teacher":
+        await vu.call("GET /jobs/", "GET", "/jobs/", revalidate=True)
+        await vu.call("GET /teachers/by_user/{user_id}", "GET", f"/teachers/by_user/{user_id}")
+    else:
+        school_id = vu.state["school_id"]
+        await vu.call("GET /jobs/school/{school_id}", "GET", f"/jobs/school/{school_id}", revalidate=True)
+        await vu.call("GET /jobs/schools/{school_id}/applications", "GET", f"/jobs/schools/{school_id}/applications")
+    if vu.rng.random() < 0.05:
+        await vu.call("POST /auth/notifications/{user_id}/read", "POST", f"/auth/notifications/{user_id}/read", json={})
+
+
+async def job_fanout(vu: VirtualUser):
+    school_id = vu.rng.choice(vu.data["school_ids"])
+    subject = vu.rng.choice(vu.data["subjects"])
+    res = await vu.call("POST /jobs/", "POST", f"/jobs/?school_id={school_id}", json={
+        "title": f"{subject} teacher", "subject": subject, "experience": "2+ years",
+        "description": f"Load test posting for {subject}", "salary": "1,800,000",
+    })
+    job_id = res.json()["id"] if res is not None else vu.rng.choice(vu.data["job_ids"])
+    for teacher_id in vu.rng.sample(vu.data["teacher_ids"], 3):
+        await vu.call("POST /jobs/apply/", "POST", "/jobs/apply/", expected=(200, 400),
+                      json={"job_id": job_id, "teacher_id": teacher_id, "message": "Load test application"})
+    await vu.call("GET /jobs/{job_id}/applications", "GET", f"/jobs/{job_id}/applications")
+    await vu.call("GET /jobs/{job_id}/candidates", "GET", f"/jobs/{job_id}/candidates?limit=20")
+    if vu.rng.random() < 0.2:
+        await vu.call("PUT /jobs/{job_id}", "PUT", f"/jobs/{job_id}", json={"salary": "2,000,000"})
+
+
+async def webhook_burst(vu: VirtualUser):
+    teacher_id = vu.rng.choice(vu.data["teacher_ids"])
+    res = await vu.call("POST /payments/initiate", "POST", "/payments/initiate", json={
+        "teacher_id": teacher_id, "amount": 50000, "method": "MTN", "phone_number": "0770000000",
+    })
+    txn_id = res.json()["transaction_id"] if res is not None else vu.rng.choice(vu.data["transaction_ids"])
+    success = {"transaction_id": txn_id, "event_id": f"{txn_id}-SUCCESS", "status": "SUCCESS"}
+    for payload in (
+        {"transaction_id": txn_id, "event_id": f"{txn_id}-PENDING", "status": "PENDING"},
+        success,
+        success,  # provider retry of the same delivery
+        {"transaction_id": vu.rng.choice(vu.data["transaction_ids"]), "status": vu.rng.choice(["SUCCESS", "FAILED"])},
+    ):
+        await vu.call("POST /payments/webhook/eversend", "POST", "/payments/webhook/eversend", json=payload)
+
+
+async def browse(vu: VirtualUser):
+    subject = vu.rng.choice(vu.data["subjects"])
+    teacher_id = vu.rng.choice(vu.data["teacher_ids"])
+    school_id = vu.rng.choice(vu.data["school_ids"])
+    job_id = vu.rng.choice(vu.data["job_ids"])
+    await vu.call("GET /teachers/", "GET", f"/teachers/?subject={subject}&limit=50", revalidate=True)
+    await vu.call("GET /teachers/{teacher_id}", "GET", f"/teachers/{teacher_id}")
+    await vu.call("GET /schools/", "GET", "/schools/")
+    await vu.call("GET /schools/{school_id}", "GET", f"/schools/{school_id}")
+    await vu.call("GET /jobs/search", "GET", f"/jobs/search?q={subject}")
+    await vu.call("GET /jobs/{job_id}", "GET", f"/jobs/{job_id}", revalidate=True)
+    if vu.rng.random() < 0.02:
+        await vu.call("PUT /teachers/{teacher_id}", "PUT", f"/teachers/{teacher_id}", json={"bio": "Updated during load test"})
+
+
+SCENARIOS = {
+    "login_storm": login_storm,
+    "dashboard_polling": dashboard_polling,
+    "job_fanout": job_fanout,
+    "webhook_burst": webhook_burst,
+    "browse": browse,
+}
+
+
+async def drive(base: str, scenario, data: dict, concurrency: int, duration: float, seed: int, think: float) -> dict:
+    recorder = Recorder()
+    deadline = time.monotonic() + duration
+
+    async def loop(vu: VirtualUser):
+        while time.monotonic() < deadline:
+            await scenario(vu)
+            if think:
+                await asyncio.sleep(think)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base, limits=limits, timeout=60) as http:
+        started = time.perf_counter()
+        await asyncio.gather(*(loop(VirtualUser(http, data, recorder, n, seed)) for n in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return recorder.summary(elapsed)
+
+
+# --- Processes ---------------------------------------------------------------
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _wait_ready(base: str, path: str = "/", timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as http:
+        while time.monotonic() < deadline:
+            try:
+                if (await http.get(base + path)).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"{base} did not start")
+
+
+def _uvicorn(app: str, port: int, env: dict, app_dir: str, workers: int = 1) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--app-dir", app_dir, "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=ROOT, env=env,
+    )
+
+
+def _commit() -> str:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except OSError:
+        return "unknown"
+
+
+def run(args) -> dict:
+    volumes = {name: getattr(args, name) for name in seeder.DEFAULT_VOLUMES}
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.database_url or f"sqlite:///{os.path.join(tmp, 'loadtest.db')}"
+        started = time.perf_counter()
+        data = seeder.seed(url, **volumes, seed=args.seed, bcrypt_rounds=args.bcrypt_rounds)
+        print(f"Seeded {volumes} in {time.perf_counter() - started:.1f}s")
+
+        stub_port, app_port = _free_port(), _free_port()
+        stub = _uvicorn("eversend_stub:app", stub_port, dict(os.environ, STUB_LATENCY_MS=str(args.stub_latency_ms)), ROOT)
+        env = dict(
+            os.environ,
+            DATABASE_URL=url,
+            DB_MIGRATE_ON_STARTUP="0",  # seeded at head already
+            DB_ASYNC=args.db_async,
+            BCRYPT_ROUNDS=str(args.bcrypt_rounds),
+            EVERSEND_API_BASE=f"http://127.0.0.1:{stub_port}/v1",
+            EVERSEND_CLIENT_ID="loadtest",
+            EVERSEND_CLIENT_SECRET="loadtest",
+        )
+        server = _uvicorn("main:app", app_port, env, ROOT, workers=args.workers)
+        scenarios = list(SCENARIOS) if args.scenarios == ["all"] else args.scenarios
+        results = {}
+        try:
+            base = f"http://127.0.0.1:{app_port}"
+            asyncio.run(_wait_ready(f"http://127.0.0.1:{stub_port}", "/stats"))
+            asyncio.run(_wait_ready(base))
+            for name in scenarios:
+                if args.warmup:
+                    asyncio.run(drive(base, SCENARIOS[name], data, args.concurrency, args.warmup, args.seed, args.think_ms / 1000))
+                results[name] = asyncio.run(drive(base, SCENARIOS[name], data, args.concurrency, args.duration, args.seed, args.think_ms / 1000))
+                print_scenario(name, results[name])
+        finally:
+            for process in (server, stub):
+                process.terminate()
+                process.wait()
+
+    return {
+        "meta": {
+            "commit": _commit(),
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "database": url.split(":", 1)[0],
+            "db_async": args.db_async,
+            "workers": args.workers,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "think_ms": args.think_ms,
+            "bcrypt_rounds": args.bcrypt_rounds,
+            "stub_latency_ms": args.stub_latency_ms,
+            "seed": args.seed,
+            "volumes": volumes,
+        },
+        "scenarios": results,
+    }
+
+
+# --- Reports -----------------------------------------------------------------
+
+def print_scenario(name: str, result: dict):
+    print(f"\n{name}: {result['requests']} requests in {result['elapsed_s']}s, {result['rps']} req/s")
+    print(f"  {'endpoint':<48} {'reqs':>7} {'err':>5} {'shed':>5} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for label, s in result["endpoints"].items():
+        print(f"  {label:<48} {s['requests']:>7} {s['errors']:>5} {s['shed']:>5} {s['rps']:>8.1f} "
+              f"{s['p50_ms']:>8.1f} {s['p95_ms']:>8.1f} {s['p99_ms']:>8.1f}")
+
+
+def _change(old: float, new: float) -> str:
+    if not old:
+        return "     n/a"
+    return f"{(new - old) / old * 100:+7.1f}%"
+
+
+def compare(base: dict, head: dict, threshold: float) -> list:
+    """Print per-endpoint deltas; return the endpoints whose p95 regressed
+    by more than ``threshold`` percent."""
+    print(f"base {base['meta']['commit']} ({base['meta']['date']})  ->  head {head['meta']['commit']} ({head['meta']['date']})")
+    settings = ("database", "db_async", "workers", "concurrency", "duration_s", "bcrypt_rounds", "volumes")
+    for key in settings:
+        if base["meta"].get(key) != head["meta"].get(key):
+            print(f"warning: {key} differs ({base['meta'].get(key)} vs {head['meta'].get(key)}); results are not comparable")
+    regressions = []
+    for name in sorted(set(base["scenarios"]) | set(head["scenarios"])):
+        old_scenario, new_scenario = base["scenarios"].get(name), head["scenarios"].get(name)
+        if not old_scenario or not new_scenario:
+            print(f"\n{name}: only in {'head' if new_scenario else 'base'}")
+            continue
+        print(f"\n{name}: {old_scenario['rps']} -> {new_scenario['rps']} req/s ({_change(old_scenario['rps'], new_scenario['rps']).strip()})")
+        print(f"  {'endpoint':<48} {'p50':>17} {'p95':>17} {'p99':>17} {'req/s':>17} {'err':>9}")
+        for label in sorted(set(old_scenario["endpoints"]) | set(new_scenario["endpoints"])):
+            old, new = old_scenario["endpoints"].get(label), new_scenario["endpoints"].get(label)
+            if not old or not new:
+                print(f"  {label:<48} only in {'head' if new else 'base'}")
+                continue
+            cells = [f"{new[k]:>8.1f}{_change(old[k], new[k])}" for k in ("p50_ms", "p95_ms", "p99_ms", "rps")]
+            print(f"  {label:<48} {' '.join(cells)} {old['errors']:>4}->{new['errors']:<4}")
+            if old["p95_ms"] and (new["p95_ms"] - old["p95_ms"]) / old["p95_ms"] * 100 > threshold and new["p95_ms"] - old["p95_ms"] > 1:
+                regressions.append(f"{name} {label}: p95 {old['p95_ms']} -> {new['p95_ms']} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="seed, start the API and drive the scenarios")
+    run_parser.add_argument("--scenarios", nargs="+", default=["all"], choices=["all", *SCENARIOS])
+    run_parser.add_argument("--duration", type=float, default=20, help="seconds per scenario")
+    run_parser.add_argument("--warmup", type=float, default=3, help="seconds per scenario before measuring")
+    run_parser.add_argument("--concurrency", type=int, default=32, help="virtual users")
+    run_parser.add_argument("--think-ms", type=float, default=0, help="pause between a user's iterations")
+    run_parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    run_parser.add_argument("--db-async", choices=["0", "1"], default=os.getenv("DB_ASYNC", "0"))
+    run_parser.add_argument("--database-url", help="empty database to seed (default: temporary SQLite file)")
+    run_parser.add_argument("--stub-latency-ms", type=float, default=150, help="Eversend stub response time")
+    run_parser.add_argument("--output", help="write the JSON report here")
+    seeder.add_volume_arguments(run_parser)
+
+    compare_parser = commands.add_parser("compare", help="diff two JSON reports")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("head")
+    compare_parser.add_argument("--threshold", type=float, default=10, help="p95 regression (percent) that fails")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        report = run(args)
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(report, f, indent=2)
+            print(f"\nReport written to {args.output}")
+    else:
+        with open(args.base) as f:
+            base = json.load(f)
+        with open(args.head) as f:
+            head = json.load(f)
+        regressions = compare(base, head, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} p95 regression(s) above {args.threshold}%:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Latency of ranking candidates for a posting with the matching index.
+
+Fills ``matching.TeacherIndex`` with synthetic teachers (no database
+involved) and times ``top()`` for a few postings, reporting load time,
+index size and p50/p95 ranking latency:
+
+    python benchmarks/matching.py --teachers 200000 --limit 20
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import matching  # noqa: E402
+
+SUBJECTS = ["Maths", "Mathematics", "Physics", "Chemistry", "Biology", "English", "Literature",
+            "History", "Geography", "Maths, Physics", "Biology, Chemistry", "ICT", "French", "Kiswahili"]
+LOCATIONS = ["Kampala", "Kampala, Uganda", "Gulu", "Mbarara", "Jinja", "Entebbe", "Mbale",
+             "Arua", "Masaka", "Lira", "Fort Portal", "Soroti"]
+POSTINGS = [("Maths", "Kampala", "3+ years"), ("English", "Gulu", None), ("Chemistry", "Mbarara", "2-5 years")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--teachers", type=int, default=200000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    rows = [
+        (i + 1, rng.choice(SUBJECTS), rng.choice(LOCATIONS), rng.choice([None, 0, 1, 2, 3, 5, 8, 12]), rng.random() < 0.4)
+        for i in range(args.teachers)
+    ]
+    index = matching.TeacherIndex()
+    start = time.perf_counter()
+    index.load(rows, token=None, expected=len(rows))
+    load_seconds = time.perf_counter() - start
+
+    timings = []
+    for round_no in range(args.rounds):
+        subject, location, experience = POSTINGS[round_no % len(POSTINGS)]
+        start = time.perf_counter()
+        index.top(subject, location, matching.required_years(experience), args.limit)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    print({
+        "teachers": index.size,
+        "load_s": round(load_seconds, 2),
+        "p50_ms": round(statistics.median(timings), 2),
+        "p95_ms": round(timings[int(len(timings) * 0.95) - 1], 2),
+    })
+
+
+if __name__ == "__main__":
+    main()
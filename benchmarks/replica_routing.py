@@ -0,0 +1,129 @@
+"""Read-replica routing check on two local SQLite files.
+
+Seeds a primary, copies it to a replica (the copy is the "replication"),
+starts the app in-process with DATABASE_REPLICA_URLS pointing at the copy,
+then writes to the primary only and checks where reads go:
+
+1. the replica joins the rotation once the monitor has measured it
+2. a client without the sticky cookie reads the replica (the new job is
+   missing: the copy has not been refreshed)
+3. the client that wrote gets the cookie and reads its own write from the
+   primary
+4. once the copy is more than REPLICA_MAX_LAG_SECONDS behind, the replica
+   leaves the rotation and everybody reads the primary
+5. after a fresh copy it rejoins, at most a heartbeat behind
+
+Exits non-zero if any step fails. For Postgres, point DATABASE_URL and
+DATABASE_REPLICA_URLS at a streaming-replication pair instead and watch
+``/health/replicas`` and ``db_read_routing_total`` on /metrics.
+
+    python benchmarks/replica_routing.py --max-lag 1
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import seed as seeder  # noqa: E402
+
+WAIT_TIMEOUT = 30
+
+
+def replicate(primary: str, replica: str):
+    """Copy the primary's file over the replica's, as a replication step."""
+    source, target = sqlite3.connect(primary), sqlite3.connect(replica)
+    try:
+        source.backup(target)
+    finally:
+        source.close()
+        target.close()
+
+
+def wait_for(client, healthy: bool) -> dict:
+    started = time.perf_counter()
+    while time.perf_counter() - started < WAIT_TIMEOUT:
+        replica = client.get("/health/replicas").json()["replicas"]["replica0"]
+        if replica["healthy"] is healthy:
+            return replica
+        time.sleep(0.05)
+    raise RuntimeError(f"replica did not become {'healthy' if healthy else 'unhealthy'} within {WAIT_TIMEOUT}s")
+
+
+def run(args) -> bool:
+    failures = []
+
+    def check(step: str, ok: bool, detail: str):
+        print(f"  {'ok  ' if ok else 'FAIL'} {step}: {detail}")
+        if not ok:
+            failures.append(step)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        primary, replica = os.path.join(tmp, "primary.db"), os.path.join(tmp, "replica.db")
+        # Read at import time by database.py (which seeding imports) and replicas.py
+        os.environ.update(
+            DATABASE_URL=f"sqlite:///{primary}",
+            DATABASE_REPLICA_URLS=f"sqlite:///{replica}",
+            REPLICA_MAX_LAG_SECONDS=str(args.max_lag),
+            REPLICA_CHECK_SECONDS=str(args.check_seconds),
+            REPLICA_STICKY_SECONDS=str(args.sticky_seconds),
+        )
+        ids = seeder.seed(os.environ["DATABASE_URL"], teachers=50, schools=5, jobs=20, applications=50,
+                          notifications=50, payments=5, bcrypt_rounds=4)
+        replicate(primary, replica)
+        from fastapi.testclient import TestClient
+        from main import app
+
+        with TestClient(app) as client:
+            state = wait_for(client, healthy=True)
+            check("replica in rotation", state["lag_seconds"] == 0, f"lag {state['lag_seconds']}s")
+            before = len(client.get("/jobs/").json()["jobs"])
+
+            # Not entered: leaving a TestClient block runs the app's shutdown
+            writer = TestClient(app)
+            created = writer.post(f"/jobs/?school_id={ids['school_ids'][0]}",
+                                  json={"title": "Replica check", "subject": "Maths"})
+            created.raise_for_status()
+            check("write sets the sticky cookie", "edumentor_primary" in writer.cookies,
+                  created.headers.get("set-cookie", "no Set-Cookie"))
+            own = len(writer.get("/jobs/").json()["jobs"])
+            check("writer reads its write from the primary", own == before + 1, f"{before} -> {own} jobs")
+
+            other = len(client.get("/jobs/").json()["jobs"])
+            check("other clients read the replica", other == before, f"{other} jobs (replica not refreshed yet)")
+
+            state = wait_for(client, healthy=False)
+            fallback = len(client.get("/jobs/").json()["jobs"])
+            check("lagging replica leaves the rotation", fallback == before + 1,
+                  f"{state['lag_seconds']}s behind, {fallback} jobs from the primary")
+
+            replicate(primary, replica)
+            state = wait_for(client, healthy=True)
+            caught_up = len(client.get("/jobs/").json()["jobs"])
+            # A heartbeat written between the copy and the check is a few ms of lag
+            check("refreshed replica rejoins", state["lag_seconds"] <= args.max_lag and caught_up == before + 1,
+                  f"lag {state['lag_seconds']}s, {caught_up} jobs from the replica")
+
+            routing = [line for line in client.get("/metrics").text.splitlines()
+                       if line.startswith("db_read_routing_total")]
+            print("\n  " + "\n  ".join(routing))
+
+    print(f"\n{'All checks passed' if not failures else f'{len(failures)} check(s) failed'}")
+    return not failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-lag", type=float, default=1.0, help="REPLICA_MAX_LAG_SECONDS")
+    parser.add_argument("--check-seconds", type=float, default=0.2, help="REPLICA_CHECK_SECONDS")
+    parser.add_argument("--sticky-seconds", type=int, default=10, help="REPLICA_STICKY_SECONDS")
+    args = parser.parse_args()
+    sys.exit(0 if run(args) else 1)
+
+
+if __name__ == "__main__":
+    main()
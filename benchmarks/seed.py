@@ -0,0 +1,168 @@
+"""Benchmark data generator.
+
+Migrates an empty SQLite or Postgres database and fills it
+with deterministic synthetic data at the requested volumes: one user per
+teacher and per school, job postings spread over the schools, unique
+applications, notifications (half of them unread, with the users'
+unread counters to match) and pending payments. Rows go in with
+executemany INSERTs in batches, so 100k+ rows take seconds.
+
+Every seeded user's password is ``PASSWORD``, hashed once with
+``--bcrypt-rounds`` (use the server's BCRYPT_ROUNDS, or logins will be
+rehashed on first use).
+
+    python benchmarks/seed.py --url sqlite:///bench.db --teachers 20000 --jobs 2000
+    python benchmarks/seed.py --url postgresql://user:pw@localhost/bench_db
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from sqlalchemy import func, insert, select, text  # noqa: E402
+
+PASSWORD = "benchpass"
+EMAIL_DOMAIN = "bench.edumentor.example.com"
+BATCH = 5000
+
+SUBJECTS = ["Maths", "Physics", "Chemistry", "Biology", "English", "History", "Geography", "ICT", "French", "Kiswahili"]
+LOCATIONS = ["Kampala", "Gulu", "Mbarara", "Jinja", "Entebbe", "Mbale", "Arua", "Masaka", "Lira", "Soroti"]
+
+DEFAULT_VOLUMES = {
+    "teachers": 2000,
+    "schools": 50,
+    "jobs": 500,
+    "applications": 5000,
+    "notifications": 20000,
+    "payments": 400,
+}
+
+
+def _insert(conn, model, rows):
+    for start in range(0, len(rows), BATCH):
+        conn.execute(insert(model), rows[start:start + BATCH])
+
+
+def _ids(conn, model) -> list:
+    return conn.execute(select(model.id).order_by(model.id)).scalars().all()
+
+
+def seed(url: str, teachers: int, schools: int, jobs: int, applications: int, notifications: int,
+         payments: int, seed: int = 1, bcrypt_rounds: int = 12) -> dict:
+    """Fill the empty database at ``url``; returns the ids and credentials
+    the load-test scenarios use."""
+    from database import make_engine
+    from models import User, Teacher, School, JobPosting, JobApplication, Notification, Payment
+    import migrate
+    import passwords
+    import search
+    import versions
+
+    rng = random.Random(seed)
+    engine = make_engine(url)
+    migrate.upgrade(engine)
+    with engine.begin() as conn:
+        if conn.execute(select(func.count()).select_from(User)).scalar():
+            raise SystemExit(f"{url} already has users; seed an empty database")
+
+        hashed = passwords.hash_password(PASSWORD, rounds=bcrypt_rounds)
+        _insert(conn, User, [
+            {"name": f"Teacher {i}", "email": f"teacher{i}@{EMAIL_DOMAIN}", "password": hashed,
+             "role": "teacher", "active": rng.random() < 0.6}
+            for i in range(teachers)
+        ] + [
+            {"name": f"School {i}", "email": f"school{i}@{EMAIL_DOMAIN}", "password": hashed,
+             "role": "school", "active": True}
+            for i in range(schools)
+        ])
+        user_ids = _ids(conn, User)
+        teacher_user_ids, school_user_ids = user_ids[:teachers], user_ids[teachers:]
+
+        _insert(conn, Teacher, [
+            {"user_id": user_id, "subject": rng.choice(SUBJECTS), "location": rng.choice(LOCATIONS),
+             "phone": f"07{rng.randrange(10 ** 8):08d}", "experience_years": rng.randrange(0, 20),
+             "bio": "Benchmark teacher"}
+            for user_id in teacher_user_ids
+        ])
+        teacher_ids = _ids(conn, Teacher)
+
+        _insert(conn, School, [
+            {"name": f"School {i}", "email": f"school{i}@{EMAIL_DOMAIN}", "phone": "0700000000",
+             "location": rng.choice(LOCATIONS), "description": "Benchmark school"}
+            for i in range(schools)
+        ])
+        school_ids = _ids(conn, School)
+
+        _insert(conn, JobPosting, [
+            {"school_id": rng.choice(school_ids), "title": f"{subject} teacher {i}", "subject": subject,
+             "experience": f"{rng.randrange(0, 6)}+ years", "description": f"Teach {subject} to senior classes",
+             "salary": "1,500,000", "status": "Active" if rng.random() < 0.8 else "Closed"}
+            for i, subject in enumerate(rng.choice(SUBJECTS) for _ in range(jobs))
+        ])
+        job_ids = _ids(conn, JobPosting)
+        search.rebuild_index(conn)
+
+        pairs = set()
+        applications = min(applications, len(job_ids) * len(teacher_ids))
+        while len(pairs) < applications:
+            pairs.add((rng.choice(job_ids), rng.choice(teacher_ids)))
+        _insert(conn, JobApplication, [
+            {"job_id": job_id, "teacher_id": teacher_id, "status": "Submitted", "message": "Benchmark application"}
+            for job_id, teacher_id in sorted(pairs)
+        ])
+
+        _insert(conn, Notification, [
+            {"recipient_user_id": rng.choice(user_ids), "type": "job_posted",
+             "content": f"Benchmark notification {i}", "is_read": rng.random() < 0.5}
+            for i in range(notifications)
+        ])
+        conn.execute(text(
+            "UPDATE users SET unread_notifications = "
+            "(SELECT COUNT(*) FROM notifications n WHERE n.recipient_user_id = users.id AND n.is_read = false)"
+        ))
+
+        transaction_ids = [f"TXN-BENCH-{i}" for i in range(min(payments, len(teacher_ids)))]
+        _insert(conn, Payment, [
+            {"teacher_id": teacher_id, "amount": 50000, "method": "MTN", "transaction_id": txn_id, "status": "PENDING"}
+            for teacher_id, txn_id in zip(rng.sample(teacher_ids, len(transaction_ids)), transaction_ids)
+        ])
+
+    versions.ensure_versions(engine)
+    engine.dispose()
+    return {
+        "password": PASSWORD,
+        "teacher_users": [[user_id, f"teacher{i}@{EMAIL_DOMAIN}"] for i, user_id in enumerate(teacher_user_ids)],
+        "school_users": [[user_id, f"school{i}@{EMAIL_DOMAIN}"] for i, user_id in enumerate(school_user_ids)],
+        "teacher_ids": teacher_ids,
+        "school_ids": school_ids,
+        "job_ids": job_ids,
+        "transaction_ids": transaction_ids,
+        "subjects": SUBJECTS,
+    }
+
+
+def add_volume_arguments(parser, defaults=DEFAULT_VOLUMES):
+    for name, value in defaults.items():
+        parser.add_argument(f"--{name}", type=int, default=value)
+    parser.add_argument("--seed", type=int, default=1, help="random seed; same seed, same data")
+    parser.add_argument("--bcrypt-rounds", type=int, default=int(os.getenv("BCRYPT_ROUNDS", "12")))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", required=True, help="database URL of an empty database")
+    add_volume_arguments(parser)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    seed(args.url, args.teachers, args.schools, args.jobs, args.applications, args.notifications,
+         args.payments, seed=args.seed, bcrypt_rounds=args.bcrypt_rounds)
+    print(f"Seeded {args.url} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
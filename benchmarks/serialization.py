@@ -0,0 +1,89 @@
+"""Cost of turning a list endpoint's rows into a response body.
+
+Mounts the same 10k job-application dicts (shaped like
+``jobs._application_dict``) on a throwaway FastAPI app three ways and
+times full requests through the ASGI stack:
+
+- ``dict``: plain dict return with FastAPI's default JSONResponse
+  (``jsonable_encoder`` then ``json.dumps``), as the list handlers did
+- ``response_model``: ``List[JobApplicationOut]`` validation per row, as
+  the application lists did
+- ``rows_response``: ``responses.rows_response`` (orjson when installed),
+  which the list handlers use now
+
+    python benchmarks/serialization.py --rows 10000 --rounds 20
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import typing as t
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+import responses  # noqa: E402
+from schemas import JobApplicationOut  # noqa: E402
+
+
+def make_rows(count: int) -> list:
+    start = datetime(2025, 1, 1, 8, 30)
+    return [
+        {
+            "id": i,
+            "job_id": i % 50 + 1,
+            "teacher_id": i + 1,
+            "teacher_name": f"Teacher {i}",
+            "teacher_phone": "0700000000",
+            "status": "Pending",
+            "message": "I would like to apply for this position.",
+            "created_at": start + timedelta(minutes=i),
+        }
+        for i in range(count)
+    ]
+
+
+def build_app(rows: list) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/dict", response_class=JSONResponse)
+    def as_dict():
+        return rows
+
+    @app.get("/response_model", response_model=t.List[JobApplicationOut], response_class=JSONResponse)
+    def as_model():
+        return rows
+
+    @app.get("/rows_response")
+    def as_rows():
+        return responses.rows_response(rows)
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    client = TestClient(build_app(make_rows(args.rows)))
+    print(f"orjson: {'yes' if responses.orjson is not None else 'no (stdlib json)'}")
+    for path in ("/dict", "/response_model", "/rows_response"):
+        client.get(path)  # warm-up
+        timings = []
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            body = client.get(path).content
+            timings.append((time.perf_counter() - start) * 1000)
+        print(f"{path[1:]:>15}: {statistics.median(timings):7.1f} ms per {args.rows} rows ({len(body)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
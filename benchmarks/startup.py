@@ -0,0 +1,190 @@
+"""Startup cost: importing the app and time to the first responses.
+
+- ``import``: ``import main`` in a fresh interpreter, median of --runs
+- per server mode, on a throwaway SQLite database: time from launch to the
+  first 200 from ``/``, the first ``GET /jobs/`` (a cold worker: first
+  connection, first query) and the median of the next 20, plus on Linux
+  the combined PSS of the master and workers, which shows how much of the
+  app the preloaded workers share. The first boot migrates the empty
+  database; the other --runs are restarts of a migrated one.
+
+Modes are ``uvicorn`` (one process), ``gunicorn`` and ``gunicorn-preload``
+(gunicorn.conf.py with GUNICORN_PRELOAD=0 / 1, --workers uvicorn
+workers); the gunicorn modes are skipped when gunicorn is not installed.
+
+    python benchmarks/startup.py --runs 5 --workers 4 --output startup.json
+"""
+import argparse
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+import httpx  # noqa: E402
+
+MODES = ["uvicorn", "gunicorn", "gunicorn-preload"]
+WARM_REQUESTS = 20
+READY_TIMEOUT = 60
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _commit() -> str:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except OSError:
+        return "unknown"
+
+
+def measure_import(env: dict, runs: int) -> float:
+    code = "import time; started = time.perf_counter(); import main; print(time.perf_counter() - started)"
+    timings = [
+        float(subprocess.run([sys.executable, "-W", "ignore", "-c", code], cwd=ROOT, env=env,
+                             capture_output=True, text=True, check=True).stdout.strip().splitlines()[-1])
+        for _ in range(runs)
+    ]
+    return statistics.median(timings)
+
+
+def _command(mode: str, port: int, workers: int) -> list:
+    if mode == "uvicorn":
+        return [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"]
+    return [sys.executable, "-m", "gunicorn", "-k", "uvicorn.workers.UvicornWorker", "main:app",
+            "--bind", f"127.0.0.1:{port}", "--workers", str(workers), "--log-level", "warning"]
+
+
+def _pss_mb(pid: int):
+    """PSS of ``pid`` and its children in MiB, or None off Linux."""
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            pids = [pid] + [int(child) for child in f.read().split()]
+        total_kb = 0
+        for process in pids:
+            with open(f"/proc/{process}/smaps_rollup") as f:
+                total_kb += sum(int(line.split()[1]) for line in f if line.startswith("Pss:"))
+        return round(total_kb / 1024, 1)
+    except (OSError, ValueError):
+        return None
+
+
+def boot(mode: str, env: dict, workers: int) -> dict:
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    server = subprocess.Popen(_command(mode, port, workers), cwd=ROOT, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        with httpx.Client(base_url=base, timeout=10) as http:
+            while True:
+                if server.poll() is not None:
+                    raise RuntimeError(f"{mode} exited with status {server.returncode}")
+                if time.perf_counter() - started > READY_TIMEOUT:
+                    raise RuntimeError(f"{mode} did not start within {READY_TIMEOUT}s")
+                try:
+                    if http.get("/").status_code == 200:
+                        break
+                except httpx.HTTPError:
+                    pass
+                time.sleep(0.01)
+            ready = time.perf_counter() - started
+
+            request_started = time.perf_counter()
+            http.get("/jobs/").raise_for_status()
+            first = (time.perf_counter() - request_started) * 1000
+
+            warm = []
+            for _ in range(WARM_REQUESTS):
+                request_started = time.perf_counter()
+                http.get("/jobs/").raise_for_status()
+                warm.append((time.perf_counter() - request_started) * 1000)
+        return {
+            "ready_s": round(ready, 3),
+            "first_request_ms": round(first, 1),
+            "warm_request_ms": round(statistics.median(warm), 1),
+            "pss_mb": _pss_mb(server.pid),
+        }
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def run(args) -> dict:
+    try:
+        import gunicorn  # noqa: F401
+        modes = args.modes
+    except ImportError:
+        modes = [mode for mode in args.modes if mode == "uvicorn"]
+        print("gunicorn is not installed; measuring uvicorn only")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        metrics_dir = os.path.join(tmp, "metrics")
+        os.makedirs(metrics_dir)
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'import.db')}",
+                   PROMETHEUS_MULTIPROC_DIR=metrics_dir)
+        import_s = measure_import(env, args.runs)
+        print(f"import main: {import_s * 1000:.0f} ms (median of {args.runs})")
+
+        for mode in modes:
+            env = dict(env, DATABASE_URL=f"sqlite:///{os.path.join(tmp, mode + '.db')}",
+                       GUNICORN_PRELOAD="1" if mode == "gunicorn-preload" else "0")
+            first_boot = boot(mode, env, args.workers)
+            restarts = [boot(mode, env, args.workers) for _ in range(args.runs)]
+            results[mode] = {
+                "first_boot_ready_s": first_boot["ready_s"],
+                "ready_s": statistics.median(r["ready_s"] for r in restarts),
+                "first_request_ms": statistics.median(r["first_request_ms"] for r in restarts),
+                "warm_request_ms": statistics.median(r["warm_request_ms"] for r in restarts),
+                "pss_mb": restarts[-1]["pss_mb"],
+            }
+
+    print(f"\n  {'mode':<18} {'first boot':>11} {'restart':>9} {'1st /jobs/':>11} {'warm /jobs/':>12} {'PSS':>9}")
+    for mode, r in results.items():
+        pss = f"{r['pss_mb']:.0f} MiB" if r["pss_mb"] is not None else "n/a"
+        print(f"  {mode:<18} {r['first_boot_ready_s']:>10.2f}s {r['ready_s']:>8.2f}s "
+              f"{r['first_request_ms']:>9.1f}ms {r['warm_request_ms']:>10.1f}ms {pss:>9}")
+
+    return {
+        "meta": {
+            "commit": _commit(),
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "workers": args.workers,
+            "runs": args.runs,
+        },
+        "import_s": round(import_s, 3),
+        "modes": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="imports / restarts per mode")
+    parser.add_argument("--workers", type=int, default=4, help="gunicorn workers")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    parser.add_argument("--output", help="write the JSON report here")
+    args = parser.parse_args()
+
+    report = run(args)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
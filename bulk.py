@@ -0,0 +1,157 @@
+"""Bulk CSV / NDJSON import.
+
+The upload is the raw request body (``Content-Type: text/csv`` or
+``application/x-ndjson``, or ``?format=``). It is spooled to a temporary
+file, in memory up to BULK_SPOOL_BYTES and on disk beyond, then parsed one
+row at a time. Rows are validated with the same ``schemas`` models as the
+single-record endpoints and written BULK_CHUNK_SIZE at a time: one
+executemany INSERT and one commit per chunk. Invalid rows are reported by
+line number and skipped; they never abort the rest of the upload.
+"""
+import csv
+import io
+import json
+import os
+import tempfile
+
+from fastapi import HTTPException, Request
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+import versions
+
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "500"))
+BULK_MAX_ERRORS = int(os.getenv("BULK_MAX_ERRORS", "1000"))
+BULK_MAX_BYTES = int(os.getenv("BULK_MAX_BYTES", str(50 * 1024 * 1024)))
+BULK_SPOOL_BYTES = int(os.getenv("BULK_SPOOL_BYTES", str(1024 * 1024)))
+
+CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "application/json-seq": "ndjson",
+}
+
+
+def detect_format(request: Request, format=None) -> str:
+    """"csv" or "ndjson" from ``?format=`` or the Content-Type header."""
+    if format:
+        if format not in ("csv", "ndjson"):
+            raise HTTPException(status_code=400, detail="format must be csv or ndjson")
+        return format
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type not in CONTENT_TYPES:
+        raise HTTPException(status_code=415, detail="Send text/csv or application/x-ndjson, or pass ?format=")
+    return CONTENT_TYPES[content_type]
+
+
+async def spool_body(request: Request):
+    """Copy the request body to a SpooledTemporaryFile without holding it
+    all in memory. The caller closes the file."""
+    spooled = tempfile.SpooledTemporaryFile(max_size=BULK_SPOOL_BYTES)
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > BULK_MAX_BYTES:
+            spooled.close()
+            raise HTTPException(status_code=413, detail=f"Upload larger than {BULK_MAX_BYTES} bytes")
+        spooled.write(chunk)
+    spooled.seek(0)
+    return spooled
+
+
+def read_rows(fileobj, fmt: str):
+    """Yield (line_number, dict) per record, or (line_number, error string)
+    for lines that cannot be parsed."""
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    try:
+        if fmt == "csv":
+            reader = csv.DictReader(text)
+            for row in reader:
+                # Empty cells mean "not given", so Optional fields validate
+                yield reader.line_num, {k: (v if v != "" else None) for k, v in row.items() if k}
+        else:
+            for line_no, line in enumerate(text, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    yield line_no, f"invalid JSON: {e}"
+                    continue
+                if not isinstance(record, dict):
+                    yield line_no, "expected a JSON object"
+                    continue
+                yield line_no, record
+    finally:
+        text.detach()
+
+
+def _validation_messages(error: ValidationError) -> list:
+    return [f"{'.'.join(str(p) for p in e['loc'])}: {e['msg']}" for e in error.errors()]
+
+
+def import_rows(db: Session, rows, model, schema, check=None, after_insert=None,
+                chunk_size: int = BULK_CHUNK_SIZE) -> dict:
+    """Validate ``rows`` with ``schema`` and insert them into ``model``.
+
+    ``check(db, chunk)`` receives the chunk's valid [(line, values)] and
+    returns {line: [messages]} for rows that would violate a constraint
+    (unknown foreign key, duplicate unique value). ``after_insert(db,
+    chunk, ids)`` runs in the same transaction as the chunk's INSERT.
+    """
+    report = {"inserted": 0, "failed": 0, "errors": [], "errors_truncated": False}
+
+    def fail(line, messages):
+        report["failed"] += 1
+        if len(report["errors"]) < BULK_MAX_ERRORS:
+            report["errors"].append({"row": line, "errors": messages})
+        else:
+            report["errors_truncated"] = True
+
+    def flush(chunk):
+        if check and chunk:
+            rejected = check(db, chunk)
+            for line, _ in chunk:
+                if line in rejected:
+                    fail(line, rejected[line])
+            chunk = [(line, values) for line, values in chunk if line not in rejected]
+        if not chunk:
+            return
+        try:
+            ids = db.execute(
+                insert(model).returning(model.id, sort_by_parameter_order=True),
+                [values for _, values in chunk],
+            ).scalars().all()
+            if after_insert:
+                after_insert(db, chunk, ids)
+            versions.bump(db, model.__tablename__)
+            db.commit()
+        except IntegrityError as e:
+            db.rollback()
+            message = f"chunk rejected by the database: {e.orig}"
+            for line, _ in chunk:
+                fail(line, [message])
+            return
+        report["inserted"] += len(chunk)
+
+    chunk = []
+    for line, record in rows:
+        if isinstance(record, str):
+            fail(line, [record])
+            continue
+        try:
+            values = schema(**record).dict()
+        except ValidationError as e:
+            fail(line, _validation_messages(e))
+            continue
+        chunk.append((line, values))
+        if len(chunk) >= chunk_size:
+            flush(chunk)
+            chunk = []
+    flush(chunk)
+    report["errors"].sort(key=lambda e: e["row"])
+    return report
@@ -0,0 +1,179 @@
+"""Read-through cache for hot detail endpoints.
+
+Every app worker keeps an in-process LRU with a TTL. When ``CACHE_REDIS_URL``
+points at a Redis-compatible server (and the optional ``redis`` package is
+installed) it is used as a shared second level, so one worker's database
+read serves the others. Writes call ``invalidate`` with the affected keys;
+that clears this worker's LRU and the shared level, while other workers'
+LRUs are bounded by ``CACHE_TTL_SECONDS``.
+
+Callers can skip the cache for one request with ``Cache-Control: no-cache``
+or ``?nocache=1``.
+
+Values are stored JSON-ready (via ``jsonable_encoder``) so both levels hand
+back identical data.
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "1") == "1"
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "30"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL")
+CACHE_KEY_PREFIX = os.getenv("CACHE_KEY_PREFIX", "edumentor:")
+
+
+class LRUCache:
+    """Thread-safe LRU with a per-entry TTL and hit/miss/eviction counters."""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl: float = CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+class SharedCache:
+    """Optional Redis-compatible second level. Errors are counted and
+    treated as misses so a cache outage never fails a request."""
+
+    def __init__(self, url: str, ttl: float = CACHE_TTL_SECONDS):
+        import redis  # optional dependency, only needed when CACHE_REDIS_URL is set
+        self._client = redis.Redis.from_url(url, socket_timeout=0.2, socket_connect_timeout=0.2)
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def get(self, key):
+        try:
+            raw = self._client.get(CACHE_KEY_PREFIX + key)
+        except Exception:
+            self.errors += 1
+            return None
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(raw)
+
+    def set(self, key, value):
+        try:
+            self._client.set(CACHE_KEY_PREFIX + key, json.dumps(value), ex=max(int(self.ttl), 1))
+        except Exception:
+            self.errors += 1
+
+    def delete(self, *keys):
+        try:
+            self._client.delete(*(CACHE_KEY_PREFIX + k for k in keys))
+        except Exception:
+            self.errors += 1
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "errors": self.errors}
+
+
+local = LRUCache()
+shared = None
+if CACHE_REDIS_URL:
+    try:
+        shared = SharedCache(CACHE_REDIS_URL)
+    except ImportError:
+        print("CACHE_REDIS_URL is set but the redis package is not installed; using the local cache only")
+
+
+def get_or_load(key: str, loader, bypass: bool = False):
+    """Return the cached value for ``key`` or call ``loader()`` and cache its
+    result. ``None`` results (not found) are never cached."""
+    if not CACHE_ENABLED or bypass:
+        return loader()
+    value = local.get(key)
+    if value is not None:
+        return value
+    if shared is not None:
+        value = shared.get(key)
+        if value is not None:
+            local.set(key, value)
+            return value
+    value = loader()
+    if value is None:
+        return None
+    value = jsonable_encoder(value)
+    local.set(key, value)
+    if shared is not None:
+        shared.set(key, value)
+    return value
+
+
+def invalidate(*keys: str):
+    """Drop ``keys`` from this worker's cache and the shared level."""
+    for key in keys:
+        local.delete(key)
+    if shared is not None and keys:
+        shared.delete(*keys)
+
+
+def bypass(request: Request) -> bool:
+    """Dependency: True when the client asked to skip the cache."""
+    cache_control = request.headers.get("cache-control", "").lower()
+    return "no-cache" in cache_control or request.query_params.get("nocache") in ("1", "true")
+
+
+def stats() -> dict:
+    return {
+        "enabled": CACHE_ENABLED,
+        "local": local.stats(),
+        "shared": shared.stats() if shared is not None else None,
+    }
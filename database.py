@@ -1,17 +1,176 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from starlette.concurrency import run_in_threadpool
 import os
 
 # Read DATABASE_URL from environment for flexibility (Postgres in production)
 # Fallback to a local SQLite file for development
 DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///./edumentor.db')
 
-if DATABASE_URL.startswith('sqlite'):
-    engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-else:
+# SQLite tuning, applied to every new connection. WAL lets readers run
+# alongside a writer and, with a busy timeout, stops concurrent gunicorn
+# workers from failing with "database is locked".
+SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE = int(os.getenv('SQLITE_CACHE_SIZE', '-65536'))  # negative = KiB, so 64 MiB
+
+# Connection pool settings for server databases (Postgres / MySQL)
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', '30'))
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))
+DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', '1') == '1'
+
+# Serve the hot read handlers over an async driver (aiosqlite / asyncpg)
+# instead of the threadpool. Off by default.
+DB_ASYNC = os.getenv('DB_ASYNC', '0') == '1'
+
+
+def sqlite_pragmas():
+    """PRAGMA statements run on each new SQLite connection."""
+    pragmas = [
+        f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}",
+        f"PRAGMA synchronous = {SQLITE_SYNCHRONOUS}",
+        f"PRAGMA cache_size = {SQLITE_CACHE_SIZE}",
+        f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}",
+        "PRAGMA temp_store = MEMORY",
+    ]
+    if SQLITE_JOURNAL_MODE:
+        pragmas.insert(0, f"PRAGMA journal_mode = {SQLITE_JOURNAL_MODE}")
+    return pragmas
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in sqlite_pragmas():
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+
+def _engine_options(url: str, overrides: dict) -> dict:
+    if url.startswith('sqlite'):
+        options = {
+            "connect_args": {"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000},
+        }
+    else:
+        options = {
+            "pool_size": DB_POOL_SIZE,
+            "max_overflow": DB_MAX_OVERFLOW,
+            "pool_timeout": DB_POOL_TIMEOUT,
+            "pool_recycle": DB_POOL_RECYCLE,
+            "pool_pre_ping": DB_POOL_PRE_PING,
+        }
+    options.update(overrides)
+    return options
+
+
+def make_engine(url: str, **overrides):
+    """Create an engine with the tuning profile for ``url``'s backend."""
+    if url.startswith('sqlite'):
+        new_engine = create_engine(url, **_engine_options(url, overrides))
+        event.listen(new_engine, "connect", _apply_sqlite_pragmas)
+        return new_engine
+
     # For Postgres / MySQL etc. do not pass sqlite-specific args
-    engine = create_engine(DATABASE_URL)
+    return create_engine(url, **_engine_options(url, overrides))
+
+
+def async_url(url: str) -> str:
+    """Map a sync DATABASE_URL to its async driver equivalent."""
+    if url.startswith('sqlite:'):
+        return 'sqlite+aiosqlite:' + url[len('sqlite:'):]
+    for prefix in ('postgres://', 'postgresql://', 'postgresql+psycopg2://'):
+        if url.startswith(prefix):
+            return 'postgresql+asyncpg://' + url[len(prefix):]
+    return url
+
+
+def make_async_engine(url: str, **overrides):
+    """Async engine with the same tuning profile as ``make_engine``."""
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    options = _engine_options(url, overrides)
+    if url.startswith('sqlite'):
+        options["connect_args"].pop("check_same_thread", None)
+    new_engine = create_async_engine(async_url(url), **options)
+    if url.startswith('sqlite'):
+        event.listen(new_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+    return new_engine
+
+
+engine = make_engine(DATABASE_URL)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
+
+# Created on first use so the async driver is only required when DB_ASYNC=1
+async_engine = None
+AsyncSessionLocal = None
+
+
+def get_async_sessionmaker():
+    global async_engine, AsyncSessionLocal
+    if AsyncSessionLocal is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+        async_engine = make_async_engine(DATABASE_URL)
+        AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    return AsyncSessionLocal
+
+
+# Dependency for database session
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+# Dependency for an async database session
+async def get_async_db():
+    async with get_async_sessionmaker()() as db:
+        yield db
+
+
+class SessionRunner:
+    """Runs a sync ``fn(session, ...)`` without blocking the event loop.
+
+    With DB_ASYNC=1 the function runs through ``AsyncSession.run_sync`` on
+    the async driver, so waiting on the database never holds a thread.
+    Otherwise it runs on the threadpool with a regular Session. Either
+    way the same query code serves both paths.
+    """
+
+    def __init__(self, session, is_async: bool):
+        self.session = session
+        self.is_async = is_async
+
+    async def run(self, fn, *args, **kwargs):
+        if self.is_async:
+            return await self.session.run_sync(fn, *args, **kwargs)
+        return await run_in_threadpool(fn, self.session, *args, **kwargs)
+
+
+# Dependency for async handlers; backend chosen by DB_ASYNC
+async def get_runner():
+    if DB_ASYNC:
+        async with get_async_sessionmaker()() as db:
+            yield SessionRunner(db, is_async=True)
+    else:
+        db = SessionLocal()
+        try:
+            yield SessionRunner(db, is_async=False)
+        finally:
+            # Close inline: queueing it on a threadpool already full of
+            # handlers waiting for a connection would deadlock the pool
+            db.close()
+
+
+async def dispose_async_engine():
+    if async_engine is not None:
+        await async_engine.dispose()
@@ -0,0 +1,187 @@
+"""Push channel for the dashboards over Server-Sent Events.
+
+Dashboards keep one ``GET /events/{user_id}`` stream open and refetch only
+when an event arrives, instead of polling. Write paths call
+``publish_after_commit``; the events are sent once the session commits and
+dropped if it rolls back, so a client never refetches before the data is
+visible.
+
+``broker`` carries events between gunicorn workers. ``LocalBroker`` only
+reaches streams held by this process, which is enough for a single worker
+and for tests. When ``EVENTS_REDIS_URL`` is set (and the optional ``redis``
+package is installed) ``RedisBroker`` relays every event through Redis
+pub/sub to all workers. An idle stream costs a parked coroutine and a
+keep-alive comment every ``EVENTS_HEARTBEAT_SECONDS``; no database work.
+"""
+import asyncio
+import json
+import os
+import threading
+import traceback
+
+from fastapi import APIRouter, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+EVENTS_REDIS_URL = os.getenv("EVENTS_REDIS_URL")
+EVENTS_CHANNEL_PREFIX = os.getenv("EVENTS_CHANNEL_PREFIX", "edumentor:events:")
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "100"))
+
+router = APIRouter(prefix="/events", tags=["Events"])
+
+
+def _offer(queue: asyncio.Queue, message: str):
+    try:
+        queue.put_nowait(message)
+    except asyncio.QueueFull:
+        # A stalled client misses events; the next one makes it refetch anyway
+        pass
+
+
+class LocalBroker:
+    """Fan-out to this process's open streams. ``publish`` is thread-safe,
+    so handlers on the threadpool and background workers can call it."""
+
+    def __init__(self):
+        self._subscribers = {}  # channel -> set of (loop, queue)
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel: str) -> asyncio.Queue:
+        queue = asyncio.Queue(EVENTS_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, channel: str, queue: asyncio.Queue):
+        with self._lock:
+            entries = self._subscribers.get(channel, set())
+            entries.difference_update({entry for entry in entries if entry[1] is queue})
+            if not entries:
+                self._subscribers.pop(channel, None)
+
+    def deliver(self, channel: str, message: str):
+        with self._lock:
+            entries = list(self._subscribers.get(channel, ()))
+        for loop, queue in entries:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, message)
+            except RuntimeError:
+                pass  # loop already closed during shutdown
+
+    def publish(self, channel: str, message: str):
+        self.deliver(channel, message)
+
+    def connections(self) -> int:
+        with self._lock:
+            return sum(len(entries) for entries in self._subscribers.values())
+
+    def close(self):
+        pass
+
+
+class RedisBroker(LocalBroker):
+    """Relays events through Redis pub/sub so every worker's streams see
+    them. If Redis is unreachable, events still reach this worker's streams."""
+
+    def __init__(self, url: str, prefix: str = EVENTS_CHANNEL_PREFIX):
+        import redis  # optional dependency, only needed when EVENTS_REDIS_URL is set
+        super().__init__()
+        self._client = redis.Redis.from_url(url, socket_connect_timeout=0.5)
+        self.prefix = prefix
+        self._pubsub = None
+        self._listener = None
+
+    def subscribe(self, channel: str) -> asyncio.Queue:
+        # Listen lazily: processes that never hold a stream skip the connection
+        if self._listener is None:
+            self._listener = threading.Thread(target=self._listen, name="events-listener", daemon=True)
+            self._listener.start()
+        return super().subscribe(channel)
+
+    def publish(self, channel: str, message: str):
+        try:
+            self._client.publish(self.prefix + channel, message)
+        except Exception as e:
+            print(f"Event publish to Redis failed, delivering locally only: {e}")
+            self.deliver(channel, message)
+
+    def _listen(self):
+        self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.psubscribe(self.prefix + "*")
+        try:
+            for item in self._pubsub.listen():
+                channel = item["channel"].decode()[len(self.prefix):]
+                self.deliver(channel, item["data"].decode())
+        except Exception:
+            print("events-listener error:")
+            print(traceback.format_exc())
+
+    def close(self):
+        if self._pubsub is not None:
+            self._pubsub.close()
+
+
+broker = LocalBroker()
+if EVENTS_REDIS_URL:
+    try:
+        broker = RedisBroker(EVENTS_REDIS_URL)
+    except ImportError:
+        print("EVENTS_REDIS_URL is set but the redis package is not installed; push events stay in-process")
+
+
+def format_event(name: str, data=None) -> str:
+    return f"event: {name}\ndata: {json.dumps(jsonable_encoder(data or {}))}\n\n"
+
+
+def publish(user_id: int, name: str, data=None):
+    """Send an event to every open stream of ``user_id`` now. Best effort."""
+    try:
+        broker.publish(str(user_id), format_event(name, data))
+    except Exception as e:
+        print(f"Event publish failed: {e}")
+
+
+def publish_after_commit(db: Session, user_id: int, name: str, data=None):
+    """Queue an event that is published once ``db`` commits."""
+    db.info.setdefault("pending_events", []).append((user_id, name, data))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending(session):
+    for user_id, name, data in session.info.pop("pending_events", []):
+        publish(user_id, name, data)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending(session):
+    session.info.pop("pending_events", None)
+
+
+@router.get("/{user_id}")
+async def stream_events(user_id: int, request: Request):
+    """Server-Sent Events stream of a user's notification/application events"""
+
+    async def stream():
+        channel = str(user_id)
+        queue = broker.subscribe(channel)
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), EVENTS_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    message = ": keep-alive\n\n"
+                yield message
+        finally:
+            broker.unsubscribe(channel, queue)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,4 +1,9 @@
-import os, requests
+import asyncio
+import os
+import random
+import time
+
+import httpx
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -7,25 +12,215 @@ EVERSEND_CLIENT_ID = os.getenv("EVERSEND_CLIENT_ID")
 EVERSEND_CLIENT_SECRET = os.getenv("EVERSEND_CLIENT_SECRET")
 EVERSEND_BASE_URL = os.getenv("EVERSEND_API_BASE", "https://api.eversend.co/v1")
 
-def get_access_token():
-    url = f"{EVERSEND_BASE_URL}/auth/token"
-    payload = {"client_id": EVERSEND_CLIENT_ID, "client_secret": EVERSEND_CLIENT_SECRET}
-    res = requests.post(url, json=payload)
-    res.raise_for_status()
-    return res.json()["access_token"]
-
-def initiate_mobile_money(amount, currency, phone_number, method, callback_url):
-    token = get_access_token()
-    url = f"{EVERSEND_BASE_URL}/collections/mobile-money"
-    payload = {
-        "amount": amount,
-        "currency": currency,
-        "phone_number": phone_number,
-        "network": method,
-        "callback_url": callback_url,
-        "reason": "Edumentor subscription payment"
-    }
-    headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
-    res = requests.post(url, json=payload, headers=headers)
-    res.raise_for_status()
-    return res.json()
+# Connection / retry tuning
+EVERSEND_TIMEOUT = float(os.getenv("EVERSEND_TIMEOUT", "10"))
+EVERSEND_CONNECT_TIMEOUT = float(os.getenv("EVERSEND_CONNECT_TIMEOUT", "3"))
+EVERSEND_MAX_CONNECTIONS = int(os.getenv("EVERSEND_MAX_CONNECTIONS", "20"))
+EVERSEND_MAX_RETRIES = int(os.getenv("EVERSEND_MAX_RETRIES", "3"))
+EVERSEND_BACKOFF_BASE = float(os.getenv("EVERSEND_BACKOFF_BASE", "0.25"))
+EVERSEND_BACKOFF_MAX = float(os.getenv("EVERSEND_BACKOFF_MAX", "4"))
+# Used when the token response carries no expires_in
+EVERSEND_TOKEN_TTL = int(os.getenv("EVERSEND_TOKEN_TTL", "3000"))
+# Circuit breaker: open after N consecutive failures, probe again after cooldown
+EVERSEND_BREAKER_THRESHOLD = int(os.getenv("EVERSEND_BREAKER_THRESHOLD", "5"))
+EVERSEND_BREAKER_COOLDOWN = float(os.getenv("EVERSEND_BREAKER_COOLDOWN", "30"))
+
+# Refresh the token this many seconds before it actually expires
+TOKEN_EXPIRY_SKEW = 60
+# Refused before being processed, so safe to repeat even for collections.
+# 502/504 only say a gateway lost the answer: retried for idempotent calls
+REJECTED_STATUS = {429, 503}
+
+
+class EversendError(Exception):
+    """Eversend rejected the request or could not be reached."""
+
+
+class EversendUnavailable(EversendError):
+    """The circuit breaker is open; Eversend is not being called."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Eversend temporarily unavailable, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed -> open -> half-open (one probe)."""
+
+    def __init__(self, threshold: int = EVERSEND_BREAKER_THRESHOLD, cooldown: float = EVERSEND_BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return "half-open"
+        return "open"
+
+    def before_call(self):
+        state = self.state
+        if state == "open" or (state == "half-open" and self._probing):
+            remaining = self.cooldown - (time.monotonic() - self.opened_at)
+            raise EversendUnavailable(max(remaining, 1))
+        if state == "half-open":
+            self._probing = True
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def release_probe(self):
+        """The probe ended without an answer either way (e.g. the caller was
+        cancelled); let the next call probe instead."""
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._probing = False
+        if self.opened_at is not None or self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+
+
+class EversendClient:
+    """Async Eversend API client.
+
+    One pooled ``httpx.AsyncClient`` is reused for every call (keep-alive,
+    no TLS handshake per payment), the access token is cached until shortly
+    before it expires, and failed calls are retried with jittered
+    exponential backoff behind a circuit breaker.
+
+    Collections are only retried when the request never reached Eversend
+    (connect errors) or it refused it with 429/503, so a payment prompt is
+    never sent twice for a request Eversend may have accepted.
+    """
+
+    def __init__(self, base_url: str = EVERSEND_BASE_URL, client_id: str = EVERSEND_CLIENT_ID,
+                 client_secret: str = EVERSEND_CLIENT_SECRET, transport=None):
+        self.base_url = base_url.rstrip("/")
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.breaker = CircuitBreaker()
+        self._transport = transport
+        self._http = None
+        self._token = None
+        self._token_expires_at = 0.0
+        self._token_lock = None
+
+    def _client(self) -> httpx.AsyncClient:
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(EVERSEND_TIMEOUT, connect=EVERSEND_CONNECT_TIMEOUT),
+                limits=httpx.Limits(max_connections=EVERSEND_MAX_CONNECTIONS,
+                                    max_keepalive_connections=EVERSEND_MAX_CONNECTIONS),
+                transport=self._transport,
+            )
+        return self._http
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    def _backoff(self, attempt: int) -> float:
+        # "Full jitter": uniform over [0, min(max, base * 2^attempt)]
+        return random.uniform(0, min(EVERSEND_BACKOFF_MAX, EVERSEND_BACKOFF_BASE * (2 ** attempt)))
+
+    async def _request(self, method: str, path: str, idempotent: bool, **kwargs) -> httpx.Response:
+        self.breaker.before_call()
+        # Every exit must settle the breaker, or a half-open probe that never
+        # reports back would keep it refusing calls until restart
+        try:
+            res = await self._send(method, path, idempotent, **kwargs)
+        except asyncio.CancelledError:
+            self.breaker.release_probe()
+            raise
+        except BaseException:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return res
+
+    async def _send(self, method: str, path: str, idempotent: bool, **kwargs) -> httpx.Response:
+        """The request with retries; raises EversendError once they run out."""
+        last_error = None
+        for attempt in range(EVERSEND_MAX_RETRIES + 1):
+            if attempt:
+                await asyncio.sleep(self._backoff(attempt - 1))
+            try:
+                res = await self._client().request(method, path, **kwargs)
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+                last_error = e
+                continue
+            except httpx.TransportError as e:
+                # The request may have been delivered; only safe to repeat if idempotent
+                last_error = e
+                if idempotent:
+                    continue
+                break
+            if res.status_code in REJECTED_STATUS:
+                last_error = EversendError(f"Eversend returned {res.status_code}")
+                continue
+            if res.status_code >= 500:
+                last_error = EversendError(f"Eversend returned {res.status_code}")
+                if idempotent:
+                    continue
+                break
+            return res
+
+        raise EversendError(str(last_error)) from last_error
+
+    async def get_access_token(self, force_refresh: bool = False) -> str:
+        if self._token_lock is None:
+            self._token_lock = asyncio.Lock()
+        async with self._token_lock:
+            if not force_refresh and self._token and time.monotonic() < self._token_expires_at:
+                return self._token
+            payload = {"client_id": self.client_id, "client_secret": self.client_secret}
+            res = await self._request("POST", "/auth/token", idempotent=True, json=payload)
+            if res.status_code >= 400:
+                raise EversendError(f"Token request failed with {res.status_code}: {res.text}")
+            data = res.json()
+            ttl = int(data.get("expires_in") or EVERSEND_TOKEN_TTL)
+            self._token = data["access_token"]
+            self._token_expires_at = time.monotonic() + max(ttl - TOKEN_EXPIRY_SKEW, 0)
+            return self._token
+
+    async def initiate_mobile_money(self, amount, currency, phone_number, method, callback_url):
+        payload = {
+            "amount": amount,
+            "currency": currency,
+            "phone_number": phone_number,
+            "network": method,
+            "callback_url": callback_url,
+            "reason": "Edumentor subscription payment"
+        }
+        for refreshed in (False, True):
+            token = await self.get_access_token(force_refresh=refreshed)
+            headers = {"Authorization": f"Bearer {token}"}
+            res = await self._request("POST", "/collections/mobile-money", idempotent=False,
+                                      json=payload, headers=headers)
+            # A cached token can be revoked early; fetch a new one once
+            if res.status_code == 401 and not refreshed:
+                continue
+            break
+        if res.status_code >= 400:
+            raise EversendError(f"Collection request failed with {res.status_code}: {res.text}")
+        return res.json()
+
+
+client = EversendClient()
+
+
+async def get_access_token():
+    return await client.get_access_token()
+
+
+async def initiate_mobile_money(amount, currency, phone_number, method, callback_url):
+    return await client.initiate_mobile_money(amount, currency, phone_number, method, callback_url)
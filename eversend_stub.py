@@ -0,0 +1,80 @@
+"""Local stand-in for the Eversend API, for offline load and failure testing.
+
+Run it next to the API and point the client at it:
+
+    uvicorn eversend_stub:app --port 9000
+    EVERSEND_API_BASE=http://127.0.0.1:9000/v1 uvicorn main:app
+
+Behaviour is tuned with environment variables:
+    STUB_LATENCY_MS      added delay per request (default 50)
+    STUB_FAILURE_RATE    fraction of requests answered with 503 (default 0)
+    STUB_TOKEN_TTL       expires_in returned with tokens (default 3600)
+    STUB_SEND_CALLBACKS  if "1", POST a SUCCESS webhook to callback_url
+    STUB_CALLBACK_DELAY_MS  delay before that webhook (default 500)
+"""
+import asyncio
+import os
+import random
+import uuid
+
+import httpx
+from fastapi import FastAPI, Header, HTTPException, Request
+
+LATENCY_MS = float(os.getenv("STUB_LATENCY_MS", "50"))
+FAILURE_RATE = float(os.getenv("STUB_FAILURE_RATE", "0"))
+TOKEN_TTL = int(os.getenv("STUB_TOKEN_TTL", "3600"))
+SEND_CALLBACKS = os.getenv("STUB_SEND_CALLBACKS", "0") == "1"
+CALLBACK_DELAY_MS = float(os.getenv("STUB_CALLBACK_DELAY_MS", "500"))
+
+app = FastAPI(title="Eversend stub")
+app.state.tokens = set()
+app.state.stats = {"token_requests": 0, "collection_requests": 0, "failures": 0, "callbacks": 0}
+
+
+async def _simulate():
+    if LATENCY_MS:
+        await asyncio.sleep(LATENCY_MS / 1000)
+    if FAILURE_RATE and random.random() < FAILURE_RATE:
+        app.state.stats["failures"] += 1
+        raise HTTPException(status_code=503, detail="Stub failure")
+
+
+async def _send_callback(callback_url: str, transaction_id: str):
+    await asyncio.sleep(CALLBACK_DELAY_MS / 1000)
+    payload = {"transaction_id": transaction_id, "event_id": str(uuid.uuid4()), "status": "SUCCESS"}
+    try:
+        async with httpx.AsyncClient(timeout=5) as http:
+            await http.post(callback_url, json=payload)
+        app.state.stats["callbacks"] += 1
+    except httpx.HTTPError as e:
+        print(f"Stub callback to {callback_url} failed: {e}")
+
+
+@app.post("/v1/auth/token")
+async def token(request: Request):
+    app.state.stats["token_requests"] += 1
+    await _simulate()
+    body = await request.json()
+    if not body.get("client_id"):
+        raise HTTPException(status_code=401, detail="Missing client_id")
+    access_token = uuid.uuid4().hex
+    app.state.tokens.add(access_token)
+    return {"access_token": access_token, "expires_in": TOKEN_TTL}
+
+
+@app.post("/v1/collections/mobile-money")
+async def collect(request: Request, authorization: str = Header(default="")):
+    app.state.stats["collection_requests"] += 1
+    await _simulate()
+    if authorization.removeprefix("Bearer ") not in app.state.tokens:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    body = await request.json()
+    transaction_id = f"STUB-{uuid.uuid4().hex[:16]}"
+    if SEND_CALLBACKS and body.get("callback_url"):
+        asyncio.create_task(_send_callback(body["callback_url"], transaction_id))
+    return {"transaction_id": transaction_id, "status": "PENDING", "amount": body.get("amount")}
+
+
+@app.get("/stats")
+def stats():
+    return app.state.stats
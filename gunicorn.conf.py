@@ -0,0 +1,49 @@
+"""Gunicorn settings read automatically from the working directory.
+
+Command-line flags (Procfile, Dockerfile, render.yaml) still take
+precedence; this file wires up what the flags do not:
+
+- ``preload_app``: the master imports the app once and the workers share
+  that copy-on-write, instead of each worker importing FastAPI, the
+  routers and NumPy on its own (GUNICORN_PRELOAD=0 turns it off)
+- the master prepares the database (``migrate.py``) once before forking
+- the shared directory the workers write Prometheus samples to, so
+  /metrics reports the sum over all workers (see metrics.py)
+"""
+import os
+import shutil
+import sys
+import tempfile
+
+# Must be set before the workers import prometheus_client
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "edumentor-metrics"))
+
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+
+
+def on_starting(server):
+    # Samples from a previous run would otherwise be merged into this one
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+    # Workers forked from here see the flag set and skip their own run
+    import migrate
+
+    migrate.prepare_on_startup()
+
+
+def post_fork(server, worker):
+    # Never reuse pooled connections a preloaded master may hold
+    database = sys.modules.get("database")
+    if database is not None:
+        database.engine.dispose(close=False)
+    replicas = sys.modules.get("replicas")
+    if replicas is not None:
+        replicas.replicas.dispose(close=False)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -1,21 +1,28 @@
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from database import SessionLocal
-from models import JobPosting, School, JobApplication, Notification
-from schemas import JobPostingCreate, JobPostingUpdate, JobPostingOut, JobApplicationCreate, JobApplicationOut, NotificationCreate, NotificationOut
+from starlette.concurrency import run_in_threadpool
+from typing import Optional
+from database import get_db, SessionRunner
+from replicas import get_read_db, get_read_runner, read_sessionmaker
+from models import JobPosting, School, JobApplication, NotificationFanout, Teacher
+from schemas import JobPostingCreate, JobPostingImport, JobPostingUpdate, JobPostingOut, JobApplicationCreate, JobApplicationOut, NotificationCreate, NotificationOut
+from queries import job_rows, application_rows, teacher_rows
+import bulk
+import matching
+import responses
+import search
+import streaming
+import notifications
+import events
+import cache
+import versions
 import typing as t
 
 router = APIRouter(prefix="/jobs", tags=["Jobs"])
 
-# Dependency
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 
 # 1. Create a job posting
 @router.post("/", response_model=JobPostingOut)
@@ -35,18 +42,13 @@ def create_job_posting(job: JobPostingCreate, school_id: int, db: Session = Depe
         status="Active"
     )
     db.add(new_job)
+    db.flush()
+    search.index_job(db, new_job)
+    # Teachers are notified by the background fan-out worker, not in this request
+    notifications.enqueue_job_posted(db, new_job)
     db.commit()
     db.refresh(new_job)
-    # Notify all teachers about new job
-    teacher_ids = [t.id for t in db.query(JobApplication.teacher_id).distinct()]
-    for tid in teacher_ids:
-        notif = Notification(
-            recipient_user_id=tid,
-            type="job_posted",
-            content=f"New job posted: {job.title}"
-        )
-        db.add(notif)
-    db.commit()
+    notifications.worker.wake()
     return new_job
 
     # --- Job Application Endpoints ---
@@ -57,104 +59,201 @@ def apply_for_job(application: JobApplicationCreate, db: Session = Depends(get_d
     job = db.query(JobPosting).filter(JobPosting.id == application.job_id).first()
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
-    # Check if teacher already applied
-    existing = db.query(JobApplication).filter(JobApplication.job_id == application.job_id, JobApplication.teacher_id == application.teacher_id).first()
-    if existing:
-        raise HTTPException(status_code=400, detail="Already applied to this job")
+    if not db.query(Teacher.id).filter(Teacher.id == application.teacher_id).first():
+        raise HTTPException(status_code=404, detail="Teacher not found")
+    # Insert directly; uq_job_applications_job_teacher rejects a second
+    # application, the only constraint left that the checks above do not cover
     db_app = JobApplication(**application.dict())
     db.add(db_app)
-    db.commit()
-    db.refresh(db_app)
+    try:
+        db.flush()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Already applied to this job")
     # Create notification for school
-    notif = Notification(
+    notifications.notify(
+        db,
         recipient_user_id=job.school_id,  # Assuming school_id is user_id
         type="application_submitted",
         content=f"Teacher {application.teacher_id} applied for job {application.job_id}"
     )
-    db.add(notif)
+    events.publish_after_commit(db, job.school_id, "application", {"job_id": job.id, "application_id": db_app.id})
     db.commit()
+    db.refresh(db_app)
     return db_app
 
+def _application_dict(a, teacher_name, teacher_phone):
+    return {
+        'id': a.id,
+        'job_id': a.job_id,
+        'teacher_id': a.teacher_id,
+        'teacher_name': teacher_name or f'Teacher #{a.teacher_id}',
+        'teacher_phone': teacher_phone,
+        'status': a.status,
+        'message': a.message,
+        'created_at': a.created_at,
+    }
+
 @router.get("/{job_id}/applications", response_model=t.List[JobApplicationOut])
-def get_job_applications(job_id: int, db: Session = Depends(get_db)):
-    apps = db.query(JobApplication).filter(JobApplication.job_id == job_id).all()
-    result = []
-    for a in apps:
-        teacher = None
-        teacher_name = None
-        teacher_phone = None
-        try:
-            if hasattr(a, 'teacher') and a.teacher:
-                teacher = a.teacher
-                if hasattr(teacher, 'user') and teacher.user:
-                    teacher_name = teacher.user.name
-                teacher_phone = getattr(teacher, 'phone', None)
-        except Exception:
-            pass
+def get_job_applications(job_id: int, db: Session = Depends(get_read_db)):
+    rows = application_rows(db).filter(JobApplication.job_id == job_id).all()
+    return responses.rows_response([_application_dict(a, name, phone) for a, name, phone in rows])
 
-        result.append({
-            'id': a.id,
-            'job_id': a.job_id,
-            'teacher_id': a.teacher_id,
-            'teacher_name': teacher_name or f'Teacher #{a.teacher_id}',
-            'teacher_phone': teacher_phone,
-            'status': a.status,
-            'message': a.message,
-            'created_at': a.created_at,
-        })
 
-    return result
+# 4b. Best matching teachers for a posting
+@router.get("/{job_id}/candidates")
+def get_job_candidates(
+    job_id: int,
+    limit: int = Query(20, ge=1, le=100),
+    verified_only: bool = False,
+    db: Session = Depends(get_db),
+):
+    """Teachers ranked by subject, location, experience and verification"""
+    row = job_rows(db).filter(JobPosting.id == job_id).with_entities(JobPosting, School.location).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Job posting not found")
+    job, school_location = row
 
-@router.get("/schools/{school_id}/applications", response_model=t.List[JobApplicationOut])
-def get_school_applications(school_id: int, db: Session = Depends(get_db)):
-    jobs = db.query(JobPosting).filter(JobPosting.school_id == school_id).all()
-    job_ids = [job.id for job in jobs]
-    apps = db.query(JobApplication).filter(JobApplication.job_id.in_(job_ids)).all()
+    ranked = matching.candidates(db, job.subject, school_location, job.experience, limit, verified_only)
+    details = {t.id: (t, name, active) for t, name, active in teacher_rows(db).filter(Teacher.id.in_([r[0] for r in ranked]))}
     result = []
-    for a in apps:
-        teacher_name = None
-        teacher_phone = None
-        try:
-            if hasattr(a, 'teacher') and a.teacher:
-                if hasattr(a.teacher, 'user') and a.teacher.user:
-                    teacher_name = a.teacher.user.name
-                teacher_phone = getattr(a.teacher, 'phone', None)
-        except Exception:
-            pass
-
+    for teacher_id, score, subject_match, location_match in ranked:
+        if teacher_id not in details:
+            continue  # deleted since the index was built
+        teacher, name, active = details[teacher_id]
         result.append({
-            'id': a.id,
-            'job_id': a.job_id,
-            'teacher_id': a.teacher_id,
-            'teacher_name': teacher_name or f'Teacher #{a.teacher_id}',
-            'teacher_phone': teacher_phone,
-            'status': a.status,
-            'message': a.message,
-            'created_at': a.created_at,
+            "teacher_id": teacher.id,
+            "name": name or f"Teacher #{teacher.id}",
+            "subject": teacher.subject,
+            "location": teacher.location,
+            "phone": teacher.phone,
+            "experience": teacher.experience_years,
+            "verified": bool(active),
+            "score": score,
+            "subject_match": subject_match,
+            "location_match": location_match,
         })
+    return {"job_id": job.id, "candidates": result}
+
+APPLICATION_COLUMNS = ["id", "job_id", "teacher_id", "teacher_name", "teacher_phone", "status", "message", "created_at"]
+
+JOB_COLUMNS = ["id", "school_id", "school_name", "title", "subject", "experience", "description", "salary", "status", "created_at", "updated_at"]
+
+# List endpoints below also stream (Accept: application/x-ndjson or text/csv)
+STREAM_HEADERS = {"Vary": "Accept"}
+
+
+def _school_applications_query(school_id: int, db: Session = None):
+    # Join through the posting instead of collecting job ids into an IN (...) list
+    return (
+        application_rows(db)
+        .join(JobPosting, JobApplication.job_id == JobPosting.id)
+        .filter(JobPosting.school_id == school_id)
+        .order_by(JobApplication.id)
+    )
+
+
+def _school_applications(db: Session, school_id: int):
+    rows = _school_applications_query(school_id, db).all()
+    return responses.rows_response([_application_dict(a, name, phone) for a, name, phone in rows])
+
 
+@router.get("/schools/{school_id}/applications", response_model=t.List[JobApplicationOut])
+async def get_school_applications(school_id: int, request: Request, runner: SessionRunner = Depends(get_read_runner)):
+    fmt = streaming.negotiate(request)
+    if fmt:
+        return streaming.stream_response(
+            _school_applications_query(school_id).statement, fmt, APPLICATION_COLUMNS,
+            to_dict=lambda row: _application_dict(*row), headers=STREAM_HEADERS,
+            session_factory=read_sessionmaker(request),
+        )
+    result = await runner.run(_school_applications, school_id)
+    result.headers.update(STREAM_HEADERS)
     return result
 
 
+def _job_dict(job, school_name):
+    return {
+        "id": job.id,
+        "school_id": job.school_id,
+        "school_name": school_name or "Unknown School",
+        "title": job.title,
+        "subject": job.subject,
+        "experience": job.experience,
+        "description": job.description,
+        "salary": job.salary,
+        "status": job.status,
+        "created_at": job.created_at,
+        "updated_at": job.updated_at
+    }
+
+
+def _active_jobs(db: Session, request: Request, response: Response):
+    not_modified = versions.conditional(request, response, *versions.table_token(db, "job_postings", "schools"))
+    if not_modified:
+        return not_modified
+
+    rows = job_rows(db).filter(JobPosting.status == "Active").all()
+    return responses.rows_response({"jobs": [_job_dict(job, school_name) for job, school_name in rows]}, response)
+
 
 # 2. Get all job postings
 @router.get("/")
-def get_all_jobs(db: Session = Depends(get_db)):
+async def get_all_jobs(request: Request, response: Response, runner: SessionRunner = Depends(get_read_runner)):
     """Get all active job postings"""
-    jobs = db.query(JobPosting).filter(JobPosting.status == "Active").all()
+    fmt = streaming.negotiate(request)
+    if fmt:
+        statement = job_rows().filter(JobPosting.status == "Active").order_by(JobPosting.id).statement
+        return streaming.stream_response(
+            statement, fmt, JOB_COLUMNS, to_dict=lambda row: _job_dict(*row), headers=STREAM_HEADERS,
+            session_factory=read_sessionmaker(request),
+        )
+    response.headers.update(STREAM_HEADERS)
+    return await runner.run(_active_jobs, request, response)
+
+
+# 2b. Full-text search over active job postings
+@router.get("/search")
+def search_job_postings(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_read_db),
+):
+    """Search active job postings by title, subject and description"""
+    rows = search.search_jobs(db, q, limit=limit, offset=offset)
+    result = []
+    for row in rows:
+        result.append({
+            "id": row["id"],
+            "school_id": row["school_id"],
+            "school_name": row["school_name"] or "Unknown School",
+            "title": row["title"],
+            "subject": row["subject"],
+            "experience": row["experience"],
+            "salary": row["salary"],
+            "status": row["status"],
+            "snippet": row["snippet"],
+            "rank": row["rank"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"]
+        })
+
+    next_offset = offset + limit if len(result) == limit else None
+    return {"jobs": result, "next_offset": next_offset}
+
+
+def _jobs_for_school(db: Session, school_id: int, request: Request, response: Response):
+    not_modified = versions.conditional(request, response, *versions.table_token(db, "job_postings"))
+    if not_modified:
+        return not_modified
+
+    jobs = db.query(JobPosting).filter(JobPosting.school_id == school_id).all()
     result = []
     for job in jobs:
-        school_name = "Unknown School"
-        try:
-            if hasattr(job, 'school') and job.school:
-                school_name = job.school.name
-        except Exception:
-            pass
-        
         result.append({
             "id": job.id,
             "school_id": job.school_id,
-            "school_name": school_name,
             "title": job.title,
             "subject": job.subject,
             "experience": job.experience,
@@ -165,19 +264,82 @@ def get_all_jobs(db: Session = Depends(get_db)):
             "updated_at": job.updated_at
         })
     
-    return {"jobs": result}
+    return responses.rows_response({"jobs": result}, response)
 
 
 # 3. Get job postings by school
 @router.get("/school/{school_id}")
-def get_school_jobs(school_id: int, db: Session = Depends(get_db)):
+async def get_school_jobs(school_id: int, request: Request, response: Response, runner: SessionRunner = Depends(get_read_runner)):
     """Get all job postings for a specific school"""
-    jobs = db.query(JobPosting).filter(JobPosting.school_id == school_id).all()
-    result = []
-    for job in jobs:
-        result.append({
+    return await runner.run(_jobs_for_school, school_id, request, response)
+
+
+EXPORT_COLUMNS = ["id", "school_id", "title", "subject", "experience", "description", "salary", "status",
+                  "created_at", "updated_at"]
+
+
+def _check_job_rows(db: Session, chunk):
+    """Reject postings for schools that do not exist."""
+    school_ids = {values["school_id"] for _, values in chunk}
+    known = {school_id for (school_id,) in db.query(School.id).filter(School.id.in_(school_ids))}
+    return {line: ["school_id: school not found"] for line, values in chunk if values["school_id"] not in known}
+
+
+def _after_job_insert(db: Session, chunk, job_ids):
+    # Same side effects as create_job_posting, batched: search index entries
+    # and one queued "job_posted" fan-out per posting
+    search.index_jobs(db, job_ids)
+    db.execute(insert(NotificationFanout), [
+        {"type": "job_posted", "content": f"New job posted: {values['title']}",
+         "subject_filter": values["subject"], "status": "PENDING", "attempts": 0}
+        for _, values in chunk
+    ])
+
+
+# 3b. Bulk import job postings (CSV or NDJSON body, each row with school_id)
+@router.post("/import")
+async def import_jobs(request: Request, format: Optional[str] = None, db: Session = Depends(get_db)):
+    fmt = bulk.detect_format(request, format)
+    upload = await bulk.spool_body(request)
+    try:
+        report = await run_in_threadpool(
+            bulk.import_rows, db, bulk.read_rows(upload, fmt), JobPosting, JobPostingImport,
+            check=_check_job_rows, after_insert=_after_job_insert,
+        )
+    finally:
+        upload.close()
+    notifications.worker.wake()
+    return report
+
+
+# 3c. Export all job postings as CSV or NDJSON, streamed
+@router.get("/export")
+def export_jobs(request: Request, format: str = "csv"):
+    if format not in streaming.MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="format must be csv or ndjson")
+    statement = select(*[getattr(JobPosting, c) for c in EXPORT_COLUMNS]).order_by(JobPosting.id)
+    return streaming.stream_response(statement, format, EXPORT_COLUMNS, filename="jobs",
+                                     session_factory=read_sessionmaker(request))
+
+
+# 4. Get single job posting
+@router.get("/{job_id}")
+def get_job(job_id: int, request: Request, response: Response, db: Session = Depends(get_db), bypass_cache: bool = Depends(cache.bypass)):
+    """Get a specific job posting by ID"""
+    token, last_modified = versions.table_token(db, "job_postings", "schools")
+    not_modified = versions.conditional(request, response, token, last_modified)
+    if not_modified:
+        return not_modified
+
+    def load():
+        row = job_rows(db).filter(JobPosting.id == job_id).first()
+        if not row:
+            return None
+        job, school_name = row
+        return {
             "id": job.id,
             "school_id": job.school_id,
+            "school_name": school_name or "Unknown School",
             "title": job.title,
             "subject": job.subject,
             "experience": job.experience,
@@ -186,39 +348,14 @@ def get_school_jobs(school_id: int, db: Session = Depends(get_db)):
             "status": job.status,
             "created_at": job.created_at,
             "updated_at": job.updated_at
-        })
-    
-    return {"jobs": result}
+        }
 
-
-# 4. Get single job posting
-@router.get("/{job_id}")
-def get_job(job_id: int, db: Session = Depends(get_db)):
-    """Get a specific job posting by ID"""
-    job = db.query(JobPosting).filter(JobPosting.id == job_id).first()
-    if not job:
+    # Keyed by the token the ETag is built from: other workers' LRUs are not
+    # invalidated, so an entry must never outlive the version it was read at
+    result = cache.get_or_load(f"job:{job_id}:{token}", load, bypass=bypass_cache)
+    if result is None:
         raise HTTPException(status_code=404, detail="Job posting not found")
-    
-    school_name = "Unknown School"
-    try:
-        if hasattr(job, 'school') and job.school:
-            school_name = job.school.name
-    except Exception:
-        pass
-    
-    return {
-        "id": job.id,
-        "school_id": job.school_id,
-        "school_name": school_name,
-        "title": job.title,
-        "subject": job.subject,
-        "experience": job.experience,
-        "description": job.description,
-        "salary": job.salary,
-        "status": job.status,
-        "created_at": job.created_at,
-        "updated_at": job.updated_at
-    }
+    return result
 
 
 # 5. Update job posting
@@ -232,6 +369,7 @@ def update_job(job_id: int, job_data: JobPostingUpdate, db: Session = Depends(ge
     for key, value in job_data.dict(exclude_unset=True).items():
         setattr(job, key, value)
     
+    search.index_job(db, job)
     db.commit()
     db.refresh(job)
     return job
@@ -245,6 +383,7 @@ def delete_job(job_id: int, db: Session = Depends(get_db)):
     if not job:
         raise HTTPException(status_code=404, detail="Job posting not found")
     
+    search.remove_job(db, job.id)
     db.delete(job)
     db.commit()
     
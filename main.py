@@ -1,14 +1,32 @@
-from fastapi import FastAPI, Request
+from fastapi import Depends, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse
-from database import Base, engine
+from fastapi.responses import JSONResponse
+import database
 import auth, teachers, schools, payments, jobs
+import notifications
+import matching
+import metrics
+import admission
+import replicas
+import slowlog
+import events
+import webhooks
+import passwords
+import eversend_client
+import cache
+import migrate
 import uvicorn
 import traceback
 from pathlib import Path
+from static_assets import StaticAssets
+from responses import FastJSONResponse
 
 # Import routes later
-app = FastAPI(title="Edumentor MVP API")
+app = FastAPI(title="Edumentor MVP API", default_response_class=FastJSONResponse)
+
+# Innermost, so shed 503s still get CORS headers and show up in /metrics
+app.add_middleware(replicas.ReadYourWritesMiddleware)
+app.add_middleware(admission.AdmissionMiddleware)
 
 # Configure CORS - Allow all origins including null (local file://)
 app.add_middleware(
@@ -26,12 +44,14 @@ app.add_middleware(
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
 )
+app.add_middleware(metrics.MetricsMiddleware)
 
 # Global exception handler
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     print(f"Error: {exc}")
     print(traceback.format_exc())
+    metrics.record_exception(request.scope, exc)
     return JSONResponse(
         status_code=500,
         content={
@@ -41,33 +61,95 @@ async def global_exception_handler(request: Request, exc: Exception):
         }
     )
 
-Base.metadata.create_all(bind=engine)
 # Include routes
 app.include_router(auth.router)
 app.include_router(teachers.router)
 app.include_router(schools.router)
 app.include_router(payments.router)
 app.include_router(jobs.router)
+app.include_router(events.router)
+
+# Schema comes from the Alembic migrations (see migrate.py). Under gunicorn
+# the master has already run them before forking, so this is a no-op there.
+@app.on_event("startup")
+def prepare_database():
+    migrate.prepare_on_startup()
+
+
+@app.on_event("startup")
+def start_background_workers():
+    notifications.worker.start()
+    notifications.archiver.start()
+    webhooks.worker.start()
+    matching.refresher.start()
+    if replicas.replicas.replicas:
+        replicas.monitor.start()
+
+
+@app.on_event("shutdown")
+async def stop_background_workers():
+    notifications.worker.stop()
+    notifications.archiver.stop()
+    webhooks.worker.stop()
+    matching.refresher.stop()
+    replicas.monitor.stop()
+    events.broker.close()
+    passwords.pool.shutdown()
+    await eversend_client.client.aclose()
+    await database.dispose_async_engine()
+    await replicas.replicas.dispose_async()
+
 
 @app.get("/")
 def home():
     return {"message": "Welcome to Edumentor MVP API"}
 
-# Serve static HTML files from project root
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """Prometheus metrics, merged across gunicorn workers"""
+    return metrics.metrics_response()
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    """Read-through cache counters for this worker"""
+    return cache.stats()
+
+
+@app.get("/health/replicas")
+def replica_health():
+    """Read replicas' lag and whether they are taking reads, on this worker"""
+    return replicas.replicas.stats()
+
+
+@app.get("/admin/slow-queries", dependencies=[Depends(slowlog.require_local)])
+def slow_queries(limit: int = 20):
+    """Slowest statements on this worker by total time, with their plans"""
+    return {"threshold_ms": slowlog.SLOW_QUERY_MS, "queries": slowlog.log.top(limit)}
+
+
+@app.delete("/admin/slow-queries", dependencies=[Depends(slowlog.require_local)])
+def reset_slow_queries():
+    slowlog.log.reset()
+    return {"message": "Slow-query log cleared"}
+
+# Serve static HTML files from project root (in memory, precompressed)
 static_dir = Path(__file__).parent
 html_files = [
     'index.html', 'login.html', 'teacher-register.html', 'teacher-payment.html',
     'payment-success.html', 'school-register.html', 'teacher-dashboard.html',
     'school-dashboard.html', 'teacher-listings.html'
 ]
+static_assets = StaticAssets(static_dir, html_files)
+static_assets.precompress()
+static_assets.register(app)
+
 
-# Create route for each HTML file to serve directly
-for html in html_files:
-    file_path = static_dir / html
-    if file_path.exists():
-        @app.get(f"/{html}")
-        def serve_file(file_path=file_path):
-            return FileResponse(file_path, media_type="text/html")
+@app.get("/static/manifest.json")
+def static_manifest():
+    """Content-hashed URLs for the HTML pages"""
+    return static_assets.manifest()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,253 @@
+"""Teacher ranking for job postings.
+
+Each worker keeps a compact in-memory index of every teacher: parallel
+NumPy arrays of id, subject code, location code, years of experience and
+verified flag (``User.active``), about 20 bytes a teacher. Subjects and
+locations are interned into a small vocabulary, so scoring a posting is a
+handful of vectorised comparisons over the arrays plus an argpartition for
+the top k, a few milliseconds for 100k+ teachers.
+
+``refresher`` loads the index in the background at startup (a request
+arriving first loads it inline). ``create_teacher`` / ``update_teacher``
+call ``refresh_teachers`` after committing, which upserts just those rows.
+Every write to a teacher, including bulk imports and a payment activating
+the teacher's user, sets ``Teacher.updated_at``. For writes this worker
+does not see, ``refresher`` upserts every MATCHING_REFRESH_SECONDS the
+teachers updated since its last look. It re-reads the last
+WATERMARK_OVERLAP_SECONDS each time, so a transaction that commits a
+little after its timestamp was taken is not missed. The index is only
+loaded in full once.
+
+Scores are a weighted sum in [0, 1] of: subject match, location match,
+experience relative to the years the posting asks for, and verification.
+"""
+import os
+import re
+import threading
+from datetime import timedelta
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import Teacher, User
+from workers import PollingWorker
+
+MATCHING_REFRESH_SECONDS = float(os.getenv("MATCHING_REFRESH_SECONDS", "30"))
+WEIGHT_SUBJECT = float(os.getenv("MATCHING_WEIGHT_SUBJECT", "0.45"))
+WEIGHT_LOCATION = float(os.getenv("MATCHING_WEIGHT_LOCATION", "0.25"))
+WEIGHT_EXPERIENCE = float(os.getenv("MATCHING_WEIGHT_EXPERIENCE", "0.2"))
+WEIGHT_VERIFIED = float(os.getenv("MATCHING_WEIGHT_VERIFIED", "0.1"))
+# Experience counted in full when a posting states no requirement
+DEFAULT_EXPERIENCE_YEARS = 10
+WATERMARK_OVERLAP_SECONDS = 60
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_YEARS_RE = re.compile(r"\d+")
+
+
+def _tokens(value) -> frozenset:
+    return frozenset(_TOKEN_RE.findall(value.lower())) if value else frozenset()
+
+
+def _tokens_match(a: frozenset, b: frozenset) -> bool:
+    # "Maths" matches "Maths, Physics"; "Math" matches "Mathematics"
+    return any(x.startswith(y) or y.startswith(x) for x in a for y in b)
+
+
+def required_years(experience) -> int:
+    """Years asked for by a free-text ``JobPosting.experience`` such as
+    "3+ years" or "2-5 years" (the lower bound), or None."""
+    match = _YEARS_RE.search(experience or "")
+    return int(match.group()) if match else None
+
+
+class _Vocabulary:
+    """Interns normalised terms to small integer codes."""
+
+    def __init__(self):
+        self.codes = {}
+        self.tokens = []
+
+    def code(self, value) -> int:
+        tokens = _tokens(value)
+        if not tokens:
+            return -1
+        key = " ".join(sorted(tokens))
+        if key not in self.codes:
+            self.codes[key] = len(self.tokens)
+            self.tokens.append(tokens)
+        return self.codes[key]
+
+    def lookup(self, value) -> np.ndarray:
+        """Boolean table indexed by code + 1: does the term match ``value``?
+        Slot 0 is the "no term" code -1, which never matches."""
+        wanted = _tokens(value)
+        table = np.zeros(len(self.tokens) + 1, dtype=bool)
+        if wanted:
+            table[1:] = [_tokens_match(wanted, tokens) for tokens in self.tokens]
+        return table
+
+
+class TeacherIndex:
+    """Column arrays of all teachers; thread-safe."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.loaded = False
+        self.watermark = None
+        self._reset(0)
+
+    def _reset(self, capacity: int):
+        self.size = 0
+        self.positions = {}
+        self.subjects = _Vocabulary()
+        self.locations = _Vocabulary()
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.subject = np.full(capacity, -1, dtype=np.int32)
+        self.location = np.full(capacity, -1, dtype=np.int32)
+        self.experience = np.zeros(capacity, dtype=np.float32)
+        self.verified = np.zeros(capacity, dtype=bool)
+
+    def _grow(self):
+        capacity = max(1024, len(self.ids) * 2)
+        self.ids = np.resize(self.ids, capacity)
+        self.subject = np.resize(self.subject, capacity)
+        self.location = np.resize(self.location, capacity)
+        self.experience = np.resize(self.experience, capacity)
+        self.verified = np.resize(self.verified, capacity)
+
+    def _put(self, teacher_id, subject, location, experience_years, active):
+        position = self.positions.get(teacher_id)
+        if position is None:
+            if self.size == len(self.ids):
+                self._grow()
+            position = self.size
+            self.size += 1
+            self.positions[teacher_id] = position
+            self.ids[position] = teacher_id
+        self.subject[position] = self.subjects.code(subject)
+        self.location[position] = self.locations.code(location)
+        self.experience[position] = experience_years or 0
+        self.verified[position] = bool(active)
+
+    def load(self, rows, watermark, expected: int = 0):
+        """Replace the contents with ``rows`` of (id, subject, location,
+        experience_years, active)."""
+        fresh = TeacherIndex()
+        fresh._reset(max(1024, expected))
+        for row in rows:
+            fresh._put(*row)
+        with self._lock:
+            for name in ("size", "positions", "subjects", "locations", "ids", "subject", "location", "experience", "verified"):
+                setattr(self, name, getattr(fresh, name))
+            self.watermark = watermark
+            self.loaded = True
+
+    def upsert(self, rows, watermark=None):
+        with self._lock:
+            for row in rows:
+                self._put(*row)
+            if watermark is not None:
+                self.watermark = watermark
+
+    def top(self, subject, location, years, limit: int, verified_only: bool = False):
+        """[(teacher_id, score, subject_match, location_match)] best first."""
+        with self._lock:
+            n = self.size
+            # Per-code weights turn each match into one gather over the codes
+            subject_weights = self.subjects.lookup(subject) * np.float32(WEIGHT_SUBJECT)
+            location_weights = self.locations.lookup(location) * np.float32(WEIGHT_LOCATION)
+            scores = subject_weights[self.subject[:n] + 1]
+            scores += location_weights[self.location[:n] + 1]
+            experience = self.experience[:n] * np.float32(1 / max(years or DEFAULT_EXPERIENCE_YEARS, 1))
+            np.minimum(experience, 1, out=experience)
+            scores += experience * np.float32(WEIGHT_EXPERIENCE)
+            verified = self.verified[:n]
+            scores += verified * np.float32(WEIGHT_VERIFIED)
+            if verified_only:
+                scores[~verified] = -1
+            k = min(limit, n)
+            if k == 0:
+                return []
+            best = np.argpartition(-scores, k - 1)[:k]
+            # Highest score first, lower id first among (float32-)equals
+            best = best[np.lexsort((self.ids[best], -np.round(scores[best], 4)))]
+            return [
+                (
+                    int(self.ids[i]),
+                    round(float(scores[i]), 4),
+                    bool(subject_weights[self.subject[i] + 1]),
+                    bool(location_weights[self.location[i] + 1]),
+                )
+                for i in best
+                if scores[i] >= 0
+            ]
+
+
+index = TeacherIndex()
+_load_lock = threading.Lock()
+
+
+def _teacher_rows(db: Session, teacher_ids=None, updated_since=None):
+    statement = (
+        select(Teacher.id, Teacher.subject, Teacher.location, Teacher.experience_years, User.active)
+        .outerjoin(User, Teacher.user_id == User.id)
+    )
+    if teacher_ids is not None:
+        statement = statement.where(Teacher.id.in_(teacher_ids))
+    if updated_since is not None:
+        statement = statement.where(Teacher.updated_at > updated_since)
+    return db.execute(statement.execution_options(yield_per=10000))
+
+
+def _watermark(db: Session):
+    return db.query(func.max(Teacher.updated_at)).scalar()
+
+
+def rebuild(db: Session):
+    # Read the watermark first: a write landing during the load is picked
+    # up again by the next refresh
+    watermark = _watermark(db)
+    expected = db.query(Teacher.id).count()
+    index.load(_teacher_rows(db), watermark, expected)
+
+
+def ensure_loaded(db: Session):
+    if index.loaded:
+        return
+    with _load_lock:
+        if not index.loaded:
+            rebuild(db)
+
+
+def refresh_teachers(db: Session, teacher_ids):
+    """Upsert ``teacher_ids`` after their changes have been committed."""
+    if index.loaded:
+        index.upsert(_teacher_rows(db, list(teacher_ids)).all())
+
+
+def refresh_if_stale(session_factory=SessionLocal) -> int:
+    """Load the index, or upsert the teachers updated since the last
+    refresh. One pass per poll: always returns 0."""
+    db = session_factory()
+    try:
+        if not index.loaded:
+            ensure_loaded(db)
+            return 0
+        watermark = _watermark(db)
+        if watermark is not None:
+            since = index.watermark - timedelta(seconds=WATERMARK_OVERLAP_SECONDS) if index.watermark else None
+            index.upsert(_teacher_rows(db, updated_since=since).all(), watermark)
+    finally:
+        db.close()
+    return 0
+
+
+def candidates(db: Session, subject, location, experience, limit: int, verified_only: bool = False):
+    ensure_loaded(db)
+    return index.top(subject, location, required_years(experience), limit, verified_only)
+
+
+refresher = PollingWorker("matching-refresher", refresh_if_stale, MATCHING_REFRESH_SECONDS, batch_size=1)
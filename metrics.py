@@ -0,0 +1,195 @@
+"""Prometheus metrics: request latency per route and SQL cost per request.
+
+``MetricsMiddleware`` times every HTTP request and labels it with the
+route template (``/jobs/{job_id}``, not the concrete path) so the series
+count stays bounded. SQLAlchemy ``before/after_cursor_execute`` listeners
+on every Engine (the sync engine in ``database`` and the async engine's
+sync core alike) time each statement; a context variable set by the
+middleware attributes the statements to the request that issued them,
+including those run on the threadpool, which copies the context.
+
+``GET /metrics`` serves the text exposition format. Under gunicorn each
+worker is a separate process, so the workers write their samples to
+PROMETHEUS_MULTIPROC_DIR (set by ``gunicorn.conf.py``) and the scrape,
+whichever worker answers it, merges all of them. Without that variable
+(a single uvicorn process) the in-process registry is served.
+"""
+import contextvars
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.responses import Response
+
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+UNMATCHED_ROUTE = "<unmatched>"
+
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100, 200)
+QUERY_SECONDS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route template and status.", ["method", "route", "status"],
+)
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Time to serve a request, including streaming the body.", ["method", "route"],
+)
+IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "Requests being served.", ["method"], multiprocess_mode="livesum",
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries", "SQL statements executed per request.", ["method", "route"],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+REQUEST_QUERY_SECONDS = Histogram(
+    "http_request_db_seconds", "Time spent in SQL statements per request.", ["method", "route"],
+    buckets=QUERY_SECONDS_BUCKETS,
+)
+QUERIES = Counter(
+    "db_queries_total", "SQL statements executed, including background workers.", ["operation"],
+)
+QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds", "Time per SQL statement.", ["operation"], buckets=QUERY_SECONDS_BUCKETS,
+)
+EXCEPTIONS = Counter(
+    "http_unhandled_exceptions_total", "Exceptions that reached the global handler.", ["route", "exception"],
+)
+ADMISSION_IN_FLIGHT = Gauge(
+    "admission_in_flight", "Requests holding an admission slot.", ["route_class"], multiprocess_mode="livesum",
+)
+ADMISSION_QUEUED = Gauge(
+    "admission_queue_depth", "Requests waiting for an admission slot.", ["route_class"], multiprocess_mode="livesum",
+)
+ADMISSION_WAIT_SECONDS = Histogram(
+    "admission_wait_seconds", "Time admitted requests spent queued.", ["route_class"],
+    buckets=QUERY_SECONDS_BUCKETS,
+)
+ADMISSION_REJECTED = Counter(
+    "admission_rejected_total", "Requests shed with 503, by reason (queue_full, timeout).", ["route_class", "reason"],
+)
+REPLICA_LAG_SECONDS = Gauge(
+    "db_replica_lag_seconds", "Age of the oldest write a read replica has not replayed (-1: check failed).",
+    ["replica"], multiprocess_mode="max",
+)
+READ_ROUTING = Counter(
+    "db_read_routing_total", "Read-only sessions by database and reason.", ["target", "reason"],
+)
+
+OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH"}
+
+
+class RequestStats:
+    __slots__ = ("scope", "queries", "query_seconds")
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.queries = 0
+        self.query_seconds = 0.0
+
+
+_request_stats = contextvars.ContextVar("request_stats", default=None)
+
+
+def _operation(statement: str) -> str:
+    word = statement.lstrip()[:6].upper()
+    return word if word in OPERATIONS else "OTHER"
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["metrics_started"].pop()
+    operation = _operation(statement)
+    QUERIES.labels(operation).inc()
+    QUERY_SECONDS.labels(operation).observe(elapsed)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.query_seconds += elapsed
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("metrics_started"):
+        conn.info["metrics_started"].pop()
+
+
+def route_template(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+def current_route():
+    """``"GET /jobs/{job_id}"`` for the request being served on this
+    context, or None outside a request (background workers, startup)."""
+    stats = _request_stats.get()
+    if stats is None:
+        return None
+    return f"{stats.scope['method']} {route_template(stats.scope)}"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware, so streamed bodies are timed to the last chunk
+    and the context variable reaches the handler."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        stats = RequestStats(scope)
+        token = _request_stats.set(stats)
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_progress = IN_PROGRESS.labels(scope["method"])
+        in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            in_progress.dec()
+            _request_stats.reset(token)
+            # The router fills in scope["route"] while handling the request
+            method, route = scope["method"], route_template(scope)
+            REQUESTS.labels(method, route, str(status)).inc()
+            REQUEST_SECONDS.labels(method, route).observe(elapsed)
+            REQUEST_QUERIES.labels(method, route).observe(stats.queries)
+            REQUEST_QUERY_SECONDS.labels(method, route).observe(stats.query_seconds)
+
+
+def record_exception(scope, exc: Exception):
+    EXCEPTIONS.labels(route_template(scope), type(exc).__name__).inc()
+
+
+def metrics_response() -> Response:
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
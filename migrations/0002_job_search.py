@@ -0,0 +1,56 @@
+"""job search
+
+Text index for GET /jobs/search: an FTS5 table job_postings_fts on SQLite
+(rowid = posting id, kept in step by search.py), a GIN expression index on
+Postgres. Where neither is available search falls back to LIKE.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 11:43:20.512094
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+dependencies = None
+
+FTS_TABLE = 'job_postings_fts'
+PG_INDEX = 'ix_job_postings_search'
+# Must match search.PG_DOCUMENT, or the planner will not use the index
+PG_DOCUMENT = (
+    "to_tsvector('english', coalesce(title, '') || ' ' || coalesce(subject, '') "
+    "|| ' ' || coalesce(description, ''))"
+)
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        if FTS_TABLE in sa.inspect(op.get_bind()).get_table_names():
+            return
+        try:
+            op.execute(
+                f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+                "title, subject, description, tokenize = 'porter unicode61')"
+            )
+        except sa.exc.OperationalError as e:
+            print(f"FTS5 unavailable, job search falls back to LIKE: {e}")
+            return
+        op.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, subject, description) "
+            "SELECT id, title, subject, coalesce(description, '') FROM job_postings"
+        )
+    elif dialect == 'postgresql':
+        op.execute(f"CREATE INDEX IF NOT EXISTS {PG_INDEX} ON job_postings USING GIN ({PG_DOCUMENT})")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    elif dialect == 'postgresql':
+        op.execute(f"DROP INDEX IF EXISTS {PG_INDEX}")
@@ -0,0 +1,44 @@
+"""notification fan-outs
+
+Durable queue of job-posted notifications, drained by notifications.worker.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 11:43:27.203318
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+dependencies = None
+
+
+def upgrade():
+    # Databases created by Base.metadata.create_all may already have it
+    if 'notification_fanouts' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table('notification_fanouts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('type', sa.String(length=50), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('subject_filter', sa.String(length=255), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=True),
+    sa.Column('attempts', sa.Integer(), nullable=True),
+    sa.Column('recipients', sa.Integer(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.Column('processed_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_notification_fanouts_id'), 'notification_fanouts', ['id'], unique=False)
+    op.create_index(op.f('ix_notification_fanouts_status'), 'notification_fanouts', ['status'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_notification_fanouts_status'), table_name='notification_fanouts')
+    op.drop_index(op.f('ix_notification_fanouts_id'), table_name='notification_fanouts')
+    op.drop_table('notification_fanouts')
@@ -0,0 +1,45 @@
+"""payment events
+
+Append-only log of Eversend webhook deliveries, applied by webhooks.worker.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 11:43:34.771925
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+dependencies = None
+
+
+def upgrade():
+    # Databases created by Base.metadata.create_all may already have it
+    if 'payment_events' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table('payment_events',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('transaction_id', sa.String(length=255), nullable=False),
+    sa.Column('event_id', sa.String(length=255), nullable=False),
+    sa.Column('status', sa.String(length=50), nullable=True),
+    sa.Column('payload', sa.Text(), nullable=True),
+    sa.Column('outcome', sa.String(length=20), nullable=True),
+    sa.Column('received_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.Column('processed_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('transaction_id', 'event_id', name='uq_payment_events_txn_event')
+    )
+    op.create_index(op.f('ix_payment_events_id'), 'payment_events', ['id'], unique=False)
+    op.create_index(op.f('ix_payment_events_processed_at'), 'payment_events', ['processed_at'], unique=False)
+    op.create_index(op.f('ix_payment_events_transaction_id'), 'payment_events', ['transaction_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_payment_events_transaction_id'), table_name='payment_events')
+    op.drop_index(op.f('ix_payment_events_processed_at'), table_name='payment_events')
+    op.drop_index(op.f('ix_payment_events_id'), table_name='payment_events')
+    op.drop_table('payment_events')
@@ -0,0 +1,34 @@
+"""table versions
+
+Per-table write counters behind the ETag / Last-Modified validators. The
+rows themselves are created by versions.ensure_versions.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 11:43:41.036557
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+dependencies = None
+
+
+def upgrade():
+    # Databases created by Base.metadata.create_all may already have it
+    if 'table_versions' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table('table_versions',
+    sa.Column('table_name', sa.String(length=100), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('table_name')
+    )
+
+
+def downgrade():
+    op.drop_table('table_versions')
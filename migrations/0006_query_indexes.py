@@ -0,0 +1,67 @@
+"""query indexes
+
+Indexes for the filters the routers actually run, and a unique index on
+job_applications (job_id, teacher_id) so apply_for_job can rely on the
+database to reject duplicate applications.
+
+Destructive: before creating that index, repeated applications by the same
+teacher to the same job are deleted, keeping the earliest. The number of
+rows deleted and the affected pairs are printed.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 11:43:31.184927
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+dependencies = None
+
+INDEXES = [
+    ('uq_job_applications_job_teacher', 'job_applications', ['job_id', 'teacher_id'], True),
+    ('ix_job_postings_school_id_status', 'job_postings', ['school_id', 'status'], False),
+    ('ix_job_postings_status', 'job_postings', ['status'], False),
+    ('ix_notifications_recipient_created', 'notifications', ['recipient_user_id', 'created_at'], False),
+    ('ix_payments_teacher_id', 'payments', ['teacher_id'], False),
+    ('ix_teachers_user_id', 'teachers', ['user_id'], False),
+]
+
+
+def _existing_indexes(table):
+    return {ix['name'] for ix in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def _remove_duplicate_applications():
+    # Keep the earliest application where a teacher applied to a job twice
+    bind = op.get_bind()
+    duplicates = bind.execute(sa.text(
+        "SELECT job_id, teacher_id, COUNT(*) FROM job_applications "
+        "GROUP BY job_id, teacher_id HAVING COUNT(*) > 1 ORDER BY job_id, teacher_id"
+    )).all()
+    if not duplicates:
+        return
+    deleted = bind.execute(sa.text(
+        "DELETE FROM job_applications WHERE id NOT IN "
+        "(SELECT MIN(id) FROM job_applications GROUP BY job_id, teacher_id)"
+    )).rowcount
+    pairs = ", ".join(f"job {job_id}/teacher {teacher_id} (x{count})" for job_id, teacher_id, count in duplicates)
+    print(f"Deleted {deleted} duplicate job application(s), keeping the earliest of each: {pairs}")
+
+
+def upgrade():
+    if 'uq_job_applications_job_teacher' not in _existing_indexes('job_applications'):
+        _remove_duplicate_applications()
+    # Databases created by Base.metadata.create_all may already have these
+    for name, table, columns, unique in INDEXES:
+        if name not in _existing_indexes(table):
+            op.create_index(name, table, columns, unique=unique)
+
+
+def downgrade():
+    for name, table, columns, unique in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,64 @@
+"""notification inbox
+
+Unread counter on users, an (recipient, is_read, id) index for the
+unread-first inbox, and the notifications_archive table the archiver
+moves old read notifications into.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 11:58:12.407113
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+dependencies = None
+
+
+def _inspector():
+    return sa.inspect(op.get_bind())
+
+
+def upgrade():
+    # Databases created by Base.metadata.create_all may already have these
+    inspector = _inspector()
+    if 'notifications_archive' not in inspector.get_table_names():
+        op.create_table('notifications_archive',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('recipient_user_id', sa.Integer(), nullable=False),
+        sa.Column('type', sa.String(length=50), nullable=True),
+        sa.Column('content', sa.Text(), nullable=True),
+        sa.Column('is_read', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_notifications_archive_recipient_user_id'), 'notifications_archive', ['recipient_user_id'], unique=False)
+
+    indexes = {ix['name'] for ix in inspector.get_indexes('notifications')}
+    if 'ix_notifications_recipient_created' in indexes:
+        op.drop_index('ix_notifications_recipient_created', table_name='notifications')
+    if 'ix_notifications_inbox' not in indexes:
+        op.create_index('ix_notifications_inbox', 'notifications', ['recipient_user_id', 'is_read', 'id'], unique=False)
+
+    if 'unread_notifications' not in {c['name'] for c in inspector.get_columns('users')}:
+        op.add_column('users', sa.Column('unread_notifications', sa.Integer(), server_default='0', nullable=False))
+
+    # The inbox treats is_read as two-valued; then seed the counters
+    op.execute("UPDATE notifications SET is_read = false WHERE is_read IS NULL")
+    op.execute(
+        "UPDATE users SET unread_notifications = "
+        "(SELECT COUNT(*) FROM notifications n WHERE n.recipient_user_id = users.id AND n.is_read = false)"
+    )
+
+
+def downgrade():
+    op.drop_column('users', 'unread_notifications')
+    op.drop_index('ix_notifications_inbox', table_name='notifications')
+    op.create_index('ix_notifications_recipient_created', 'notifications', ['recipient_user_id', 'created_at'], unique=False)
+    op.drop_index(op.f('ix_notifications_archive_recipient_user_id'), table_name='notifications_archive')
+    op.drop_table('notifications_archive')
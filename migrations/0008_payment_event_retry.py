@@ -0,0 +1,28 @@
+"""payment event retry
+
+next_attempt_at on payment_events, so events waiting for their Payment row
+are skipped by the worker until they are due instead of filling every batch.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 14:12:09.318240
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+dependencies = None
+
+
+def upgrade():
+    # Databases created by Base.metadata.create_all may already have it
+    if 'next_attempt_at' not in {c['name'] for c in sa.inspect(op.get_bind()).get_columns('payment_events')}:
+        op.add_column('payment_events', sa.Column('next_attempt_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade():
+    op.drop_column('payment_events', 'next_attempt_at')
@@ -0,0 +1,32 @@
+"""teacher updated_at
+
+teachers.updated_at, the watermark the matching index refreshes changed
+teachers by. Existing rows stay NULL; workers load them in full at startup.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 14:41:53.602117
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+dependencies = None
+
+
+def upgrade():
+    # Databases created by Base.metadata.create_all may already have it
+    inspector = sa.inspect(op.get_bind())
+    if 'updated_at' not in {c['name'] for c in inspector.get_columns('teachers')}:
+        op.add_column('teachers', sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True))
+    if 'ix_teachers_updated_at' not in {ix['name'] for ix in inspector.get_indexes('teachers')}:
+        op.create_index(op.f('ix_teachers_updated_at'), 'teachers', ['updated_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_teachers_updated_at'), table_name='teachers')
+    op.drop_column('teachers', 'updated_at')
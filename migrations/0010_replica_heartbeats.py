@@ -0,0 +1,34 @@
+"""replica heartbeats
+
+The row the replica monitor stamps on the primary every check. How old the
+replica's copy of it is gives the lag for writes to any table.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18 15:07:26.914382
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+dependencies = None
+
+
+def upgrade():
+    # Databases created by Base.metadata.create_all may already have it
+    if 'replica_heartbeats' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table('replica_heartbeats',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('first_beat_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('beat_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('replica_heartbeats')
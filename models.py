@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Float, DateTime, Text
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Float, DateTime, Text, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from database import Base
 from sqlalchemy.sql import func
@@ -12,18 +12,22 @@ class User(Base):
     password = Column(String, nullable=False)
     role = Column(String, nullable=False)  # 'teacher' or 'school'
     active = Column(Boolean, default=False)
+    # Maintained by notifications.py on every write to this user's inbox
+    unread_notifications = Column(Integer, nullable=False, default=0, server_default="0")
 
     teacher_profile = relationship("Teacher", back_populates="user", uselist=False)
 
 class Teacher(Base):
     __tablename__ = "teachers"
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
     subject = Column(String)
     bio = Column(String)
     location = Column(String)
     phone = Column(String(20))
     experience_years = Column(Integer, nullable=True)
+    # Watermark matching.refresher picks changed teachers up by
+    updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
     user = relationship("User", back_populates="teacher_profile")
 
@@ -44,7 +48,7 @@ class Payment(Base):
     __tablename__ = "payments"
 
     id = Column(Integer, primary_key=True, index=True)
-    teacher_id = Column(Integer, ForeignKey("teachers.id"))
+    teacher_id = Column(Integer, ForeignKey("teachers.id"), index=True)
     amount = Column(Float, nullable=False)
     method = Column(String(50))  # MTN, AIRTEL, CARD, etc.
     transaction_id = Column(String(255), unique=True)
@@ -52,9 +56,29 @@ class Payment(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 
+# Append-only log of raw Eversend webhook deliveries. The raw columns are never
+# modified; webhooks.worker only stamps outcome/processed_at once applied.
+class PaymentEvent(Base):
+    __tablename__ = "payment_events"
+    __table_args__ = (UniqueConstraint("transaction_id", "event_id", name="uq_payment_events_txn_event"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    transaction_id = Column(String(255), nullable=False, index=True)
+    event_id = Column(String(255), nullable=False)
+    status = Column(String(50))
+    payload = Column(Text)
+    outcome = Column(String(20), nullable=True)  # applied, ignored, unmatched
+    received_at = Column(DateTime(timezone=True), server_default=func.now())
+    processed_at = Column(DateTime(timezone=True), nullable=True, index=True)
+    # Set while waiting for the matching Payment row; skipped until then
+    next_attempt_at = Column(DateTime(timezone=True), nullable=True)
+
+
 
 class JobPosting(Base):
     __tablename__ = "job_postings"
+    # A school's postings, optionally narrowed by status
+    __table_args__ = (Index("ix_job_postings_school_id_status", "school_id", "status"),)
 
     id = Column(Integer, primary_key=True, index=True)
     school_id = Column(Integer, ForeignKey("schools.id"), nullable=False)
@@ -63,7 +87,7 @@ class JobPosting(Base):
     experience = Column(String(100))
     description = Column(Text)
     salary = Column(String(255))
-    status = Column(String(50), default="Active")  # Active, Closed, Draft
+    status = Column(String(50), default="Active", index=True)  # Active, Closed, Draft
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -73,6 +97,8 @@ class JobPosting(Base):
 # Job Application Model
 class JobApplication(Base):
     __tablename__ = "job_applications"
+    # One application per teacher per job; also serves lookups by job_id
+    __table_args__ = (Index("uq_job_applications_job_teacher", "job_id", "teacher_id", unique=True),)
 
     id = Column(Integer, primary_key=True, index=True)
     job_id = Column(Integer, ForeignKey("job_postings.id"), nullable=False)
@@ -87,6 +113,8 @@ class JobApplication(Base):
 # Notification Model
 class Notification(Base):
     __tablename__ = "notifications"
+    # A user's inbox: unread first, newest (highest id) first within each
+    __table_args__ = (Index("ix_notifications_inbox", "recipient_user_id", "is_read", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     recipient_user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -96,3 +124,50 @@ class Notification(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     recipient = relationship("User")
+
+
+# Read notifications past the retention period, moved here by notifications.archiver
+class NotificationArchive(Base):
+    __tablename__ = "notifications_archive"
+
+    id = Column(Integer, primary_key=True)  # id of the original notification
+    recipient_user_id = Column(Integer, nullable=False, index=True)
+    type = Column(String(50))
+    content = Column(Text)
+    is_read = Column(Boolean, default=True)
+    created_at = Column(DateTime(timezone=True))
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+# Durable queue of pending notification fan-outs, drained by notifications.worker
+class NotificationFanout(Base):
+    __tablename__ = "notification_fanouts"
+
+    id = Column(Integer, primary_key=True, index=True)
+    type = Column(String(50), nullable=False)
+    content = Column(Text, nullable=False)
+    subject_filter = Column(String(255), nullable=True)  # None = every teacher with an account
+    status = Column(String(20), default="PENDING", index=True)  # PENDING, DONE, FAILED
+    attempts = Column(Integer, default=0)
+    recipients = Column(Integer, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    processed_at = Column(DateTime(timezone=True), nullable=True)
+
+
+# Per-table write counters backing HTTP validators (see versions.py)
+class TableVersion(Base):
+    __tablename__ = "table_versions"
+
+    table_name = Column(String(100), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), default=datetime.utcnow)
+
+
+# Single row the replica monitor stamps on the primary (see replicas.py)
+class ReplicaHeartbeat(Base):
+    __tablename__ = "replica_heartbeats"
+
+    id = Column(Integer, primary_key=True)
+    first_beat_at = Column(DateTime(timezone=True), nullable=False)
+    beat_at = Column(DateTime(timezone=True), nullable=False)
@@ -0,0 +1,240 @@
+"""Notification fan-out.
+
+Handlers enqueue a ``NotificationFanout`` row in their own transaction and
+return; ``worker`` drains the queue off the request path and
+writes one ``Notification`` per matching teacher with a single
+INSERT ... SELECT. Claiming a fan-out and writing its rows happen in one
+transaction, so a crashed worker leaves the entry PENDING and concurrent
+gunicorn workers never deliver it twice.
+
+Every write to an inbox also adjusts ``User.unread_notifications`` in the
+same transaction, so unread badges are a primary-key read instead of a
+COUNT. ``archiver`` moves read notifications older than the retention
+period to ``notifications_archive`` to keep the hot table small.
+"""
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, delete, false, func, insert, literal, select, true, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import Notification, NotificationArchive, NotificationFanout, Teacher, User
+from workers import PollingWorker
+import events
+
+POLL_SECONDS = float(os.getenv("NOTIFICATION_POLL_SECONDS", "2"))
+BATCH_SIZE = int(os.getenv("NOTIFICATION_BATCH_SIZE", "20"))
+MAX_ATTEMPTS = int(os.getenv("NOTIFICATION_MAX_ATTEMPTS", "5"))
+RETENTION_DAYS = int(os.getenv("NOTIFICATION_RETENTION_DAYS", "30"))
+ARCHIVE_INTERVAL_SECONDS = float(os.getenv("NOTIFICATION_ARCHIVE_INTERVAL_SECONDS", "3600"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("NOTIFICATION_ARCHIVE_BATCH_SIZE", "500"))
+
+
+def _adjust_unread(db: Session, user_ids, delta: int) -> None:
+    """Add ``delta`` to the unread counter of ``user_ids`` (ids or a SELECT).
+
+    A Core UPDATE on purpose: no cached users payload shows the counter, so
+    the users table version is left alone."""
+    counter = User.unread_notifications
+    value = counter + delta if delta > 0 else case((counter + delta > 0, counter + delta), else_=0)
+    db.execute(
+        update(User)
+        .where(User.id.in_(user_ids))
+        .values(unread_notifications=value)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def notify(db: Session, recipient_user_id: int, type: str, content: str) -> Notification:
+    """Write one notification; committed by the caller's transaction."""
+    notification = Notification(recipient_user_id=recipient_user_id, type=type, content=content, is_read=False)
+    db.add(notification)
+    _adjust_unread(db, [recipient_user_id], 1)
+    events.publish_after_commit(db, recipient_user_id, "notification", {"type": type, "content": content})
+    return notification
+
+
+def enqueue(db: Session, type: str, content: str, subject_filter=None) -> NotificationFanout:
+    """Queue a fan-out to teachers; committed by the caller's transaction."""
+    fanout = NotificationFanout(type=type, content=content, subject_filter=subject_filter, status="PENDING")
+    db.add(fanout)
+    return fanout
+
+
+def enqueue_job_posted(db: Session, job) -> NotificationFanout:
+    """Queue a "job_posted" notification for teachers teaching the job's subject."""
+    return enqueue(db, "job_posted", f"New job posted: {job.title}", subject_filter=job.subject)
+
+
+def _recipients(fanout: NotificationFanout, *columns):
+    """SELECT of the notification rows a fan-out should write."""
+    query = (
+        select(Teacher.user_id, *columns)
+        .where(Teacher.user_id.isnot(None))
+        .distinct()
+    )
+    if fanout.subject_filter:
+        query = query.where(func.lower(Teacher.subject) == fanout.subject_filter.strip().lower())
+    return query
+
+
+def deliver(db: Session, fanout_id: int) -> bool:
+    """Claim and deliver one pending fan-out. Returns False if another worker
+    already took it."""
+    claimed = db.execute(
+        update(NotificationFanout)
+        .where(NotificationFanout.id == fanout_id, NotificationFanout.status == "PENDING")
+        .values(status="DONE", attempts=NotificationFanout.attempts + 1, processed_at=datetime.utcnow())
+    )
+    if claimed.rowcount != 1:
+        db.rollback()
+        return False
+
+    fanout = db.get(NotificationFanout, fanout_id)
+    result = db.execute(
+        insert(Notification).from_select(
+            ["recipient_user_id", "type", "content", "is_read"],
+            _recipients(fanout, literal(fanout.type), literal(fanout.content), literal(False)),
+        )
+    )
+    fanout.recipients = result.rowcount
+    _adjust_unread(db, _recipients(fanout), 1)
+    for user_id in db.execute(_recipients(fanout)).scalars():
+        events.publish_after_commit(db, user_id, "notification", {"type": fanout.type, "content": fanout.content})
+    db.commit()
+    return True
+
+
+def _record_failure(db: Session, fanout_id: int, error: str) -> None:
+    fanout = db.get(NotificationFanout, fanout_id)
+    if not fanout:
+        return
+    fanout.attempts = (fanout.attempts or 0) + 1
+    fanout.error = error
+    if fanout.attempts >= MAX_ATTEMPTS:
+        fanout.status = "FAILED"
+    db.commit()
+
+
+def process_pending(session_factory=SessionLocal, limit: int = BATCH_SIZE) -> int:
+    """Deliver up to ``limit`` pending fan-outs, oldest first. Returns the
+    number delivered by this call."""
+    db = session_factory()
+    delivered = 0
+    try:
+        pending_ids = [
+            row.id for row in db.query(NotificationFanout.id)
+            .filter(NotificationFanout.status == "PENDING")
+            .order_by(NotificationFanout.id)
+            .limit(limit)
+        ]
+        for fanout_id in pending_ids:
+            try:
+                if deliver(db, fanout_id):
+                    delivered += 1
+            except Exception as e:
+                db.rollback()
+                print(f"Notification fan-out {fanout_id} failed: {e}")
+                _record_failure(db, fanout_id, str(e))
+    finally:
+        db.close()
+    return delivered
+
+
+def unread_count(db: Session, user_id: int) -> int:
+    return db.query(User.unread_notifications).filter(User.id == user_id).scalar() or 0
+
+
+def _parse_cursor(cursor):
+    """"unread:<id>" / "read:<id>" -> (is_read, id); None starts at the top."""
+    if not cursor:
+        return False, None
+    section, _, last_id = cursor.partition(":")
+    if section not in ("unread", "read") or not last_id.isdigit():
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return section == "read", int(last_id)
+
+
+def inbox(db: Session, user_id: int, cursor=None, limit: int = 20, unread_only: bool = False):
+    """One page of a user's notifications, unread first and newest first
+    within each section. Returns (notifications, next_cursor).
+
+    Each section is a keyset range on ix_notifications_inbox; a page that
+    runs out of unread rows is topped up from the read ones."""
+    start_read, last_id = _parse_cursor(cursor)
+    rows = []
+    for is_read in (False, True):
+        if is_read < start_read or (is_read and unread_only):
+            continue
+        query = db.query(Notification).filter(
+            Notification.recipient_user_id == user_id,
+            Notification.is_read == (true() if is_read else false()),
+        )
+        if last_id is not None and is_read == start_read:
+            query = query.filter(Notification.id < last_id)
+        rows += query.order_by(Notification.id.desc()).limit(limit + 1 - len(rows)).all()
+        if len(rows) > limit:
+            break
+
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, f"{'read' if last.is_read else 'unread'}:{last.id}"
+
+
+def mark_read(db: Session, user_id: int, ids=None, before_id=None) -> int:
+    """Mark a user's unread notifications read in one UPDATE: the given
+    ``ids``, those up to ``before_id``, or all of them. Returns how many
+    changed; the caller commits."""
+    query = update(Notification).where(
+        Notification.recipient_user_id == user_id,
+        Notification.is_read == false(),
+    )
+    if ids is not None:
+        query = query.where(Notification.id.in_(ids))
+    if before_id is not None:
+        query = query.where(Notification.id <= before_id)
+    marked = db.execute(query.values(is_read=True).execution_options(synchronize_session=False)).rowcount
+    if marked:
+        _adjust_unread(db, [user_id], -marked)
+        events.publish_after_commit(db, user_id, "read", {"marked": marked})
+    return marked
+
+
+def archive_read(session_factory=SessionLocal, limit: int = ARCHIVE_BATCH_SIZE) -> int:
+    """Move up to ``limit`` read notifications older than RETENTION_DAYS to
+    notifications_archive. Returns the number moved."""
+    cutoff = datetime.utcnow() - timedelta(days=RETENTION_DAYS)
+    columns = ["id", "recipient_user_id", "type", "content", "is_read", "created_at"]
+    db = session_factory()
+    try:
+        ids = [
+            row.id for row in db.query(Notification.id)
+            .filter(Notification.is_read == true(), Notification.created_at < cutoff)
+            .order_by(Notification.id)
+            .limit(limit)
+        ]
+        if not ids:
+            return 0
+        db.execute(
+            insert(NotificationArchive).from_select(
+                columns,
+                select(*[getattr(Notification, c) for c in columns]).where(Notification.id.in_(ids)),
+            )
+        )
+        db.execute(delete(Notification).where(Notification.id.in_(ids)))
+        db.commit()
+    except IntegrityError:
+        # Another worker archived the same batch first
+        db.rollback()
+        return 0
+    finally:
+        db.close()
+    return len(ids)
+
+
+worker = PollingWorker("notification-worker", process_pending, POLL_SECONDS, BATCH_SIZE)
+archiver = PollingWorker("notification-archiver", archive_read, ARCHIVE_INTERVAL_SECONDS, ARCHIVE_BATCH_SIZE)
@@ -0,0 +1,98 @@
+"""Password hashing on a dedicated process pool.
+
+bcrypt is CPU-bound and holds a worker thread for ~100-300ms per call, so
+``register`` and ``login`` hand it to a small process pool instead of the
+request threadpool. The number of in-flight hash/verify calls per worker is
+capped; beyond that callers get a 429 instead of queueing without bound.
+
+Settings (environment):
+    BCRYPT_ROUNDS          cost factor for new hashes (default 12)
+    PASSWORD_POOL_SIZE     processes per app worker (default 2)
+    PASSWORD_MAX_PENDING   in-flight calls before 429 (default 16 x pool size)
+"""
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import bcrypt
+from fastapi import HTTPException
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+POOL_SIZE = int(os.getenv("PASSWORD_POOL_SIZE", "2"))
+MAX_PENDING = int(os.getenv("PASSWORD_MAX_PENDING", str(POOL_SIZE * 16)))
+RETRY_AFTER_SECONDS = 1
+
+
+def hash_password(password: str, rounds: int = BCRYPT_ROUNDS) -> str:
+    """Hash a password using bcrypt."""
+    salt = bcrypt.gensalt(rounds=rounds)
+    return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify a plaintext password against a bcrypt hash."""
+    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+
+def hash_rounds(hashed_password: str):
+    """Cost factor encoded in a ``$2b$<rounds>$...`` hash, or None if unparseable."""
+    try:
+        return int(hashed_password.split('$')[2])
+    except (IndexError, ValueError):
+        return None
+
+
+def needs_rehash(hashed_password: str, rounds: int = None) -> bool:
+    """True when a stored hash was made with an outdated cost factor."""
+    current = hash_rounds(hashed_password)
+    return current is not None and current != (rounds or BCRYPT_ROUNDS)
+
+
+class PasswordPool:
+    """Bounded process pool for bcrypt work, used from async handlers."""
+
+    def __init__(self, size: int = POOL_SIZE, max_pending: int = MAX_PENDING):
+        self.size = size
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor = None
+
+    def _get_executor(self):
+        # Created lazily so each gunicorn worker gets its own pool after fork.
+        # "spawn" children only import this module and never inherit the
+        # parent's threads or open database connections.
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.size,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def _run(self, fn, *args):
+        if self.pending >= self.max_pending:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many authentication requests, please retry",
+                headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+            )
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password, BCRYPT_ROUNDS)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+pool = PasswordPool()
@@ -1,92 +1,82 @@
 from fastapi import APIRouter, Depends, HTTPException, Request
 import os
 from sqlalchemy.orm import Session
-from database import SessionLocal
+from database import get_db
 from models import Payment, Teacher
-from schemas import PaymentCreate
-from eversend_client import initiate_mobile_money
+from schemas import PaymentCreateSchema
+from starlette.concurrency import run_in_threadpool
+from eversend_client import initiate_mobile_money, EversendUnavailable
+import webhooks
 
 router = APIRouter(prefix="/payments", tags=["Payments"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+
+def _find_teacher(db: Session, teacher_id: int):
+    return db.query(Teacher).filter(Teacher.id == teacher_id).first()
+
+
+def _record_payment(db: Session, teacher_id: int, payment: PaymentCreateSchema, txn_id: str) -> Payment:
+    new_payment = Payment(
+        teacher_id=teacher_id,
+        amount=payment.amount,
+        method=payment.method,
+        transaction_id=txn_id,
+        status="PENDING",
+    )
+    db.add(new_payment)
+    db.commit()
+    db.refresh(new_payment)
+    return new_payment
 
 
 # 1. Initiate payment
+# Async so the Eversend round trip awaits on the pooled client instead of
+# holding a threadpool thread; database calls still run in the threadpool.
 @router.post("/initiate")
-def create_payment(payment: PaymentCreate, request: Request, db: Session = Depends(get_db)):
+async def create_payment(payment: PaymentCreateSchema, request: Request, db: Session = Depends(get_db)):
     # Determine callback URL from environment or request base URL
     base = os.environ.get('BASE_URL') or str(request.base_url).rstrip('/')
     callback_url = f"{base}/payments/webhook/eversend"
 
-    teacher = db.query(Teacher).filter(Teacher.id == payment.teacher_id).first()
+    teacher = await run_in_threadpool(_find_teacher, db, payment.teacher_id)
     if not teacher:
         raise HTTPException(status_code=404, detail="Teacher not found")
 
     try:
-        response = initiate_mobile_money(
+        response = await initiate_mobile_money(
             amount=payment.amount,
             currency="UGX",
             phone_number=payment.phone_number,
             method=payment.method,
             callback_url=callback_url,
         )
+    except EversendUnavailable as e:
+        raise HTTPException(status_code=503, detail=f"Eversend error: {e}",
+                            headers={"Retry-After": str(int(e.retry_after))})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Eversend error: {e}")
 
     txn_id = response.get("transaction_id") or response.get("id", "unknown")
 
-    new_payment = Payment(
-        teacher_id=teacher.id,
-        amount=payment.amount,
-        method=payment.method,
-        transaction_id=txn_id,
-        status="PENDING",
-    )
-    db.add(new_payment)
-    db.commit()
-    db.refresh(new_payment)
+    await run_in_threadpool(_record_payment, db, teacher.id, payment, txn_id)
 
     return {"message": "Payment initiated", "transaction_id": txn_id}
 
 
 # 2. Webhook for Eversend
+# Only records the raw event and acknowledges; webhooks.worker applies the
+# status change and account activation in batches.
 @router.post("/webhook/eversend")
 async def eversend_webhook(request: Request, db: Session = Depends(get_db)):
     payload = await request.json()
     txn_id = payload.get("transaction_id")
-    status = payload.get("status")
 
     if not txn_id:
         return {"message": "Missing transaction_id"}
 
-    payment = db.query(Payment).filter(Payment.transaction_id == txn_id).first()
-    if not payment:
-        return {"message": "Payment not found"}
-
-    payment.status = status
-    db.commit()
+    recorded = await run_in_threadpool(webhooks.record_event, db, payload)
+    if not recorded:
+        return {"message": "Duplicate event ignored"}
 
-    # Activate user account when payment successful
-    if status and status.lower() == "success":
-        teacher = db.query(Teacher).filter(Teacher.id == payment.teacher_id).first()
-        if teacher:
-            # If Teacher is linked to a User, activate the User
-            try:
-                if hasattr(teacher, 'user') and teacher.user:
-                    teacher.user.active = True
-                    db.commit()
-                else:
-                    # Fallback: try to set a field on teacher if exists
-                    if hasattr(teacher, 'active'):
-                        teacher.active = True
-                        db.commit()
-            except Exception:
-                db.rollback()
-                # swallow errors but return payment updated
-
-    return {"message": "Payment updated successfully"}
+    webhooks.worker.wake()
+    return {"message": "Event received"}
@@ -0,0 +1,72 @@
+"""Shared query builders for list endpoints.
+
+Each builder returns a query that fetches a row together with the related
+columns the endpoint renders (user name, school name, teacher phone) in a
+single SELECT, so routers never touch lazy relationships inside a loop.
+Builders that take an optional session can also be called without one;
+the unbound query's ``.statement`` is then handed to ``streaming``.
+"""
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from sqlalchemy.orm import Query, Session
+
+from models import User, Teacher, School, JobPosting, JobApplication
+
+
+def teacher_rows(db: Session):
+    """Teacher rows as (Teacher, user_name, user_active)."""
+    return (
+        db.query(Teacher, User.name, User.active)
+        .outerjoin(User, Teacher.user_id == User.id)
+    )
+
+
+def job_rows(db: Session = None):
+    """Job posting rows as (JobPosting, school_name)."""
+    return (
+        Query([JobPosting, School.name], db)
+        .outerjoin(School, JobPosting.school_id == School.id)
+    )
+
+
+def application_rows(db: Session = None):
+    """Job application rows as (JobApplication, teacher_name, teacher_phone)."""
+    return (
+        Query([JobApplication, User.name, Teacher.phone], db)
+        .outerjoin(Teacher, JobApplication.teacher_id == Teacher.id)
+        .outerjoin(User, Teacher.user_id == User.id)
+    )
+
+
+class QueryCounter:
+    """Counts statements executed on an engine while active."""
+
+    def __init__(self):
+        self.count = 0
+        self.statements = []
+        self.parameters = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+        self.statements.append(statement)
+        self.parameters.append(parameters)
+
+
+@contextmanager
+def count_queries(engine):
+    """Record every SQL statement issued on ``engine`` inside the block.
+
+    Used to assert that a list endpoint costs a fixed number of queries
+    regardless of how many rows it returns::
+
+        with count_queries(engine) as counter:
+            client.get("/jobs/")
+        assert counter.count == 1
+    """
+    counter = QueryCounter()
+    event.listen(engine, "before_cursor_execute", counter)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", counter)
@@ -0,0 +1,253 @@
+"""Read-replica routing with read-your-writes.
+
+``DATABASE_REPLICA_URLS`` (comma-separated, SQLite or Postgres URLs)
+lists read replicas of DATABASE_URL. The heavy read-only handlers (list,
+search and export endpoints) take their session from ``get_read_db`` /
+``get_read_runner``, which hand out a replica session, round robin over
+the healthy replicas. Everything else, including the cached detail
+endpoints, stays on the primary. Without replicas they behave exactly
+like ``get_db`` / ``get_runner``.
+
+Read-your-writes: ``ReadYourWritesMiddleware`` answers every successful
+POST/PUT/PATCH/DELETE with a short-lived cookie, and for
+``REPLICA_STICKY_SECONDS`` a client that sends it back reads from the
+primary, so an application or profile edit shows up on the next
+dashboard refresh even when the replicas have not replayed it yet.
+
+Lag: every ``REPLICA_CHECK_SECONDS`` ``monitor`` stamps the current time
+on the primary's ``replica_heartbeats`` row, after comparing each
+replica's copy of that row with the primary's. A replica that has the
+latest beat is up to date; one that does not has replayed nothing since
+the beat it has, and is that old (to within a check interval). Beats are
+writes like any other, so this holds whichever tables the application is
+writing. Past ``REPLICA_MAX_LAG_SECONDS``, or when the check fails, the
+replica gets no reads until it catches up. This needs no database-specific
+replication views, so two SQLite files kept in sync by a copy job work as
+well as a Postgres streaming replica (see ``benchmarks/replica_routing.py``).
+"""
+import itertools
+import os
+import threading
+from datetime import datetime, timezone
+
+from fastapi import Request
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import sessionmaker
+
+import database
+import metrics
+from database import DB_ASYNC, SessionLocal, SessionRunner, make_engine
+from models import ReplicaHeartbeat
+from workers import PollingWorker
+
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+REPLICA_CHECK_SECONDS = float(os.getenv("REPLICA_CHECK_SECONDS", "2"))
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", "10"))
+STICKY_COOKIE = "edumentor_primary"
+
+UNSAFE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+_UNCHOSEN = object()
+
+
+def _naive_utc(value: datetime) -> datetime:
+    # Beats are stored as naive UTC; Postgres hands them back timezone-aware
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class Replica:
+    def __init__(self, name: str, url: str):
+        self.name = name
+        self.url = url
+        self.engine = make_engine(url)
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.async_engine = None
+        self._async_sessionmaker = None
+        # Unchecked replicas get no reads
+        self.lag = None
+        self.healthy = False
+        self.error = None
+
+    def async_sessionmaker(self):
+        if self._async_sessionmaker is None:
+            from sqlalchemy.ext.asyncio import async_sessionmaker
+            self.async_engine = database.make_async_engine(self.url)
+            self._async_sessionmaker = async_sessionmaker(self.async_engine, autoflush=False, expire_on_commit=False)
+        return self._async_sessionmaker
+
+    def stats(self) -> dict:
+        return {
+            "url": make_url(self.url).render_as_string(hide_password=True),
+            "healthy": self.healthy,
+            "lag_seconds": None if self.lag is None else round(self.lag, 3),
+            "error": self.error,
+        }
+
+
+def _heartbeat(engine):
+    """(first_beat_at, beat_at) of the heartbeat row, or None before the first beat."""
+    with engine.connect() as conn:
+        row = conn.execute(
+            select(ReplicaHeartbeat.first_beat_at, ReplicaHeartbeat.beat_at).where(ReplicaHeartbeat.id == 1)
+        ).first()
+    return None if row is None else tuple(_naive_utc(value) for value in row)
+
+
+def beat(engine) -> None:
+    """Stamp the primary's heartbeat row with the current time."""
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        if conn.execute(update(ReplicaHeartbeat).where(ReplicaHeartbeat.id == 1).values(beat_at=now)).rowcount:
+            return
+    try:
+        with engine.begin() as conn:
+            conn.execute(insert(ReplicaHeartbeat).values(id=1, first_beat_at=now, beat_at=now))
+    except IntegrityError:
+        # Another worker created it first; its beat is as good as ours
+        pass
+
+
+def measure_lag(replica: Replica, primary_beat) -> float:
+    """Seconds ``replica`` has replayed nothing for (0 when it has the
+    primary's latest beat)."""
+    if primary_beat is None:
+        return 0.0
+    first_beat_at, beat_at = primary_beat
+    seen = _heartbeat(replica.engine)
+    if seen is not None and seen[1] >= beat_at:
+        return 0.0
+    # Without the row at all it has replayed nothing since the first beat
+    replayed_until = seen[1] if seen is not None else first_beat_at
+    return max(0.0, (datetime.utcnow() - replayed_until).total_seconds())
+
+
+class ReplicaSet:
+    def __init__(self, urls, max_lag: float = REPLICA_MAX_LAG_SECONDS):
+        self.replicas = [Replica(f"replica{i}", url) for i, url in enumerate(urls)]
+        self.max_lag = max_lag
+        self._turn = itertools.count()
+        self._lock = threading.Lock()
+
+    def check(self) -> int:
+        """Measure every replica's lag; the monitor calls this."""
+        try:
+            primary_beat = _heartbeat(database.engine)
+        except Exception as e:
+            print(f"Replica check skipped, primary unavailable: {e}")
+            return 0
+        for replica in self.replicas:
+            try:
+                replica.lag = measure_lag(replica, primary_beat)
+                replica.error = None
+            except Exception as e:
+                replica.lag, replica.error = None, str(e)
+            healthy = replica.lag is not None and replica.lag <= self.max_lag
+            if healthy != replica.healthy:
+                state = "back in rotation" if healthy else f"out of rotation ({replica.error or f'{replica.lag:.1f}s behind'})"
+                print(f"Read replica {replica.name} {state}")
+            replica.healthy = healthy
+            metrics.REPLICA_LAG_SECONDS.labels(replica.name).set(-1 if replica.lag is None else replica.lag)
+        # After measuring, so the replicas get a full interval to replay it
+        try:
+            beat(database.engine)
+        except Exception as e:
+            print(f"Replica heartbeat not written: {e}")
+        return 0
+
+    def choose(self, request: Request):
+        """Replica for this request's reads, or None for the primary. Made
+        once per request, so a handler's session and stream agree."""
+        if not self.replicas:
+            return None
+        chosen = getattr(request.state, "read_replica", _UNCHOSEN)
+        if chosen is _UNCHOSEN:
+            chosen = request.state.read_replica = self._choose(request)
+        return chosen
+
+    def _choose(self, request: Request):
+        if request.cookies.get(STICKY_COOKIE):
+            metrics.READ_ROUTING.labels("primary", "recent_write").inc()
+            return None
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            metrics.READ_ROUTING.labels("primary", "replicas_unhealthy").inc()
+            return None
+        with self._lock:
+            replica = healthy[next(self._turn) % len(healthy)]
+        metrics.READ_ROUTING.labels(replica.name, "replica").inc()
+        return replica
+
+    def stats(self) -> dict:
+        return {
+            "max_lag_seconds": self.max_lag,
+            "sticky_seconds": REPLICA_STICKY_SECONDS,
+            "replicas": {replica.name: replica.stats() for replica in self.replicas},
+        }
+
+    def dispose(self, close: bool = True):
+        for replica in self.replicas:
+            replica.engine.dispose(close=close)
+
+    async def dispose_async(self):
+        for replica in self.replicas:
+            if replica.async_engine is not None:
+                await replica.async_engine.dispose()
+
+
+replicas = ReplicaSet(DATABASE_REPLICA_URLS)
+monitor = PollingWorker("replica-monitor", replicas.check, poll_seconds=REPLICA_CHECK_SECONDS, batch_size=1)
+
+
+def read_sessionmaker(request: Request):
+    """Session factory for a read-only request (e.g. for streaming exports)."""
+    replica = replicas.choose(request)
+    return replica.SessionLocal if replica else SessionLocal
+
+
+# Dependency for read-only sync handlers
+def get_read_db(request: Request):
+    db = read_sessionmaker(request)()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+# Dependency for read-only async handlers; backend chosen by DB_ASYNC
+async def get_read_runner(request: Request):
+    replica = replicas.choose(request)
+    if DB_ASYNC:
+        factory = replica.async_sessionmaker() if replica else database.get_async_sessionmaker()
+        async with factory() as db:
+            yield SessionRunner(db, is_async=True)
+    else:
+        db = (replica.SessionLocal if replica else SessionLocal)()
+        try:
+            yield SessionRunner(db, is_async=False)
+        finally:
+            db.close()
+
+
+class ReadYourWritesMiddleware:
+    """Pure ASGI middleware setting the sticky-primary cookie on successful
+    writes. Does nothing when no replicas are configured."""
+
+    def __init__(self, app, sticky_seconds: int = REPLICA_STICKY_SECONDS):
+        self.app = app
+        self.cookie = f"{STICKY_COOKIE}=1; Max-Age={sticky_seconds}; Path=/; HttpOnly; SameSite=Lax".encode()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in UNSAFE_METHODS or not replicas.replicas:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                message["headers"] = list(message.get("headers", [])) + [(b"set-cookie", self.cookie)]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
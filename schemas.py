@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field, validator
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 class UserCreate(BaseModel):
@@ -97,6 +97,10 @@ class JobPostingCreate(JobPostingBase):
     pass
 
 
+class JobPostingImport(JobPostingCreate):
+    school_id: int
+
+
 class JobPostingUpdate(BaseModel):
     title: Optional[str] = None
     subject: Optional[str] = None
@@ -150,3 +154,12 @@ class NotificationOut(NotificationBase):
     created_at: datetime
     class Config:
         orm_mode = True
+
+class NotificationPage(BaseModel):
+    notifications: List[NotificationOut]
+    unread_count: int
+    next_cursor: Optional[str] = None
+
+class NotificationMarkRead(BaseModel):
+    ids: Optional[List[int]] = None  # specific notifications
+    before_id: Optional[int] = None  # everything up to and including this id
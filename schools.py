@@ -1,21 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from database import SessionLocal
+from starlette.concurrency import run_in_threadpool
+from typing import Optional
+from database import get_db
+from replicas import get_read_db, read_sessionmaker
 from models import School
 from schemas import SchoolCreate, SchoolUpdate
+import bulk
+import cache
+import responses
+import streaming
 
 router = APIRouter(prefix="/schools", tags=["Schools"])
 
 
-# Dependency
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 # 1. Register a school
 @router.post("/")
 def register_school(school: SchoolCreate, db: Session = Depends(get_db)):
@@ -45,20 +44,73 @@ def register_school(school: SchoolCreate, db: Session = Depends(get_db)):
     }
 
 
-# 2. Get all schools
+LIST_COLUMNS = ["id", "name", "email", "phone", "location"]
+
+
+# 2. Get all schools (JSON, or streamed with Accept: application/x-ndjson / text/csv)
 @router.get("/")
-def get_schools(db: Session = Depends(get_db)):
-    schools = db.query(School).all()
-    return {"schools": [{"id": s.id, "name": s.name, "email": s.email, "phone": s.phone, "location": s.location} for s in schools]}
+def get_schools(request: Request, response: Response, db: Session = Depends(get_read_db)):
+    fmt = streaming.negotiate(request)
+    if fmt:
+        statement = select(*[getattr(School, c) for c in LIST_COLUMNS]).order_by(School.id)
+        return streaming.stream_response(statement, fmt, LIST_COLUMNS, headers={"Vary": "Accept"},
+                                         session_factory=read_sessionmaker(request))
+    response.headers["Vary"] = "Accept"
+    rows = db.execute(select(*[getattr(School, c) for c in LIST_COLUMNS])).all()
+    return responses.rows_response({"schools": [dict(row._mapping) for row in rows]}, response)
+
+
+EXPORT_COLUMNS = ["id", "name", "email", "phone", "location", "description"]
+
+
+def _check_school_rows(db: Session, chunk):
+    """Reject emails that are already registered or repeated in the chunk."""
+    emails = [values["email"] for _, values in chunk]
+    taken = {email for (email,) in db.query(School.email).filter(School.email.in_(emails))}
+    rejected = {}
+    for line, values in chunk:
+        if values["email"] in taken:
+            rejected[line] = ["email: school already exists"]
+        taken.add(values["email"])
+    return rejected
+
+
+# 2b. Bulk import schools (CSV or NDJSON body)
+@router.post("/import")
+async def import_schools(request: Request, format: Optional[str] = None, db: Session = Depends(get_db)):
+    fmt = bulk.detect_format(request, format)
+    upload = await bulk.spool_body(request)
+    try:
+        return await run_in_threadpool(
+            bulk.import_rows, db, bulk.read_rows(upload, fmt), School, SchoolCreate, check=_check_school_rows,
+        )
+    finally:
+        upload.close()
+
+
+# 2c. Export all schools as CSV or NDJSON, streamed
+@router.get("/export")
+def export_schools(request: Request, format: str = "csv"):
+    if format not in streaming.MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="format must be csv or ndjson")
+    statement = select(*[getattr(School, c) for c in EXPORT_COLUMNS]).order_by(School.id)
+    return streaming.stream_response(statement, format, EXPORT_COLUMNS, filename="schools",
+                                     session_factory=read_sessionmaker(request))
 
 
 # 3. Get school by ID
 @router.get("/{school_id}")
-def get_school(school_id: int, db: Session = Depends(get_db)):
-    school = db.query(School).filter(School.id == school_id).first()
-    if not school:
+def get_school(school_id: int, db: Session = Depends(get_db), bypass_cache: bool = Depends(cache.bypass)):
+    def load():
+        school = db.query(School).filter(School.id == school_id).first()
+        if not school:
+            return None
+        return {"id": school.id, "name": school.name, "email": school.email, "phone": school.phone, "location": school.location}
+
+    result = cache.get_or_load(f"school:{school_id}", load, bypass=bypass_cache)
+    if result is None:
         raise HTTPException(status_code=404, detail="School not found")
-    return {"id": school.id, "name": school.name, "email": school.email, "phone": school.phone, "location": school.location}
+    return result
 
 
 # 4. Update school profile
@@ -73,6 +125,9 @@ def update_school(school_id: int, data: SchoolUpdate, db: Session = Depends(get_
 
     db.commit()
     db.refresh(school)
+    # Cached job details embed the school name but are keyed by the schools
+    # version, which this commit bumped
+    cache.invalidate(f"school:{school_id}")
     return {
         "message": "School updated successfully", 
         "school": {
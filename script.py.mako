@@ -16,8 +16,8 @@ dependencies = None
 
 
 def upgrade():
-    pass
+    ${upgrades if upgrades else "pass"}
 
 
 def downgrade():
-    pass
+    ${downgrades if downgrades else "pass"}
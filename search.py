@@ -0,0 +1,157 @@
+"""Full-text search over job postings.
+
+SQLite keeps a separate FTS5 table (``job_postings_fts``) whose rowid is the
+posting id; the job handlers call ``index_job`` / ``remove_job`` in the same
+transaction as their own write. Postgres uses a GIN expression index over
+``to_tsvector`` of the same columns, which the database keeps in sync itself.
+Both are created by migration 0002.
+"""
+import re
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+
+FTS_TABLE = "job_postings_fts"
+PG_INDEX = "ix_job_postings_search"
+PG_DOCUMENT = (
+    "to_tsvector('english', coalesce(j.title, '') || ' ' || coalesce(j.subject, '') "
+    "|| ' ' || coalesce(j.description, ''))"
+)
+
+SNIPPET_OPEN = "<mark>"
+SNIPPET_CLOSE = "</mark>"
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Looked up on first use; False means there is no text index (FTS5 missing
+# from this SQLite build, or another database) and search falls back to LIKE
+_fts_enabled = None
+
+
+def _dialect(bind) -> str:
+    return bind.dialect.name
+
+
+def _index_enabled(db: Session) -> bool:
+    """Whether migration 0002 created the text index; looked up once per
+    process."""
+    global _fts_enabled
+    if _fts_enabled is None:
+        dialect = _dialect(db.get_bind())
+        if dialect == "sqlite":
+            sql, name = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name", FTS_TABLE
+        elif dialect == "postgresql":
+            sql, name = "SELECT 1 FROM pg_indexes WHERE indexname = :name", PG_INDEX
+        else:
+            _fts_enabled = False
+            return False
+        _fts_enabled = db.execute(text(sql), {"name": name}).first() is not None
+    return _fts_enabled
+
+
+def _uses_fts5(db: Session) -> bool:
+    return _dialect(db.get_bind()) == "sqlite" and _index_enabled(db)
+
+
+def index_job(db: Session, job) -> None:
+    """Insert or refresh the index entry for ``job`` (must be flushed)."""
+    if not _uses_fts5(db):
+        return
+    db.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), {"id": job.id})
+    db.execute(
+        text(f"INSERT INTO {FTS_TABLE} (rowid, title, subject, description) VALUES (:id, :title, :subject, :description)"),
+        {"id": job.id, "title": job.title, "subject": job.subject, "description": job.description or ""},
+    )
+
+
+def index_jobs(db: Session, job_ids) -> None:
+    """Index freshly inserted postings in one statement (bulk import)."""
+    if not _uses_fts5(db) or not job_ids:
+        return
+    db.execute(
+        text(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, subject, description) "
+            "SELECT id, title, subject, coalesce(description, '') FROM job_postings WHERE id IN :ids"
+        ).bindparams(bindparam("ids", expanding=True)),
+        {"ids": list(job_ids)},
+    )
+
+
+def rebuild_index(conn) -> None:
+    """Refill the FTS5 table from job_postings, after a bulk load that
+    bypassed ``index_job`` (``conn``: a Connection or Session)."""
+    if _dialect(conn.get_bind() if isinstance(conn, Session) else conn) != "sqlite":
+        return
+    exists = conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": FTS_TABLE}
+    ).first()
+    if exists:
+        conn.execute(text(f"DELETE FROM {FTS_TABLE}"))
+        conn.execute(text(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, subject, description) "
+            "SELECT id, title, subject, coalesce(description, '') FROM job_postings"
+        ))
+
+
+def remove_job(db: Session, job_id: int) -> None:
+    """Drop the index entry for a deleted posting."""
+    if not _uses_fts5(db):
+        return
+    db.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), {"id": job_id})
+
+
+def _fts5_query(q: str) -> str:
+    # Quote every token so user input can never be parsed as FTS5 syntax;
+    # the trailing * gives prefix matching for search-as-you-type.
+    tokens = _TOKEN_RE.findall(q)
+    return " ".join('"' + tok.replace('"', '""') + '"*' for tok in tokens)
+
+
+def search_jobs(db: Session, q: str, limit: int, offset: int):
+    """Ranked Active postings matching ``q`` as a list of row mappings with
+    the posting columns plus ``school_name``, ``rank`` and ``snippet``."""
+    dialect = _dialect(db.get_bind())
+    params = {"limit": limit, "offset": offset}
+    columns = (
+        "j.id, j.school_id, s.name AS school_name, j.title, j.subject, j.experience, "
+        "j.salary, j.status, j.created_at, j.updated_at"
+    )
+
+    if _uses_fts5(db):
+        match = _fts5_query(q)
+        if not match:
+            return []
+        params["match"] = match
+        sql = (
+            f"SELECT {columns}, bm25({FTS_TABLE}, 10.0, 5.0, 1.0) AS rank, "
+            f"snippet({FTS_TABLE}, -1, '{SNIPPET_OPEN}', '{SNIPPET_CLOSE}', '…', 16) AS snippet "
+            f"FROM {FTS_TABLE} "
+            f"JOIN job_postings j ON j.id = {FTS_TABLE}.rowid "
+            "LEFT JOIN schools s ON s.id = j.school_id "
+            f"WHERE {FTS_TABLE} MATCH :match AND j.status = 'Active' "
+            "ORDER BY rank LIMIT :limit OFFSET :offset"
+        )
+    elif dialect == "postgresql" and _index_enabled(db):
+        params["q"] = q
+        sql = (
+            f"SELECT {columns}, ts_rank({PG_DOCUMENT}, query) AS rank, "
+            "ts_headline('english', coalesce(j.description, ''), query, "
+            f"'StartSel={SNIPPET_OPEN}, StopSel={SNIPPET_CLOSE}, MaxWords=30, MinWords=10') AS snippet "
+            "FROM job_postings j "
+            "LEFT JOIN schools s ON s.id = j.school_id, "
+            "websearch_to_tsquery('english', :q) AS query "
+            f"WHERE {PG_DOCUMENT} @@ query AND j.status = 'Active' "
+            "ORDER BY rank DESC LIMIT :limit OFFSET :offset"
+        )
+    else:
+        params["like"] = f"%{q.strip()}%"
+        sql = (
+            f"SELECT {columns}, 0 AS rank, substr(coalesce(j.description, ''), 1, 200) AS snippet "
+            "FROM job_postings j "
+            "LEFT JOIN schools s ON s.id = j.school_id "
+            "WHERE j.status = 'Active' AND (lower(j.title) LIKE lower(:like) "
+            "OR lower(j.subject) LIKE lower(:like) OR lower(j.description) LIKE lower(:like)) "
+            "ORDER BY j.id DESC LIMIT :limit OFFSET :offset"
+        )
+
+    return db.execute(text(sql), params).mappings().all()
@@ -0,0 +1,208 @@
+"""Slow-query log with EXPLAIN capture.
+
+Every SQL statement that takes longer than ``SLOW_QUERY_MS`` is printed
+with its bound parameters and the route that issued it (from
+``metrics.current_route``; background workers show up under their thread
+name). Statements are also aggregated per fingerprint, which is the SQL
+with ``IN (?, ?, ...)`` lists collapsed, so an ``IN`` over 40 ids and one
+over 300 ids count as the same query. The first time a
+fingerprint is slow its plan is captured (``EXPLAIN QUERY PLAN`` on
+SQLite, ``EXPLAIN`` elsewhere) on the same connection.
+
+``GET /admin/slow-queries`` lists the worst fingerprints by total time.
+It only answers clients in ``SLOW_QUERY_ADMIN_HOSTS`` (loopback by
+default), and like ``/cache/stats`` it covers this worker only.
+"""
+import os
+import re
+import threading
+import time
+
+from fastapi import HTTPException, Request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+import metrics
+
+SLOW_QUERY_LOG = os.getenv("SLOW_QUERY_LOG", "1") == "1"
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "1") == "1"
+SLOW_QUERY_MAX_STATEMENTS = int(os.getenv("SLOW_QUERY_MAX_STATEMENTS", "500"))
+SLOW_QUERY_ADMIN_HOSTS = set(os.getenv("SLOW_QUERY_ADMIN_HOSTS", "127.0.0.1,::1,localhost").split(","))
+
+MAX_PARAMETERS_CHARS = 500
+EXPLAINABLE = ("SELECT", "WITH", "UPDATE", "DELETE")
+
+# A bound parameter in any of the DBAPI paramstyles in use
+_PLACEHOLDER = r"(?:\?|%s|%\(\w+\)s|\$\d+|:\w+)"
+_PLACEHOLDER_LIST = re.compile(rf"\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    return _PLACEHOLDER_LIST.sub("(...)", statement)
+
+
+def _format_parameters(parameters) -> str:
+    text = repr(parameters)
+    if len(text) > MAX_PARAMETERS_CHARS:
+        text = text[:MAX_PARAMETERS_CHARS] + "..."
+    return text
+
+
+def _origin() -> str:
+    return metrics.current_route() or threading.current_thread().name
+
+
+class SlowQuery:
+    __slots__ = ("fingerprint", "statement", "parameters", "count", "total_seconds", "max_seconds",
+                 "routes", "plan", "last_seen")
+
+    def __init__(self, key: str, statement: str):
+        self.fingerprint = key
+        self.statement = statement
+        self.parameters = None
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.routes = {}
+        self.plan = None
+        self.last_seen = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "fingerprint": self.fingerprint,
+            "statement": self.statement,
+            "parameters": self.parameters,
+            "count": self.count,
+            "total_ms": round(self.total_seconds * 1000, 1),
+            "mean_ms": round(self.total_seconds * 1000 / self.count, 1),
+            "max_ms": round(self.max_seconds * 1000, 1),
+            "routes": dict(sorted(self.routes.items(), key=lambda item: -item[1])),
+            "plan": self.plan,
+            "last_seen": self.last_seen,
+        }
+
+
+class SlowQueryLog:
+    """Thread-safe aggregate of slow statements, bounded to ``max_statements``
+    fingerprints (the one with the least total time is dropped first)."""
+
+    def __init__(self, threshold_ms: float = SLOW_QUERY_MS, max_statements: int = SLOW_QUERY_MAX_STATEMENTS,
+                 explain: bool = SLOW_QUERY_EXPLAIN):
+        self.threshold = threshold_ms / 1000
+        self.max_statements = max_statements
+        self.explain = explain
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def record(self, conn, statement: str, parameters, elapsed: float, executemany: bool):
+        route = _origin()
+        shown = _format_parameters(parameters)
+        print(f"Slow query {elapsed * 1000:.1f} ms [{route}]: {_WHITESPACE.sub(' ', statement).strip()} "
+              f"params={shown}")
+
+        key = fingerprint(statement)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                if len(self._entries) >= self.max_statements:
+                    coldest = min(self._entries.values(), key=lambda item: item.total_seconds)
+                    del self._entries[coldest.fingerprint]
+                entry = self._entries[key] = SlowQuery(key, statement)
+            entry.parameters = shown
+            entry.count += 1
+            entry.total_seconds += elapsed
+            entry.max_seconds = max(entry.max_seconds, elapsed)
+            entry.routes[route] = entry.routes.get(route, 0) + 1
+            entry.last_seen = time.time()
+            needs_plan = self.explain and entry.plan is None and not executemany
+            if needs_plan:
+                entry.plan = ""  # claimed; other threads skip the EXPLAIN
+
+        if needs_plan:
+            entry.plan = explain(conn, statement, parameters)
+
+    def top(self, limit: int = 20) -> list:
+        with self._lock:
+            entries = sorted(self._entries.values(), key=lambda item: -item.total_seconds)[:limit]
+            return [entry.as_dict() for entry in entries]
+
+    def reset(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def _sqlite_plan(rows) -> str:
+    # Rows are (id, parent, notused, detail); indent children under parents
+    depth = {0: -1}
+    lines = []
+    for node_id, parent, _, detail in rows:
+        depth[node_id] = depth.get(parent, -1) + 1
+        lines.append("  " * depth[node_id] + detail)
+    return "\n".join(lines)
+
+
+def explain(conn, statement: str, parameters) -> str:
+    """Plan for ``statement`` on ``conn``'s own DBAPI connection.
+
+    Runs on a fresh cursor so the caller's result is not disturbed; on
+    Postgres inside a savepoint, so a failed EXPLAIN cannot abort the
+    caller's transaction.
+    """
+    if not statement.lstrip().upper().startswith(EXPLAINABLE):
+        return "EXPLAIN skipped for this statement type"
+    dialect = conn.dialect.name
+    cursor = conn.connection.cursor()
+    savepoint = dialect == "postgresql"
+    try:
+        if savepoint:
+            cursor.execute("SAVEPOINT slowlog_explain")
+        try:
+            if dialect == "sqlite":
+                cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters)
+                plan = _sqlite_plan(cursor.fetchall())
+            else:
+                cursor.execute("EXPLAIN " + statement, parameters)
+                plan = "\n".join(" ".join(str(column) for column in row) for row in cursor.fetchall())
+        except Exception as exc:
+            if savepoint:
+                cursor.execute("ROLLBACK TO SAVEPOINT slowlog_explain")
+            return f"EXPLAIN failed: {exc}"
+        if savepoint:
+            cursor.execute("RELEASE SAVEPOINT slowlog_explain")
+        return plan
+    except Exception as exc:
+        return f"EXPLAIN failed: {exc}"
+    finally:
+        cursor.close()
+
+
+log = SlowQueryLog()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("slowlog_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["slowlog_started"].pop()
+    if SLOW_QUERY_LOG and elapsed >= log.threshold:
+        log.record(conn, statement, parameters, elapsed, executemany)
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("slowlog_started"):
+        conn.info["slowlog_started"].pop()
+
+
+def require_local(request: Request):
+    """Dependency for the admin endpoints: loopback clients only."""
+    host = request.client.host if request.client else None
+    if host not in SLOW_QUERY_ADMIN_HOSTS:
+        raise HTTPException(status_code=403, detail="Admin endpoints are only served to local clients")
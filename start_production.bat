@@ -9,6 +9,10 @@ set HOST=0.0.0.0
 set PORT=8000
 set WORKERS=4
 
+REM Migrate once here; uvicorn workers would otherwise all migrate at the same time
+python migrate.py || goto :eof
+set DB_MIGRATE_ON_STARTUP=0
+
 echo Starting Edumentor API on %HOST%:%PORT% with %WORKERS% workers...
 python -m uvicorn main:app --host %HOST% --port %PORT% --workers %WORKERS%
 pause
@@ -0,0 +1,154 @@
+"""Static HTML pages served from memory with precompressed variants.
+
+At startup every page is read once, hashed (SHA-256) and compressed with
+gzip and, when the optional ``brotli`` package is installed, brotli. Each
+page is reachable under two URLs:
+
+* ``/<name>.html`` with ``Cache-Control: no-cache``. Browsers revalidate
+  every visit and get a 304 from the strong ETag unless the file changed.
+* ``/<name>.<hash>.html``, a content-hashed alias served with a one-year
+  ``immutable`` lifetime (see ``manifest()`` for the mapping).
+
+Range requests and servers that support the ASGI ``http.response.pathsend``
+extension (zero-copy sendfile) are handed to Starlette's ``FileResponse``
+on the precompressed file written to ``STATIC_CACHE_DIR``. All other
+requests are answered from memory.
+"""
+import gzip
+import hashlib
+import os
+import tempfile
+from email.utils import formatdate
+from pathlib import Path
+
+from fastapi import Request
+from fastapi.responses import FileResponse, Response
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+STATIC_CACHE_DIR = Path(os.getenv("STATIC_CACHE_DIR", Path(tempfile.gettempdir()) / "edumentor-static"))
+REVALIDATE = "public, no-cache"
+IMMUTABLE = "public, max-age=31536000, immutable"
+HASH_LENGTH = 10
+
+
+class Asset:
+    def __init__(self, path: Path, media_type: str):
+        self.path = path
+        self.media_type = media_type
+        body = path.read_bytes()
+        digest = hashlib.sha256(body).hexdigest()
+        self.hash = digest[:HASH_LENGTH]
+        self.etag = f'"{digest[:32]}"'
+        self.last_modified = formatdate(path.stat().st_mtime, usegmt=True)
+        # encoding -> bytes; identity is always present
+        self.variants = {"identity": body, "gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            self.variants["br"] = brotli.compress(body, quality=11)
+        self.files = {"identity": path}
+
+    @property
+    def hashed_name(self) -> str:
+        return f"{self.path.stem}.{self.hash}{self.path.suffix}"
+
+    def write_variants(self, cache_dir: Path):
+        """Persist compressed variants so FileResponse can sendfile them.
+        File names are content-addressed, so workers can share the dir."""
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        for encoding, body in self.variants.items():
+            if encoding == "identity":
+                continue
+            target = cache_dir / f"{self.hashed_name}.{encoding}"
+            if not target.exists():
+                tmp = target.with_suffix(f".{os.getpid()}.tmp")
+                tmp.write_bytes(body)
+                os.replace(tmp, target)
+            self.files[encoding] = target
+
+
+def _accepted_encodings(header: str) -> set:
+    accepted = set()
+    for part in header.split(","):
+        token, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(token.strip().lower())
+    return accepted
+
+
+def _choose_encoding(asset: Asset, request: Request) -> str:
+    # Byte ranges always refer to the uncompressed file
+    if request.headers.get("range"):
+        return "identity"
+    accepted = _accepted_encodings(request.headers.get("accept-encoding", ""))
+    for encoding in ("br", "gzip"):
+        if encoding in asset.variants and (encoding in accepted or "*" in accepted):
+            return encoding
+    return "identity"
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    return header.strip() == "*" or etag in [tag.strip().removeprefix("W/") for tag in header.split(",")]
+
+
+def serve(asset: Asset, request: Request, cache_control: str) -> Response:
+    encoding = _choose_encoding(asset, request)
+    # Strong ETags must differ between encoded representations
+    etag = asset.etag if encoding == "identity" else f'{asset.etag[:-1]}-{encoding}"'
+    headers = {
+        "ETag": etag,
+        "Last-Modified": asset.last_modified,
+        "Cache-Control": cache_control,
+        "Vary": "Accept-Encoding",
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+
+    # Ranges are always identity, which is never missing; the compressed
+    # files are absent when precompress could not write them
+    zero_copy = "http.response.pathsend" in request.scope.get("extensions", {}) and encoding in asset.files
+    if request.headers.get("range") or zero_copy:
+        return FileResponse(asset.files[encoding], media_type=asset.media_type, headers=headers)
+    return Response(content=asset.variants[encoding], media_type=asset.media_type, headers=headers)
+
+
+class StaticAssets:
+    def __init__(self, directory: Path, names, media_type: str = "text/html"):
+        self.assets = {}
+        for name in names:
+            path = Path(directory) / name
+            if path.exists():
+                self.assets[name] = Asset(path, media_type)
+
+    def precompress(self, cache_dir: Path = STATIC_CACHE_DIR):
+        for asset in self.assets.values():
+            try:
+                asset.write_variants(cache_dir)
+            except OSError as e:
+                # Without the files we still serve everything from memory
+                print(f"Could not write precompressed {asset.path.name}: {e}")
+
+    def manifest(self) -> dict:
+        """Plain file name -> content-hashed URL path."""
+        return {name: f"/{asset.hashed_name}" for name, asset in self.assets.items()}
+
+    def register(self, app):
+        """Add GET/HEAD routes for the plain and hashed name of every asset."""
+        for name, asset in self.assets.items():
+            app.add_api_route(f"/{name}", self._endpoint(asset, REVALIDATE),
+                              methods=["GET", "HEAD"], include_in_schema=False)
+            app.add_api_route(f"/{asset.hashed_name}", self._endpoint(asset, IMMUTABLE),
+                              methods=["GET", "HEAD"], include_in_schema=False)
+
+    @staticmethod
+    def _endpoint(asset: Asset, cache_control: str):
+        async def endpoint(request: Request):
+            return serve(asset, request, cache_control)
+        return endpoint
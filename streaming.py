@@ -0,0 +1,91 @@
+"""Streaming CSV / NDJSON responses.
+
+Rows are fetched with ``yield_per`` over a server-side cursor
+(``stream_results``) and written out one batch at a time, so memory stays
+flat no matter how large the result is. The generator opens its own
+session because it keeps running after the handler has returned; it runs
+on the threadpool like any sync iterator passed to StreamingResponse.
+
+Exports pick the format with ``?format=``; list endpoints stay JSON unless
+the client asks for a stream with ``Accept: application/x-ndjson`` or
+``Accept: text/csv`` (see ``negotiate``).
+"""
+import csv
+import io
+import os
+from typing import Optional
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+import responses
+from database import SessionLocal
+
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "1000"))
+
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+ACCEPT_FORMATS = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "application/json": None,
+    "*/*": None,
+}
+
+
+def negotiate(request: Request) -> Optional[str]:
+    """"csv" or "ndjson" when the Accept header asks for a stream, None for
+    the regular JSON body. The first recognised media type wins."""
+    for part in request.headers.get("accept", "").split(","):
+        media_type = part.split(";")[0].strip().lower()
+        if media_type in ACCEPT_FORMATS:
+            return ACCEPT_FORMATS[media_type]
+    return None
+
+
+def iter_batches(statement, batch_size: int = STREAM_BATCH_SIZE, session_factory=SessionLocal):
+    """Yield lists of result rows, ``batch_size`` at a time."""
+    db = session_factory()
+    try:
+        result = db.execute(statement.execution_options(stream_results=True, yield_per=batch_size))
+        for partition in result.partitions():
+            yield partition
+    finally:
+        db.close()
+
+
+def _ndjson(batches, to_dict):
+    for batch in batches:
+        yield b"".join(responses.dumps(to_dict(row)) + b"\n" for row in batch)
+
+
+def _csv(batches, to_dict, columns):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+    writer.writeheader()
+    for batch in batches:
+        writer.writerows(to_dict(row) for row in batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def row_dict(row) -> dict:
+    return dict(row._mapping)
+
+
+def stream_response(statement, fmt: str, columns, to_dict=row_dict, filename=None, headers=None,
+                    session_factory=SessionLocal) -> StreamingResponse:
+    """StreamingResponse writing ``statement``'s rows as CSV or NDJSON."""
+    batches = iter_batches(statement, session_factory=session_factory)
+    body = _csv(batches, to_dict, columns) if fmt == "csv" else _ndjson(batches, to_dict)
+    headers = dict(headers or {})
+    if filename:
+        headers["Content-Disposition"] = f'attachment; filename="{filename}.{fmt}"'
+    return StreamingResponse(body, media_type=MEDIA_TYPES[fmt], headers=headers)
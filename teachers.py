@@ -1,18 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import or_, select
 from sqlalchemy.orm import Session
-from database import SessionLocal
-from models import Teacher
+from starlette.concurrency import run_in_threadpool
+from typing import Optional
+from database import get_db, SessionRunner
+from replicas import get_read_runner, read_sessionmaker
+from models import Teacher, User
 from schemas import TeacherCreate, TeacherUpdate
+from queries import teacher_rows
+import bulk
+import cache
+import matching
+import responses
+import streaming
+import versions
 
 router = APIRouter(prefix="/teachers", tags=["Teachers"])
 
-# Dependency
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# Page size bounds for the teacher search endpoint
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
 
 
 # 1. Create teacher profile
@@ -29,6 +36,7 @@ def create_teacher(teacher: TeacherCreate, db: Session = Depends(get_db)):
     db.add(new_teacher)
     db.commit()
     db.refresh(new_teacher)
+    matching.refresh_teachers(db, [new_teacher.id])
     return {
         "message": "Teacher profile created",
         "teacher": {
@@ -40,42 +48,116 @@ def create_teacher(teacher: TeacherCreate, db: Session = Depends(get_db)):
     }
 
 
-# 2. Get all teachers (active only)
-@router.get("/")
-def get_teachers(db: Session = Depends(get_db)):
-    teachers = db.query(Teacher).all()
-    result = []
-    for t in teachers:
-        # Try to include related user name and active status if available
-        name = None
-        verified = False
-        try:
-            if hasattr(t, 'user') and t.user:
-                name = t.user.name
-                verified = bool(getattr(t.user, 'active', False))
-        except Exception:
-            name = None
+def _search_teachers(db: Session, request: Request, response: Response, name=None, subject=None,
+                     location=None, min_experience=None, max_experience=None, verified=None,
+                     cursor=None, limit=DEFAULT_PAGE_SIZE):
+    not_modified = versions.conditional(request, response, *versions.table_token(db, "teachers", "users"))
+    if not_modified:
+        return not_modified
+
+    query = teacher_rows(db)
+
+    if name:
+        query = query.filter(User.name.ilike(f"%{name.strip()}%"))
+    if subject:
+        query = query.filter(Teacher.subject.ilike(f"%{subject.strip()}%"))
+    if location:
+        query = query.filter(Teacher.location.ilike(f"%{location.strip()}%"))
+    if min_experience is not None:
+        query = query.filter(Teacher.experience_years >= min_experience)
+    if max_experience is not None:
+        query = query.filter(Teacher.experience_years <= max_experience)
+    if verified is True:
+        query = query.filter(User.active.is_(True))
+    elif verified is False:
+        query = query.filter(or_(User.active.is_(False), User.active.is_(None)))
+
+    # Keyset pagination: ids are unique and monotonic, so "id > cursor"
+    # gives a stable order without the cost of OFFSET on deep pages.
+    if cursor is not None:
+        query = query.filter(Teacher.id > cursor)
+    rows = query.order_by(Teacher.id).limit(limit + 1).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
 
+    result = []
+    for t, user_name, user_active in rows:
         result.append({
             "id": t.id,
-            "name": name or f"Teacher #{t.id}",
+            "name": user_name or f"Teacher #{t.id}",
             "subject": t.subject,
             "bio": t.bio,
             "location": t.location,
-            "phone": getattr(t, 'phone', None),
-            "experience": getattr(t, 'experience_years', None),
-            "verified": verified
+            "phone": t.phone,
+            "experience": t.experience_years,
+            "verified": bool(user_active)
         })
 
-    return {"teachers": result}
+    next_cursor = result[-1]["id"] if has_more else None
+    return responses.rows_response({"teachers": result, "next_cursor": next_cursor}, response)
 
 
-# 3. Get teacher by ID
-@router.get("/{teacher_id}")
-def get_teacher(teacher_id: int, db: Session = Depends(get_db)):
-    teacher = db.query(Teacher).filter(Teacher.id == teacher_id).first()
-    if not teacher:
-        raise HTTPException(status_code=404, detail="Teacher not found")
+# 2. Search teachers (filtered, keyset-paginated by id)
+@router.get("/")
+async def get_teachers(
+    request: Request,
+    response: Response,
+    name: Optional[str] = None,
+    subject: Optional[str] = None,
+    location: Optional[str] = None,
+    min_experience: Optional[int] = Query(None, ge=0),
+    max_experience: Optional[int] = Query(None, ge=0),
+    verified: Optional[bool] = None,
+    cursor: Optional[int] = Query(None, ge=0, description="next_cursor from the previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    runner: SessionRunner = Depends(get_read_runner),
+):
+    return await runner.run(
+        _search_teachers, request, response, name=name, subject=subject, location=location,
+        min_experience=min_experience, max_experience=max_experience, verified=verified,
+        cursor=cursor, limit=limit,
+    )
+
+
+EXPORT_COLUMNS = ["id", "user_id", "subject", "bio", "location", "phone", "experience_years"]
+
+
+def _check_teacher_rows(db: Session, chunk):
+    """Reject rows linked to a user id that does not exist."""
+    user_ids = {values["user_id"] for _, values in chunk if values.get("user_id") is not None}
+    known = {user_id for (user_id,) in db.query(User.id).filter(User.id.in_(user_ids))} if user_ids else set()
+    return {
+        line: ["user_id: user not found"]
+        for line, values in chunk
+        if values.get("user_id") is not None and values["user_id"] not in known
+    }
+
+
+# 2b. Bulk import teacher profiles (CSV or NDJSON body)
+@router.post("/import")
+async def import_teachers(request: Request, format: Optional[str] = None, db: Session = Depends(get_db)):
+    fmt = bulk.detect_format(request, format)
+    upload = await bulk.spool_body(request)
+    try:
+        return await run_in_threadpool(
+            bulk.import_rows, db, bulk.read_rows(upload, fmt), Teacher, TeacherCreate, check=_check_teacher_rows,
+        )
+    finally:
+        upload.close()
+
+
+# 2c. Export all teacher profiles as CSV or NDJSON, streamed
+@router.get("/export")
+def export_teachers(request: Request, format: str = "csv"):
+    if format not in streaming.MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="format must be csv or ndjson")
+    statement = select(*[getattr(Teacher, c) for c in EXPORT_COLUMNS]).order_by(Teacher.id)
+    return streaming.stream_response(statement, format, EXPORT_COLUMNS, filename="teachers",
+                                     session_factory=read_sessionmaker(request))
+
+
+def _teacher_dict(teacher):
     return {
         "id": teacher.id,
         "subject": teacher.subject,
@@ -86,20 +168,30 @@ def get_teacher(teacher_id: int, db: Session = Depends(get_db)):
     }
 
 
+# 3. Get teacher by ID
+@router.get("/{teacher_id}")
+def get_teacher(teacher_id: int, db: Session = Depends(get_db), bypass_cache: bool = Depends(cache.bypass)):
+    def load():
+        teacher = db.query(Teacher).filter(Teacher.id == teacher_id).first()
+        return _teacher_dict(teacher) if teacher else None
+
+    result = cache.get_or_load(f"teacher:{teacher_id}", load, bypass=bypass_cache)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Teacher not found")
+    return result
+
+
 # 5. Get teacher by linked user id
 @router.get("/by_user/{user_id}")
-def get_teacher_by_user(user_id: int, db: Session = Depends(get_db)):
-    teacher = db.query(Teacher).filter(Teacher.user_id == user_id).first()
-    if not teacher:
+def get_teacher_by_user(user_id: int, db: Session = Depends(get_db), bypass_cache: bool = Depends(cache.bypass)):
+    def load():
+        teacher = db.query(Teacher).filter(Teacher.user_id == user_id).first()
+        return _teacher_dict(teacher) if teacher else None
+
+    result = cache.get_or_load(f"teacher_by_user:{user_id}", load, bypass=bypass_cache)
+    if result is None:
         raise HTTPException(status_code=404, detail="Teacher not found for user")
-    return {
-        "id": teacher.id,
-        "subject": teacher.subject,
-        "bio": teacher.bio,
-        "location": teacher.location,
-        "phone": getattr(teacher, 'phone', None),
-        "experience": getattr(teacher, 'experience_years', None)
-    }
+    return result
 
 
 # 4. Update teacher info
@@ -109,11 +201,14 @@ def update_teacher(teacher_id: int, teacher_data: TeacherUpdate, db: Session = D
     if not teacher:
         raise HTTPException(status_code=404, detail="Teacher not found")
 
+    previous_user_id = teacher.user_id
     for key, value in teacher_data.dict(exclude_unset=True).items():
         setattr(teacher, key, value)
 
     db.commit()
     db.refresh(teacher)
+    cache.invalidate(f"teacher:{teacher_id}", f"teacher_by_user:{previous_user_id}", f"teacher_by_user:{teacher.user_id}")
+    matching.refresh_teachers(db, [teacher.id])
     return {
         "message": "Teacher updated successfully",
         "teacher": {
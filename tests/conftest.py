@@ -0,0 +1,28 @@
+"""Shared setup: the app runs against a throwaway SQLite database.
+
+DATABASE_URL is read when ``database`` is imported, so it is set here,
+before any test module imports the app.
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp.name, 'tests.db')}"
+os.environ["DB_ASYNC"] = "0"
+os.environ.pop("DATABASE_REPLICA_URLS", None)
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+    from main import app
+
+    # Entering the client runs startup, which migrates the database
+    with TestClient(app) as client:
+        yield client
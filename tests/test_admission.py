@@ -0,0 +1,58 @@
+"""A released admission slot goes to the oldest waiter, not to whoever
+arrives before that waiter has run."""
+import asyncio
+
+import admission
+
+
+def test_newcomer_does_not_take_a_handed_over_slot():
+    async def scenario():
+        route = admission.RouteClass("test-handover", limit=1, queue_size=4)
+        admitted, peak = [], []
+
+        async def request(name):
+            assert await route.acquire(timeout=5) is None
+            admitted.append(name)
+            peak.append(route.active)
+            await asyncio.sleep(0)
+            route.release()
+
+        assert await route.acquire(timeout=5) is None
+        waiter = asyncio.create_task(request("waiter"))
+        await asyncio.sleep(0)
+        route.release()
+        # Same tick: the woken waiter has not run yet
+        await request("newcomer")
+        await waiter
+        return admitted, peak, route.active
+
+    admitted, peak, active = asyncio.run(scenario())
+    assert admitted == ["waiter", "newcomer"]
+    assert max(peak) == 1
+    assert active == 0
+
+
+def test_slot_handed_to_a_cancelled_waiter_is_passed_on():
+    async def scenario():
+        route = admission.RouteClass("test-cancel", limit=1, queue_size=4)
+        admitted, peak = [], []
+
+        async def request(name):
+            assert await route.acquire(timeout=5) is None
+            admitted.append(name)
+            peak.append(route.active)
+            route.release()
+
+        assert await route.acquire(timeout=5) is None
+        first = asyncio.create_task(request("first"))
+        second = asyncio.create_task(request("second"))
+        await asyncio.sleep(0)
+        route.release()
+        first.cancel()
+        await asyncio.gather(first, second, return_exceptions=True)
+        return admitted, peak, route.active
+
+    admitted, peak, active = asyncio.run(scenario())
+    assert "second" in admitted
+    assert max(peak) == 1
+    assert active == 0
@@ -0,0 +1,25 @@
+"""apply_for_job reports duplicates as such and nothing else."""
+from database import SessionLocal
+from models import JobPosting, School, Teacher, User
+
+
+def test_apply_unknown_teacher_and_twice(client):
+    db = SessionLocal()
+    school = School(name="Apply School", email="apply@school.test")
+    user = User(name="Applicant", email="applicant@apply.test", password="x", role="teacher")
+    db.add_all([school, user])
+    db.commit()
+    job = JobPosting(school_id=school.id, title="Apply job", subject="Maths")
+    teacher = Teacher(user_id=user.id, subject="Maths")
+    db.add_all([job, teacher])
+    db.commit()
+
+    missing = client.post("/jobs/apply/", json={"job_id": job.id, "teacher_id": teacher.id + 1000})
+    assert missing.status_code == 404
+    assert missing.json()["detail"] == "Teacher not found"
+
+    assert client.post("/jobs/apply/", json={"job_id": job.id, "teacher_id": teacher.id}).status_code == 200
+    again = client.post("/jobs/apply/", json={"job_id": job.id, "teacher_id": teacher.id})
+    assert again.status_code == 400
+    assert again.json()["detail"] == "Already applied to this job"
+    db.close()
@@ -0,0 +1,40 @@
+"""Collections are repeated only when Eversend refused them unprocessed."""
+import asyncio
+
+import httpx
+import pytest
+
+import eversend_client
+from eversend_client import EversendClient, EversendError
+
+
+def collection_attempts(monkeypatch, status: int, idempotent: bool) -> int:
+    monkeypatch.setattr(eversend_client, "EVERSEND_BACKOFF_BASE", 0)
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(status)
+
+    async def scenario():
+        client = EversendClient(base_url="https://eversend.test", transport=httpx.MockTransport(handler))
+        try:
+            await client._request("POST", "/collections/mobile-money", idempotent=idempotent, json={})
+        except EversendError:
+            pass
+        finally:
+            await client.aclose()
+
+    asyncio.run(scenario())
+    return len(calls)
+
+
+@pytest.mark.parametrize("status", [502, 504, 500])
+def test_gateway_errors_do_not_repeat_collections(monkeypatch, status):
+    assert collection_attempts(monkeypatch, status, idempotent=False) == 1
+    assert collection_attempts(monkeypatch, status, idempotent=True) == eversend_client.EVERSEND_MAX_RETRIES + 1
+
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_refused_collections_are_retried(monkeypatch, status):
+    assert collection_attempts(monkeypatch, status, idempotent=False) == eversend_client.EVERSEND_MAX_RETRIES + 1
@@ -0,0 +1,58 @@
+"""The matching index follows teacher writes it did not make itself by
+upserting the changed rows, never by reloading everything."""
+import pytest
+
+import matching
+from database import SessionLocal
+from models import Teacher, User
+
+
+@pytest.fixture
+def refresher_stopped(client, monkeypatch):
+    matching.refresher.stop()
+    db = SessionLocal()
+    matching.ensure_loaded(db)
+
+    def no_rebuild(db):
+        raise AssertionError("matching index reloaded in full")
+
+    monkeypatch.setattr(matching, "rebuild", no_rebuild)
+    yield db
+    db.close()
+    matching.refresher.start()
+
+
+def add_teacher(db, email: str) -> Teacher:
+    user = User(name="Matching", email=email, password="x", role="teacher")
+    db.add(user)
+    db.flush()
+    teacher = Teacher(user_id=user.id, subject="Chemistry", location="Gulu", experience_years=3)
+    db.add(teacher)
+    db.commit()
+    return teacher
+
+
+def test_changed_teachers_are_upserted(refresher_stopped):
+    db = refresher_stopped
+    # Written without refresh_teachers, as another worker would
+    teacher = add_teacher(db, "matching-new@example.com")
+    matching.refresh_if_stale()
+    assert teacher.id in matching.index.positions
+
+    teacher.subject = "Geography"
+    db.commit()
+    matching.refresh_if_stale()
+    best = matching.index.top("Geography", "Gulu", 3, limit=1)
+    assert best[0][0] == teacher.id and best[0][2]
+
+
+def test_user_writes_do_not_touch_the_index(refresher_stopped):
+    db = refresher_stopped
+    teacher = add_teacher(db, "matching-user@example.com")
+    matching.refresh_if_stale()
+    watermark = matching.index.watermark
+
+    teacher.user.password = "rehashed"
+    db.commit()
+    matching.refresh_if_stale()
+    assert matching.index.watermark == watermark
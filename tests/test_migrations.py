@@ -0,0 +1,68 @@
+"""The migration chain builds the schema the models describe, from an empty
+database and from one created by create_all before migrations existed."""
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from sqlalchemy import inspect, text
+
+import migrate
+import search
+from database import Base, make_engine
+
+
+def schema_drift(engine) -> list:
+    with engine.connect() as conn:
+        diffs = compare_metadata(MigrationContext.configure(conn), Base.metadata)
+    # FTS5 keeps its index in shadow tables the models know nothing about
+    return [d for d in diffs if not (d[0] == "remove_table" and d[1].name.startswith(search.FTS_TABLE))]
+
+
+def test_empty_database_upgrades_to_the_models(tmp_path):
+    engine = make_engine(f"sqlite:///{tmp_path / 'empty.db'}")
+    migrate.upgrade(engine)
+
+    assert schema_drift(engine) == []
+    assert search.FTS_TABLE in inspect(engine).get_table_names()
+    engine.dispose()
+
+
+def test_pre_migration_database_runs_the_chain(tmp_path):
+    engine = make_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    # The baseline schema without any migration history, like create_all made it
+    with engine.begin() as conn:
+        command.upgrade(migrate.alembic_config(conn), "0001")
+        conn.execute(text("DROP TABLE alembic_version"))
+        conn.execute(text("INSERT INTO users (name, email, password, role) VALUES ('a', 'a@legacy.test', 'x', 'teacher')"))
+
+    migrate.upgrade(engine)
+
+    assert schema_drift(engine) == []
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT unread_notifications FROM users")).scalar() == 0
+    engine.dispose()
+
+
+def test_downgrade_to_base_and_back(tmp_path):
+    engine = make_engine(f"sqlite:///{tmp_path / 'roundtrip.db'}")
+    migrate.upgrade(engine)
+    with engine.begin() as conn:
+        command.downgrade(migrate.alembic_config(conn), "base")
+    assert inspect(engine).get_table_names() == ["alembic_version"]
+
+    migrate.upgrade(engine)
+    assert schema_drift(engine) == []
+    engine.dispose()
+
+
+def test_duplicate_applications_are_reported_when_removed(tmp_path, capsys):
+    engine = make_engine(f"sqlite:///{tmp_path / 'duplicates.db'}")
+    with engine.begin() as conn:
+        command.upgrade(migrate.alembic_config(conn), "0005")
+        conn.execute(text("INSERT INTO job_applications (job_id, teacher_id) VALUES (1, 1), (1, 1), (1, 1), (2, 1)"))
+
+    migrate.upgrade(engine)
+
+    assert "Deleted 2 duplicate job application(s)" in capsys.readouterr().out
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT id FROM job_applications ORDER BY id")).scalars().all() == [1, 4]
+    engine.dispose()
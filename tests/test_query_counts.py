@@ -0,0 +1,87 @@
+"""List endpoints issue a fixed number of statements however many rows
+they return (no N+1 over teachers, schools or applicants)."""
+import pytest
+
+from database import SessionLocal, engine
+from models import User, Teacher, School, JobPosting, JobApplication
+from queries import count_queries
+
+ROWS = 10
+
+ENDPOINTS = [
+    "/teachers/?limit=100",
+    "/schools/",
+    "/jobs/",
+    "/jobs/school/{school_id}",
+    "/jobs/{job_id}/applications",
+    "/jobs/schools/{school_id}/applications",
+]
+
+
+def add_rows(school_id: int, job_id: int, rows: int):
+    """``rows`` more teachers, each applying to ``job_id``, and ``rows``
+    more job postings and schools."""
+    db = SessionLocal()
+    start = db.query(User).count()
+    for i in range(start, start + rows):
+        user = User(name=f"Teacher {i}", email=f"t{i}@counts.test", password="x", role="teacher")
+        db.add(user)
+        db.flush()
+        teacher = Teacher(user_id=user.id, subject="Maths", location="Kampala", phone=f"07{i:08d}")
+        db.add(teacher)
+        db.flush()
+        db.add(JobApplication(job_id=job_id, teacher_id=teacher.id))
+        db.add(JobPosting(school_id=school_id, title=f"Maths teacher {i}", subject="Maths", status="Active"))
+        db.add(School(name=f"School {i}", email=f"s{i}@counts.test", location="Gulu"))
+    db.commit()
+    db.close()
+
+
+@pytest.fixture(scope="module")
+def quiet_engine(client):
+    """Stop the polling workers so only the request's statements are counted."""
+    import matching
+    import notifications
+    import webhooks
+
+    workers = [notifications.worker, notifications.archiver, webhooks.worker, matching.refresher]
+    for worker in workers:
+        worker.stop()
+    yield
+    for worker in workers:
+        worker.start()
+
+
+@pytest.fixture(scope="module")
+def ids(quiet_engine):
+    db = SessionLocal()
+    school = School(name="Count School", email="counts@school.test", location="Kampala")
+    db.add(school)
+    db.flush()
+    job = JobPosting(school_id=school.id, title="Counted job", subject="Maths", status="Active")
+    db.add(job)
+    db.commit()
+    ids = {"school_id": school.id, "job_id": job.id}
+    db.close()
+    return ids
+
+
+def statements(client, path: str) -> tuple:
+    # The first call may warm per-process state (version rows, indexes)
+    client.get(path).raise_for_status()
+    with count_queries(engine) as counter:
+        res = client.get(path)
+    res.raise_for_status()
+    return counter.count, len(res.content)
+
+
+@pytest.mark.parametrize("endpoint", ENDPOINTS)
+def test_statement_count_is_independent_of_rows(client, ids, endpoint):
+    path = endpoint.format(**ids)
+    add_rows(ids["school_id"], ids["job_id"], ROWS)
+    small, small_size = statements(client, path)
+    add_rows(ids["school_id"], ids["job_id"], ROWS)
+    large, large_size = statements(client, path)
+
+    assert large_size > small_size, f"{path} did not return the added rows"
+    assert large == small, f"{path}: {small} statements for N rows, {large} for 2N"
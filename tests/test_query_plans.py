@@ -0,0 +1,16 @@
+"""Router queries use indexes: runs benchmarks/query_plans.py, which seeds
+its own database and fails on any unexpected full table scan."""
+import os
+import subprocess
+import sys
+
+from conftest import ROOT
+
+
+def test_no_unexpected_full_table_scans():
+    env = {key: value for key, value in os.environ.items() if key != "DATABASE_URL"}
+    result = subprocess.run(
+        [sys.executable, "-W", "ignore", os.path.join(ROOT, "benchmarks", "query_plans.py")],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
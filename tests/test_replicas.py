@@ -0,0 +1,38 @@
+"""Replica lag follows the heartbeat, so writes to tables without version
+counters (applications, notifications) are covered too."""
+import sqlite3
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, update
+
+import replicas
+from database import Base, make_engine
+from models import ReplicaHeartbeat
+
+
+def test_lag_counts_time_since_the_last_replayed_beat(tmp_path):
+    primary_path, replica_path = tmp_path / "primary.db", tmp_path / "replica.db"
+    primary = make_engine(f"sqlite:///{primary_path}")
+    Base.metadata.create_all(primary)
+    replicas.beat(primary)
+    source, target = sqlite3.connect(primary_path), sqlite3.connect(replica_path)
+    source.backup(target)
+    source.close()
+    target.close()
+    replica = replicas.Replica("replica-test", f"sqlite:///{replica_path}")
+    assert replicas.measure_lag(replica, replicas._heartbeat(primary)) == 0
+
+    # The replica stopped replaying ten minutes ago; the primary kept beating
+    with replica.engine.begin() as conn:
+        conn.execute(update(ReplicaHeartbeat).values(beat_at=datetime.utcnow() - timedelta(minutes=10)))
+    replicas.beat(primary)
+    assert 590 < replicas.measure_lag(replica, replicas._heartbeat(primary)) < 610
+
+    # Copied before the first beat: behind since that beat
+    with primary.begin() as conn:
+        conn.execute(update(ReplicaHeartbeat).values(first_beat_at=datetime.utcnow() - timedelta(minutes=5)))
+    with replica.engine.begin() as conn:
+        conn.execute(delete(ReplicaHeartbeat))
+    assert 290 < replicas.measure_lag(replica, replicas._heartbeat(primary)) < 310
+    replica.engine.dispose()
+    primary.dispose()
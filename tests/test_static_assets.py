@@ -0,0 +1,25 @@
+"""Pages stay servable when the precompressed files could not be written."""
+from pathlib import Path
+
+from fastapi import Request
+from fastapi.responses import FileResponse
+
+import static_assets
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_zero_copy_falls_back_to_memory_without_files():
+    asset = static_assets.Asset(ROOT / "index.html", "text/html")
+    # precompress never wrote the gzip/br files
+    request = Request({
+        "type": "http", "method": "GET", "path": "/index.html", "query_string": b"",
+        "headers": [(b"accept-encoding", b"gzip")],
+        "extensions": {"http.response.pathsend": {}},
+    })
+
+    response = static_assets.serve(asset, request, static_assets.REVALIDATE)
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert not isinstance(response, FileResponse)
+    assert response.body == asset.variants["gzip"]
@@ -0,0 +1,67 @@
+"""Table version counters: only writes a validator can see bump them, and
+304s are decided on the ETag alone."""
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+from database import SessionLocal
+from models import JobApplication, JobPosting, School, Teacher, TableVersion, User
+
+
+def version(db, table: str):
+    row = db.get(TableVersion, table)
+    db.expire_all()
+    return row.version if row else None
+
+
+def test_only_visible_writes_bump(client):
+    db = SessionLocal()
+    user = User(name="Versioned", email="versioned@versions.test", password="x", role="teacher")
+    school = School(name="Versions School", email="versions@school.test")
+    db.add_all([user, school])
+    db.commit()
+    teacher = Teacher(user_id=user.id, subject="Maths")
+    job = JobPosting(school_id=school.id, title="Versioned job", subject="Maths")
+    db.add_all([teacher, job])
+    db.commit()
+    users = version(db, "users")
+
+    user.password = "rehashed"
+    db.add(JobApplication(job_id=job.id, teacher_id=teacher.id))
+    db.commit()
+    assert version(db, "users") == users
+    assert version(db, "job_applications") is None
+
+    user.name = "Renamed"
+    db.commit()
+    assert version(db, "users") == users + 1
+    db.close()
+
+
+def test_if_modified_since_alone_never_gives_304(client):
+    first = client.get("/jobs/")
+    assert client.get("/jobs/", headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+
+    later = format_datetime(datetime.now(timezone.utc) + timedelta(days=1), usegmt=True)
+    assert client.get("/jobs/", headers={"If-Modified-Since": later}).status_code == 200
+
+
+def test_job_detail_body_follows_its_etag(client):
+    db = SessionLocal()
+    school = School(name="Detail School", email="detail@school.test")
+    db.add(school)
+    db.commit()
+    job = JobPosting(school_id=school.id, title="Before", subject="Maths")
+    db.add(job)
+    db.commit()
+    first = client.get(f"/jobs/{job.id}")
+    assert first.json()["title"] == "Before"
+
+    # Written elsewhere, as another worker would: nothing invalidates this
+    # worker's cache
+    job.title = "After"
+    db.commit()
+    second = client.get(f"/jobs/{job.id}", headers={"If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 200
+    assert second.json()["title"] == "After"
+    assert second.headers["ETag"] != first.headers["ETag"]
+    db.close()
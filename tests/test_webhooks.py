@@ -0,0 +1,37 @@
+"""Webhook events waiting for their Payment row do not hold up the queue."""
+import pytest
+
+import webhooks
+from database import SessionLocal
+from models import Payment, PaymentEvent
+
+
+@pytest.fixture
+def worker_stopped(client):
+    webhooks.worker.stop()
+    yield
+    webhooks.worker.start()
+
+
+def test_deferred_events_do_not_starve_newer_ones(worker_stopped):
+    batch = 10
+    db = SessionLocal()
+    # A full batch and more of callbacks for payments that do not exist yet
+    for i in range(batch * 2 + 5):
+        webhooks.record_event(db, {"transaction_id": f"TXN-EARLY-{i}", "event_id": f"e{i}", "status": "SUCCESS"})
+    db.add(Payment(amount=1000, method="MTN", transaction_id="TXN-MATCHED", status="PENDING"))
+    db.commit()
+    webhooks.record_event(db, {"transaction_id": "TXN-MATCHED", "event_id": "m1", "status": "FAILED"})
+
+    # Each pass defers what it cannot match, so the matched event is reached
+    passes = 0
+    while db.query(PaymentEvent).filter_by(transaction_id="TXN-MATCHED", processed_at=None).count():
+        passes += 1
+        assert passes <= 4, "matched event starved behind deferred ones"
+        webhooks.process_events(limit=batch)
+        db.expire_all()
+
+    assert db.query(Payment).filter_by(transaction_id="TXN-MATCHED").one().status == "FAILED"
+    deferred = db.query(PaymentEvent).filter(PaymentEvent.transaction_id.like("TXN-EARLY-%")).all()
+    assert all(e.processed_at is None and e.next_attempt_at is not None for e in deferred)
+    db.close()
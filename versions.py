@@ -0,0 +1,129 @@
+"""Cheap HTTP validators for polled endpoints.
+
+``table_versions`` holds one counter for each table in VERSIONED_TABLES,
+the tables whose state the list endpoints turn into validators. Any ORM
+flush that inserts, updates or deletes their rows bumps the counters on the
+same connection, so the bump commits or rolls back with the write. Bulk
+statements that bypass the ORM call ``bump`` themselves.
+
+A bump holds that counter's row lock until commit, so every writer to the
+table queues behind it. That is why the busy write paths (payment events,
+notifications, applications) are not versioned at all, and why changes to
+columns no versioned response shows (a password rehash on login) are not
+counted either.
+
+Handlers turn one or more counters (or any other cheap token) into an ETag
+and Last-Modified pair with ``conditional``. If the request's
+If-None-Match still matches, the handler returns 304 without building its
+payload.
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime
+
+from fastapi import Request, Response
+from sqlalchemy import event, insert, inspect, select, update
+from sqlalchemy.orm import Session
+
+from models import TableVersion
+
+VERSION_TABLE = TableVersion.__tablename__
+
+# Tables read through ``table_token``
+VERSIONED_TABLES = {"users", "teachers", "schools", "job_postings"}
+# Columns of versioned tables that no versioned response renders
+UNVERSIONED_COLUMNS = {"users": {"password", "unread_notifications"}}
+
+
+def ensure_versions(engine) -> None:
+    """Create a counter row for every table that does not have one yet."""
+    with engine.begin() as conn:
+        existing = {row[0] for row in conn.execute(select(TableVersion.table_name))}
+        missing = [name for name in sorted(VERSIONED_TABLES) if name not in existing]
+        if missing:
+            now = datetime.utcnow()
+            conn.execute(
+                insert(TableVersion),
+                [{"table_name": name, "version": 0, "updated_at": now} for name in missing],
+            )
+
+
+def bump(connection, *table_names: str) -> None:
+    """Increment the counters of ``table_names`` on ``connection`` (a Session
+    or Connection inside the writing transaction). Tables outside
+    VERSIONED_TABLES are ignored."""
+    table_names = VERSIONED_TABLES.intersection(table_names)
+    if not table_names:
+        return
+    connection.execute(
+        update(TableVersion)
+        .where(TableVersion.table_name.in_(sorted(table_names)))
+        .values(version=TableVersion.version + 1, updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_flushed_tables(session, flush_context):
+    tables = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        table = getattr(obj, "__tablename__", None)
+        if table not in VERSIONED_TABLES or table in tables:
+            continue
+        if obj in session.dirty and not _changed_columns(obj) - UNVERSIONED_COLUMNS.get(table, set()):
+            continue
+        tables.add(table)
+    if tables:
+        bump(session.connection(), *tables)
+
+
+def _changed_columns(obj) -> set:
+    return {attr.key for attr in inspect(obj).attrs if attr.history.has_changes()}
+
+
+def table_token(db: Session, *table_names: str):
+    """(token, last_modified) for the current state of ``table_names``."""
+    rows = db.execute(
+        select(TableVersion.table_name, TableVersion.version, TableVersion.updated_at)
+        .where(TableVersion.table_name.in_(table_names))
+    ).all()
+    token = ",".join(f"{name}:{version}" for name, version, _ in sorted(rows))
+    stamps = [updated_at for _, _, updated_at in rows if updated_at is not None]
+    return token, (max(stamps) if stamps else None)
+
+
+def _http_date(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # Weak comparison: ignore W/ prefixes on both sides
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return etag.removeprefix("W/") in candidates
+
+
+def conditional(request: Request, response: Response, token: str, last_modified: datetime = None):
+    """Set ETag / Last-Modified on ``response`` and return a 304 Response if the
+    client's copy is current, else None.
+
+    The path and query string are folded into the ETag so each page or
+    filter set of a list endpoint gets its own validator.
+    """
+    digest = hashlib.sha1(f"{token}|{request.url.path}?{request.url.query}".encode("utf-8")).hexdigest()[:20]
+    headers = {"ETag": f'W/"{digest}"', "Cache-Control": "private, no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = _http_date(last_modified)
+
+    # Only the ETag is trusted: If-Modified-Since has whole-second
+    # resolution, so a second write within the same second would be
+    # answered with a stale 304
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None and _etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return None
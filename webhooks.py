@@ -0,0 +1,153 @@
+"""Eversend webhook ingestion.
+
+The webhook endpoint only appends the raw delivery to ``payment_events``
+(unique on transaction id + event id, so provider retries are no-ops) and
+acknowledges. ``worker`` applies pending events in batches: one query for
+the affected payments, status transitions in memory, one UPDATE activating
+every paid teacher's user, and a single commit per batch.
+
+Transitions are idempotent (SUCCESS is terminal, repeated statuses are
+ignored), so two app workers racing over the same batch on SQLite converge
+on the same result; on Postgres rows are claimed with SKIP LOCKED.
+"""
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import Payment, PaymentEvent, Teacher, User
+from workers import PollingWorker
+import versions
+
+POLL_SECONDS = float(os.getenv("WEBHOOK_POLL_SECONDS", "1"))
+BATCH_SIZE = int(os.getenv("WEBHOOK_BATCH_SIZE", "200"))
+# How long an event may wait for its Payment row (the callback can beat
+# create_payment's commit) before it is closed as unmatched
+UNMATCHED_GRACE_SECONDS = int(os.getenv("WEBHOOK_UNMATCHED_GRACE_SECONDS", "300"))
+# How often such an event is retried meanwhile
+UNMATCHED_RETRY_SECONDS = float(os.getenv("WEBHOOK_UNMATCHED_RETRY_SECONDS", "5"))
+
+TERMINAL_STATUSES = {"SUCCESS"}
+
+
+def event_id_for(payload: dict) -> str:
+    """Provider event id, or a digest of the payload when none is sent so that
+    byte-identical retries still deduplicate."""
+    event_id = payload.get("event_id") or payload.get("id")
+    if event_id:
+        return str(event_id)
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return "sha256:" + hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def record_event(db: Session, payload: dict) -> bool:
+    """Append a webhook delivery. Returns False if it was already recorded."""
+    event = PaymentEvent(
+        transaction_id=str(payload["transaction_id"]),
+        event_id=event_id_for(payload),
+        status=payload.get("status"),
+        payload=json.dumps(payload),
+    )
+    db.add(event)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return False
+    return True
+
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def process_events(session_factory=SessionLocal, limit: int = BATCH_SIZE) -> int:
+    """Apply up to ``limit`` pending events in one transaction. Returns the
+    number of events closed by this call.
+
+    Events still waiting for their Payment row are deferred with
+    ``next_attempt_at`` and left out of the batches until then, so a backlog
+    of them never holds up newer events behind it."""
+    db = session_factory()
+    try:
+        now = datetime.utcnow()
+        events = (
+            db.query(PaymentEvent)
+            .filter(
+                PaymentEvent.processed_at.is_(None),
+                or_(PaymentEvent.next_attempt_at.is_(None), PaymentEvent.next_attempt_at <= now),
+            )
+            .order_by(PaymentEvent.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        if not events:
+            db.rollback()
+            return 0
+
+        txn_ids = {e.transaction_id for e in events}
+        payments = {
+            p.transaction_id: p
+            for p in db.query(Payment).filter(Payment.transaction_id.in_(txn_ids))
+        }
+
+        unmatched_cutoff = now - timedelta(seconds=UNMATCHED_GRACE_SECONDS)
+        paid_teacher_ids = set()
+        closed = 0
+        for event in events:
+            payment = payments.get(event.transaction_id)
+            if payment is None:
+                received_at = _as_utc(event.received_at) if event.received_at else None
+                if received_at and received_at > unmatched_cutoff:
+                    # Payment row may not be committed yet; retry later, and
+                    # once more right at the end of the grace period
+                    retry_at = now + timedelta(seconds=UNMATCHED_RETRY_SECONDS)
+                    event.next_attempt_at = min(retry_at, received_at + timedelta(seconds=UNMATCHED_GRACE_SECONDS))
+                    continue
+                event.outcome = "unmatched"
+            else:
+                new_status = (event.status or "").strip().upper()
+                if not new_status or new_status == payment.status or payment.status in TERMINAL_STATUSES:
+                    event.outcome = "ignored"
+                else:
+                    payment.status = new_status
+                    event.outcome = "applied"
+                    if new_status == "SUCCESS":
+                        paid_teacher_ids.add(payment.teacher_id)
+            event.processed_at = now
+            closed += 1
+
+        # Activate all paid teachers' accounts in one statement
+        if paid_teacher_ids:
+            db.execute(
+                update(User)
+                .where(User.id.in_(select(Teacher.user_id).where(Teacher.id.in_(paid_teacher_ids))))
+                .values(active=True)
+                .execution_options(synchronize_session=False)
+            )
+            versions.bump(db, User.__tablename__)
+            # Verification is part of the matching index, which follows teachers.updated_at
+            db.execute(
+                update(Teacher)
+                .where(Teacher.id.in_(paid_teacher_ids))
+                .values(updated_at=now)
+                .execution_options(synchronize_session=False)
+            )
+        db.commit()
+        return closed
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+worker = PollingWorker("webhook-worker", process_events, POLL_SECONDS, BATCH_SIZE)
@@ -0,0 +1,53 @@
+"""Background polling threads for queue tables.
+
+Each app worker runs its own threads; the queue processors they drive are
+written so that several processes draining the same table stay correct.
+"""
+import threading
+import traceback
+
+
+class PollingWorker:
+    """Calls ``process()`` every ``poll_seconds`` on a daemon thread.
+
+    ``process`` returns how many items it handled; while it keeps returning
+    a full ``batch_size`` the worker loops again immediately. Handlers call
+    ``wake()`` after committing new work so it is picked up without waiting
+    for the next poll.
+    """
+
+    def __init__(self, name: str, process, poll_seconds: float, batch_size: int):
+        self.name = name
+        self.process = process
+        self.poll_seconds = poll_seconds
+        self.batch_size = batch_size
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def wake(self):
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.clear()
+            try:
+                while self.process() >= self.batch_size and not self._stop.is_set():
+                    pass
+            except Exception:
+                print(f"{self.name} error:")
+                print(traceback.format_exc())
+            self._wake.wait(self.poll_seconds)